@@ -0,0 +1,160 @@
+import threading
+import time
+
+from api.metrics import metrics
+
+ALERT_TITLE = "Stop getting distracted!"
+ALERT_OPTION = "I'll apologize and lock in"
+ALERT_SPEECH = "Stop getting distracted! Apologize and get back to work!"
+RETRY_TITLE = "You must apologize!"
+RETRY_MESSAGE = "I didn't hear an apology. Say 'Sorry' or 'My Bad'."
+RETRY_OPTION = "Try Again"
+
+# Upper bound on one apology attempt; the listener normally returns as soon as the user stops talking
+LISTEN_DURATION = 8
+
+
+class AlertFlow:
+    """
+    One alert, from popup to accepted apology, run as a small state machine on
+    a worker thread so the Tk main loop never blocks on audio or the network.
+
+        speaking -> waiting -> listening -> done
+                       ^           |
+                       +-- retry <-+
+
+    `get_voice()` returns the voice engine; it is called on the worker, so it
+    may wait for an engine that is still warming. `prompt(title, message,
+    option, on_close)` must create a popup and return it; it is always called
+    on the main thread through `schedule`, and `on_close` may be called from
+    there too. `on_done(apologized)` is likewise scheduled onto the main
+    thread. cancel() can be called at any point and ends the flow within one
+    audio chunk; it never waits for the network.
+    """
+    def __init__(self, get_voice, voice_id, schedule, prompt, log, slapper=None, on_done=None):
+        self.get_voice = get_voice
+        self.voice = None  # Resolved on the worker
+        self.voice_id = voice_id
+        self.schedule = schedule
+        self.prompt = prompt
+        self.log = log
+        self.slapper = slapper
+        self.on_done = on_done
+
+        self.stage = "idle"
+        self.timings = []  # (stage, seconds) in the order they finished
+        self.cancelled = threading.Event()
+        self._acknowledged = threading.Event()
+        self._popup = None
+        self._stage_started = 0.0
+        self._started = 0.0
+        self._acknowledged_once = False
+        self._thread = None
+
+    def start(self, reason):
+        self._started = time.perf_counter()
+        metrics.event("alert.start", reason=reason)
+        self._thread = threading.Thread(target=self._run, args=(reason,), daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        if self.cancelled.is_set():
+            return
+        self.cancelled.set()
+        self._acknowledged.set()
+        voice = self.voice
+        if voice is not None:
+            try:
+                voice.stop()
+            except Exception:
+                pass  # Nothing was playing
+        self.schedule(self._close_popup)
+
+    # --- UI (main thread) ---
+    def _show(self, title, message, option):
+        self._acknowledged.clear()
+
+        def show():
+            if not self.cancelled.is_set():
+                self._popup = self.prompt(title, message, option, self._acknowledged.set)
+
+        self.schedule(show)
+
+    def _close_popup(self):
+        popup, self._popup = self._popup, None
+        if popup is not None and popup.winfo_exists():
+            popup.destroy()
+
+    # --- WORKER ---
+    def _enter(self, stage):
+        now = time.perf_counter()
+        if self.stage != "idle":
+            elapsed = now - self._stage_started
+            self.timings.append((self.stage, elapsed))
+            self.log(f"ALERT {self.stage}: {elapsed * 1000:.0f} ms")
+            metrics.observe(f"alert.{self.stage}", elapsed)
+        self.stage = stage
+        self._stage_started = now
+
+    def _wait_for_ack(self):
+        self._enter("waiting")
+        self._acknowledged.wait()
+        if self.cancelled.is_set():
+            return False
+        if not self._acknowledged_once:
+            # Alert shown -> user clicked through the first popup
+            self._acknowledged_once = True
+            metrics.observe("alert.acknowledge", time.perf_counter() - self._started)
+        return True
+
+    def _run(self, reason):
+        apologized = False
+        try:
+            try:
+                self.voice = self.get_voice()
+            except Exception as e:
+                self.log(f"Voice unavailable, skipping apology: {e}")
+                return
+            if self.cancelled.is_set():
+                return
+            self._show(ALERT_TITLE, reason, ALERT_OPTION)
+
+            self._enter("speaking")
+            if self.slapper:
+                self.slapper.slap_user()
+            try:
+                self.voice.play_audio(self.voice.synthesize(self.voice_id, ALERT_SPEECH))
+            except Exception as e:
+                self.log(f"Could not play alert: {e}")
+
+            while not self.cancelled.is_set():
+                if not self._wait_for_ack():
+                    break
+
+                self._enter("listening")
+                result = self.voice.listen_for_apology(LISTEN_DURATION, cancel=self.cancelled)
+                if self.cancelled.is_set():
+                    break
+                timings = self.voice.listener.timings if self.voice.listener else {}
+                if timings:
+                    self.log("ALERT heard: " + ", ".join(f"{event} {at:.2f}s" for event, at in timings.items()))
+
+                if result is not None:
+                    self.log(f"ALERT recognized by {result.backend}: {result.confidence:.2f}"
+                             + (f" ({result.error})" if result.error else ""))
+                    if result.apology:
+                        apologized = True
+                        break
+
+                self._enter("retry")
+                if self.slapper:
+                    self.slapper.slap_user()
+                self._show(RETRY_TITLE, RETRY_MESSAGE, RETRY_OPTION)
+        except Exception as e:
+            self.log(f"Alert failed: {e}")
+        finally:
+            self._enter("cancelled" if self.cancelled.is_set() else "done")
+            metrics.observe("alert.total", time.perf_counter() - self._started)
+            metrics.event("alert.end", outcome=self.stage, apologized=apologized)
+            if self.on_done and not self.cancelled.is_set():
+                self.schedule(lambda: self.on_done(apologized))
@@ -0,0 +1,127 @@
+import queue
+import time
+
+# Head pose limits (degrees) before the user counts as looking away
+YAW_LIMIT = 20
+PITCH_LIMIT = 25
+# Must come back this far inside the limits to count as looking at the screen again
+HYSTERESIS = 5
+# How long a new state must hold before it is reported (seconds)
+DWELL = 0.8
+AWAY_DWELL = 2.0
+# Reason reported when no face is found at all
+AWAY_FROM_DESK = "Away from Desk"
+
+
+def _kind(distracted, reason):
+    # The states listeners act on differently: focused, looking away, or nobody there
+    if not distracted:
+        return "focused"
+    return "away" if reason == AWAY_FROM_DESK else "looking_away"
+
+
+class AttentionEvent:
+    def __init__(self, distracted, reason, at):
+        self.distracted = distracted
+        self.reason = reason
+        self.at = at
+
+
+class AttentionMonitor:
+    """
+    Debounced focused/distracted state machine fed with head pose angles.
+
+    Angles are EMA-smoothed, leaving the "looking away" zone needs HYSTERESIS
+    degrees of margin, and a candidate state has to hold for DWELL seconds
+    (AWAY_DWELL when the face disappears) before it becomes the state. Blinks,
+    quick glances and single dropped detections therefore never flip it.
+    Every transition, and every change of reason while distracted, is
+    published as an AttentionEvent on `events`.
+    """
+    def __init__(self, events=None, yaw_limit=YAW_LIMIT, pitch_limit=PITCH_LIMIT, hysteresis=HYSTERESIS,
+                 dwell=DWELL, away_dwell=AWAY_DWELL, smoothing=0.4):
+        self.events = events if events is not None else queue.Queue()
+        self.yaw_limit = yaw_limit
+        self.pitch_limit = pitch_limit
+        self.hysteresis = hysteresis
+        self.dwell = dwell
+        self.away_dwell = away_dwell
+        self.smoothing = smoothing
+
+        self.distracted = False
+        self.reason = ""
+        self.pitch = None
+        self.yaw = None
+
+        self._candidate = None  # (distracted, reason)
+        self._candidate_since = 0.0
+
+    def _classify(self):
+        # Already distracted: the user has to come back well inside the limits
+        margin = self.hysteresis if self.distracted else 0
+        yaw_limit = self.yaw_limit - margin
+        pitch_limit = self.pitch_limit - margin
+
+        if self.yaw < -yaw_limit:
+            return True, "Stop looking to the left!"
+        if self.yaw > yaw_limit:
+            return True, "Stop looking to the right!"
+        if self.pitch < -pitch_limit:
+            return True, "Stop looking down!"
+        if self.pitch > pitch_limit:
+            return True, "Stop looking up!"
+        return False, ""
+
+    def update(self, pitch, yaw, now=None):
+        """Feeds one frame's head pose (degrees). Returns an AttentionEvent on a transition."""
+        if self.pitch is None:
+            self.pitch, self.yaw = pitch, yaw
+        else:
+            a = self.smoothing
+            self.pitch = a * pitch + (1 - a) * self.pitch
+            self.yaw = a * yaw + (1 - a) * self.yaw
+
+        distracted, reason = self._classify()
+        return self._settle(distracted, reason, self.dwell, now)
+
+    def face_lost(self, now=None):
+        """Feeds a frame with no face in it."""
+        self.pitch = self.yaw = None
+        return self._settle(True, AWAY_FROM_DESK, self.away_dwell, now)
+
+    def _settle(self, distracted, reason, dwell, now):
+        now = time.monotonic() if now is None else now
+
+        kind = _kind(distracted, reason)
+        if kind == _kind(self.distracted, self.reason):
+            self._candidate = None
+            if reason == self.reason:
+                return None
+            # Same state, different direction: report the new message right away
+            return self._publish(distracted, reason, now)
+
+        # A new state, including looking away <-> no face, has to hold for the dwell first
+        if self._candidate is None or _kind(*self._candidate) != kind:
+            self._candidate_since = now
+        self._candidate = (distracted, reason)
+
+        if now - self._candidate_since < dwell:
+            return None
+        return self._publish(distracted, reason, now)
+
+    def _publish(self, distracted, reason, now):
+        self.distracted, self.reason = distracted, reason
+        self._candidate = None
+        event = AttentionEvent(distracted, reason, now)
+        self.events.put(event)
+        return event
+
+    def reset(self, now=None):
+        """Back to focused with no pose history; listeners hear about it if that's a change."""
+        was_distracted = self.distracted
+        self.distracted = False
+        self.reason = ""
+        self.pitch = self.yaw = None
+        self._candidate = None
+        if was_distracted:
+            self._publish(False, "", time.monotonic() if now is None else now)
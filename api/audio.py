@@ -1,113 +1,200 @@
 import io
+import time
 import wave
-import array
-import pyaudio
 from elevenlabs import ElevenLabs
 from elevenlabs.play import play as elevenlabs_play
 
+from api.audio_cache import AudioCache, audio_key
+from api.listener import ApologyListener, MicrophoneSource
+from api.metrics import metrics
+
 APOLOGY_KEYWORDS = [
     "sorry",
     "my bad",
     "apologies",
 ]
 
-class VoiceAudio:
-    client: ElevenLabs
-    audio_cache: map
-
-    def __init__(self, key):
-        self.client = ElevenLabs(api_key=key)
-
-    def play(self, voice_id, text):
-        audio = self.client.text_to_speech.convert(
-            voice_id=voice_id,
-            text=text,
-        )
-
-        elevenlabs_play(audio=audio, use_ffmpeg=False)
-
-    def listen_for_apology(self, duration=5, silence_threshold=500):
-        """
-        Records audio and transcribes it, but only if the volume exceeds the silence threshold.
-
-        Args:
-            duration (int): Seconds to record.
-            silence_threshold (int): Amplitude threshold (0-32768).
-                                    Below ~500 is usually just background noise.
-        """
-        CHUNK = 1024
-        FORMAT = pyaudio.paInt16
-        CHANNELS = 1
-        RATE = 16000
-
-        p = pyaudio.PyAudio()
-
-        print(f"🎤 Recording for {duration} seconds... (Speak now)")
+# Pinned so cached clips stay valid if the API default changes
+TTS_MODEL = "eleven_multilingual_v2"
+TTS_FORMAT = "mp3_44100_128"
+STT_MODEL = "scribe_v2"
 
-        stream = p.open(format=FORMAT,
-                        channels=CHANNELS,
-                        rate=RATE,
-                        input=True,
-                        frames_per_buffer=CHUNK)
+# FallbackRecognizer: local answers at or beyond these confidences are final
+ACCEPT_CONFIDENCE = 0.75
+REJECT_CONFIDENCE = 0.25
 
-        frames = []
 
-        # Record audio
-        for _ in range(0, int(RATE / CHUNK * duration)):
-            data = stream.read(CHUNK)
-            frames.append(data)
+class Recognition:
+    """One recognizer's answer for one utterance."""
+    def __init__(self, apology, confidence, backend, text="", error=None, latency=0.0):
+        self.apology = apology
+        self.confidence = confidence  # 0..1 that the utterance is an apology
+        self.backend = backend
+        self.text = text
+        self.error = error
+        self.latency = latency
 
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
+    def __repr__(self):
+        detail = f"error={self.error!r}" if self.error else f"text={self.text!r}"
+        return f"Recognition({self.apology}, {self.confidence:.2f}, {self.backend}, {detail}, {self.latency * 1000:.0f} ms)"
 
-        # --- SILENCE DETECTION START ---
-        # Combine all chunks into one byte stream
-        raw_data = b''.join(frames)
 
-        # Convert raw bytes to integers (16-bit signed) using array
-        # 'h' represents a signed short integer (2 bytes)
-        audio_data = array.array('h', raw_data)
+class RemoteRecognizer:
+    """ElevenLabs speech-to-text plus a keyword match on the transcript."""
+    name = "remote"
 
-        # Find the loudest point in the recording
-        # We take the absolute value because sound waves oscillate positive/negative
-        max_amplitude = max(abs(sample) for sample in audio_data)
-
-        print(f"📊 Max Volume Detected: {max_amplitude}/{32767}")
-
-        if max_amplitude < silence_threshold:
-            print("❌ No speech detected (Volume too low). Skipping API call.")
-            return False
-        # --- SILENCE DETECTION END ---
-
-        print("✅ Speech detected. Transcribing...")
+    def __init__(self, client, keywords=APOLOGY_KEYWORDS):
+        self.client = client
+        self.keywords = keywords
 
+    def recognize(self, pcm, rate):
+        started = time.perf_counter()
         audio_buffer = io.BytesIO()
         with wave.open(audio_buffer, 'wb') as wf:
-            wf.setnchannels(CHANNELS)
-            wf.setsampwidth(p.get_sample_size(FORMAT))
-            wf.setframerate(RATE)
-            wf.writeframes(raw_data)
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(pcm)
 
         audio_buffer.seek(0)
 
         try:
-            transcription: str = self.client.speech_to_text.convert(
+            transcription = self.client.speech_to_text.convert(
                 file=audio_buffer,
-                model_id="scribe_v2",
+                model_id=STT_MODEL,
                 tag_audio_events=False,
                 language_code="eng"
             )
+        except Exception as e:
+            return Recognition(False, 0.0, self.name, error=f"transcription failed: {e}",
+                               latency=time.perf_counter() - started)
+
+        text = getattr(transcription, "text", None)
+        if type(text) is not str:
+            return Recognition(False, 0.0, self.name, error="transcription had no text",
+                               latency=time.perf_counter() - started)
+
+        apology = any(keyword in text.lower() for keyword in self.keywords)
+        return Recognition(apology, 1.0 if apology else 0.0, self.name, text=text,
+                           latency=time.perf_counter() - started)
+
+
+class FallbackRecognizer:
+    """
+    Asks `primary` (local, fast) first and only consults `fallback` (remote)
+    when the primary's confidence lands between REJECT and ACCEPT. Without a
+    fallback, or if the fallback fails, the primary's best guess stands.
+    """
+    def __init__(self, primary, fallback=None, accept=ACCEPT_CONFIDENCE, reject=REJECT_CONFIDENCE):
+        self.primary = primary
+        self.fallback = fallback
+        self.accept = accept
+        self.reject = reject
+        self.name = primary.name if fallback is None else f"{primary.name}+{fallback.name}"
+
+    def recognize(self, pcm, rate):
+        first = self.primary.recognize(pcm, rate)
+        if first.error is None and (first.confidence >= self.accept or first.confidence <= self.reject):
+            return first
+        if self.fallback is None:
+            return first
+
+        second = self.fallback.recognize(pcm, rate)
+        if second.error is not None and first.error is None:
+            return first
+        return second
 
-            transcription = transcription.text
-
-            if type(transcription) is not str:
-                return False
+class VoiceAudio:
+    client: ElevenLabs
+    audio_cache: AudioCache
+
+    def __init__(self, key, audio_cache=None, audio_source=None, local_recognizer=None, remote_fallback=True,
+                 base_url=None):
+        # base_url points the SDK somewhere else (e.g. bench.stub_voice)
+        self.client = ElevenLabs(api_key=key, base_url=base_url)
+        # Local keyword spotting first; the STT API only settles uncertain cases
+        remote = RemoteRecognizer(self.client) if remote_fallback else None
+        if local_recognizer is None and remote is None:
+            raise ValueError("VoiceAudio needs a local recognizer or the remote fallback")
+        if local_recognizer is not None:
+            self.recognizer = FallbackRecognizer(local_recognizer, remote)
+        else:
+            self.recognizer = remote
+        self.audio_cache = audio_cache if audio_cache is not None else AudioCache()
+        # Microphone by default; a WavFileSource stands in for it in tests
+        self.audio_source = audio_source
+        self.listener = None
+
+    def synthesize(self, voice_id, text):
+        """Text to speech; returns the whole clip as bytes, from the cache when possible."""
+        key = audio_key(voice_id, text, TTS_MODEL, TTS_FORMAT)
+        with metrics.span("voice.tts") as span:
+            audio = self.audio_cache.get(key)
+            if audio is not None:
+                span.set(cached=True)
+                return audio
+
+            audio = self.client.text_to_speech.convert(
+                voice_id=voice_id,
+                text=text,
+                model_id=TTS_MODEL,
+                output_format=TTS_FORMAT,
+            )
+            audio = b"".join(audio)
+            span.set(cached=False, bytes=len(audio))
+        try:
+            self.audio_cache.put(key, audio)
+        except OSError as e:
+            print(f"Could not store TTS clip: {e}")
+        return audio
+
+    def prefetch(self, voice_id, texts):
+        """Synthesizes any of `texts` not cached yet. Returns how many were fetched."""
+        fetched = 0
+        for text in texts:
+            if audio_key(voice_id, text, TTS_MODEL, TTS_FORMAT) not in self.audio_cache:
+                self.synthesize(voice_id, text)
+                fetched += 1
+        return fetched
+
+    def play_audio(self, audio):
+        # Blocks until the clip ends or stop() is called from another thread
+        with metrics.span("voice.play"):
+            elevenlabs_play(audio=audio, use_ffmpeg=False)
 
-            for keyword in APOLOGY_KEYWORDS:
-                if transcription.lower().find(keyword) != -1:
-                    return True
+    def play(self, voice_id, text):
+        self.play_audio(self.synthesize(voice_id, text))
+
+    def stop(self):
+        """Cuts off whatever play_audio is currently playing."""
+        import sounddevice as sd
+        sd.stop()
+
+    def open_microphone(self):
+        """Opens the input device (once); call ahead of time to keep PortAudio init off the alert path."""
+        if self.listener is None:
+            source = self.audio_source if self.audio_source is not None else MicrophoneSource()
+            self.listener = ApologyListener(source, self._recognize)
+
+    def _recognize(self, pcm, rate):
+        with metrics.span("voice.recognize") as span:
+            result = self.recognizer.recognize(pcm, rate)
+            span.set(backend=result.backend, confidence=result.confidence, error=result.error)
+        metrics.count(f"voice.recognize.{result.backend}")
+        return result
+
+    def listen_for_apology(self, duration=8, cancel=None):
+        """
+        Listens until the user finishes one utterance (or `duration` seconds pass)
+        and returns the deciding Recognition (`.apology`, `.confidence`, `.error`),
+        or None if nothing was said.
 
-            return False
-        except Exception as e:
-            return f"Error during transcription: {e}"
\ No newline at end of file
+        Args:
+            duration (int): Upper bound in seconds; normally returns long before.
+            cancel (threading.Event): Stops listening early when set.
+        """
+        self.open_microphone()
+        with metrics.span("voice.listen") as span:
+            result = self.listener.listen(duration, cancel)
+            span.set(apologized=bool(result and result.apology), timings=dict(self.listener.timings))
+        return result
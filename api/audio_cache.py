@@ -0,0 +1,90 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+def audio_key(voice_id, text, model_id, output_format=""):
+    """Content address of one synthesized clip."""
+    raw = f"{voice_id}\0{model_id}\0{output_format}\0{text}".encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+class AudioCache:
+    """
+    Synthesized speech keyed by (voice, text, model, format). Recently played
+    clips are kept in memory (LRU, bounded by bytes); every clip is also
+    written to `directory` so phrases survive restarts and play offline.
+    """
+    def __init__(self, directory=None, max_bytes=8_000_000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        # key -> clip bytes
+        self.entries = OrderedDict()
+        self.size_bytes = 0
+        self.lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".audio")
+
+    def get(self, key):
+        with self.lock:
+            audio = self.entries.get(key)
+            if audio is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return audio
+
+        audio = self._read(key)
+        with self.lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, audio)
+        return audio
+
+    def put(self, key, audio):
+        with self.lock:
+            self._remember(key, audio)
+        self._write(key, audio)
+
+    def __contains__(self, key):
+        with self.lock:
+            if key in self.entries:
+                return True
+        return bool(self.directory) and os.path.exists(self._path(key))
+
+    def _remember(self, key, audio):
+        if key in self.entries:
+            self.size_bytes -= len(self.entries.pop(key))
+        self.entries[key] = audio
+        self.size_bytes += len(audio)
+
+        while len(self.entries) > 1 and self.size_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size_bytes -= len(evicted)
+
+    # --- PERSISTENCE ---
+    def _read(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, key, audio):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
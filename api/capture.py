@@ -0,0 +1,252 @@
+import cv2
+import mss
+import numpy as np
+from PIL import Image
+
+from api.fingerprint import perceptual_hash
+
+# Each monitor is split into square tiles of this many pixels
+TILE_SIZE = 128
+# Each tile is summarised by SAMPLES x SAMPLES averaged pixels
+SAMPLES = 4
+# A tile is dirty if any of its averaged pixels moved by more than this (0-255)
+TILE_THRESHOLD = 16
+
+# Above this fraction of dirty tiles the full screen is cheaper to describe than a mosaic
+FULL_FRAME_FRACTION = 0.4
+
+# Size caps for what gets uploaded
+FULL_SIZE = (2048, 1024)
+MOSAIC_SIZE = (1024, 1536)
+MOSAIC_GAP = 6
+
+# Gaze-focused payload: a detailed crop around where the user looks + a small overview
+GAZE_FRACTION = 0.5
+GAZE_DETAIL_SIZE = (1024, 768)
+GAZE_OVERVIEW_SIZE = (1024, 320)
+
+
+def fit(pixels, max_size):
+    """Downscales an image array to fit inside max_size (never upscales)."""
+    height, width = pixels.shape[:2]
+    scale = min(max_size[0] / width, max_size[1] / height, 1.0)
+    if scale >= 1.0:
+        return pixels
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(pixels, size, interpolation=cv2.INTER_AREA)
+
+
+class MonitorFrame:
+    """
+    One monitor's grab. `pixels` is a BGRA array viewing the mss buffer directly,
+    so nothing is copied until something actually needs a smaller or RGB version.
+    """
+    def __init__(self, index, rect, pixels):
+        self.index = index
+        self.rect = rect  # (left, top, width, height) in desktop coordinates
+        self.pixels = pixels
+        self.height, self.width = pixels.shape[:2]
+        self._image = None
+
+        self.cols = max(1, -(-self.width // TILE_SIZE))
+        self.rows = max(1, -(-self.height // TILE_SIZE))
+        self.signature = self._signature()
+
+    def _signature(self):
+        """Each tile_box area-averaged down to SAMPLES x SAMPLES gray pixels."""
+        small = np.empty((self.rows * SAMPLES, self.cols * SAMPLES, self.pixels.shape[2]), dtype=np.uint8)
+        full_cols, full_rows = self.width // TILE_SIZE, self.height // TILE_SIZE
+        if full_cols and full_rows:
+            # Whole tiles in one pass: an exact TILE_SIZE / SAMPLES block average, no copy of the grab
+            small[:full_rows * SAMPLES, :full_cols * SAMPLES] = cv2.resize(
+                self.pixels[:full_rows * TILE_SIZE, :full_cols * TILE_SIZE],
+                (full_cols * SAMPLES, full_rows * SAMPLES),
+                interpolation=cv2.INTER_AREA,
+            )
+        # Partial tiles along the right and bottom edges, so each cell still covers only its own tile
+        edges = [(c, r) for c in range(full_cols, self.cols) for r in range(self.rows)]
+        edges += [(c, r) for c in range(full_cols) for r in range(full_rows, self.rows)]
+        for col, row in edges:
+            x0, y0, x1, y1 = self.tile_box(col, row)
+            small[row * SAMPLES:(row + 1) * SAMPLES, col * SAMPLES:(col + 1) * SAMPLES] = cv2.resize(
+                self.pixels[y0:y1, x0:x1], (SAMPLES, SAMPLES), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGRA2GRAY)
+
+    @property
+    def image(self):
+        """Full-resolution PIL copy, built on first use (OCR, debugging)."""
+        if self._image is None:
+            self._image = Image.fromarray(cv2.cvtColor(self.pixels, cv2.COLOR_BGRA2RGB))
+        return self._image
+
+    def tile_box(self, col, row):
+        x0, y0 = col * TILE_SIZE, row * TILE_SIZE
+        return (x0, y0, min(x0 + TILE_SIZE, self.width), min(y0 + TILE_SIZE, self.height))
+
+
+class CaptureFrame:
+    """One grab of every monitor plus which tiles changed since the reference grab."""
+    def __init__(self, monitors, dirty=None, has_reference=False):
+        self.monitors = monitors
+        self.dirty = dirty or {}  # monitor index -> set of (col, row)
+        self.has_reference = has_reference
+        self._overview = None
+
+    def images(self):
+        return [monitor.image for monitor in self.monitors]
+
+    def dirty_fraction(self):
+        total = sum(m.cols * m.rows for m in self.monitors)
+        changed = sum(len(tiles) for tiles in self.dirty.values())
+        return changed / total if total else 0.0
+
+    def composite(self, max_size=FULL_SIZE):
+        """All monitors side by side as one BGR array, scaled to fit `max_size`."""
+        height = min(max_size[1], max(m.height for m in self.monitors))
+        scaled = []
+        for monitor in self.monitors:
+            width = max(1, monitor.width * height // monitor.height)
+            scaled.append(cv2.resize(monitor.pixels, (width, height), interpolation=cv2.INTER_AREA))
+
+        canvas = cv2.cvtColor(np.hstack(scaled), cv2.COLOR_BGRA2BGR)
+        return fit(canvas, max_size)
+
+    def fingerprint(self):
+        if self._overview is None:
+            small = self.composite((512, 256))
+            self._overview = Image.fromarray(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+        return perceptual_hash(self._overview)
+
+    def locate(self, point):
+        """
+        Maps a gaze point normalised to the primary monitor onto (monitor, x, y)
+        in that monitor's pixels, following the desktop layout past its edges.
+        """
+        primary = self.monitors[0]
+        left, top, width, height = primary.rect
+        desk_x = left + point[0] * width
+        desk_y = top + point[1] * height
+
+        def distance(monitor):
+            m_left, m_top, m_width, m_height = monitor.rect
+            dx = max(m_left - desk_x, 0, desk_x - (m_left + m_width))
+            dy = max(m_top - desk_y, 0, desk_y - (m_top + m_height))
+            return dx * dx + dy * dy
+
+        monitor = min(self.monitors, key=distance)
+        m_left, m_top, m_width, m_height = monitor.rect
+        # mss rects are in desktop units; pixels can differ under display scaling
+        x = (desk_x - m_left) * monitor.width / m_width
+        y = (desk_y - m_top) * monitor.height / m_height
+        return monitor, min(max(x, 0), monitor.width - 1), min(max(y, 0), monitor.height - 1)
+
+    def focus(self, point, fraction=GAZE_FRACTION):
+        """Detailed crop around the gaze point stacked over a low-res overview of every monitor."""
+        monitor, x, y = self.locate(point)
+        crop_w, crop_h = int(monitor.width * fraction), int(monitor.height * fraction)
+        x0 = int(min(max(x - crop_w / 2, 0), monitor.width - crop_w))
+        y0 = int(min(max(y - crop_h / 2, 0), monitor.height - crop_h))
+
+        detail = fit(monitor.pixels[y0:y0 + crop_h, x0:x0 + crop_w], GAZE_DETAIL_SIZE)
+        detail = cv2.cvtColor(detail, cv2.COLOR_BGRA2BGR)
+        overview = self.composite(GAZE_OVERVIEW_SIZE)
+
+        width = max(detail.shape[1], overview.shape[1])
+        canvas = np.zeros((detail.shape[0] + MOSAIC_GAP + overview.shape[0], width, 3), dtype=np.uint8)
+        canvas[:detail.shape[0], :detail.shape[1]] = detail
+        canvas[detail.shape[0] + MOSAIC_GAP:, :overview.shape[1]] = overview
+        return canvas
+
+    def dirty_regions(self):
+        """Bounding boxes (monitor, box) of each connected group of dirty tiles."""
+        regions = []
+        for monitor in self.monitors:
+            remaining = set(self.dirty.get(monitor.index, ()))
+            while remaining:
+                stack = [remaining.pop()]
+                cols, rows = [], []
+                while stack:
+                    col, row = stack.pop()
+                    cols.append(col)
+                    rows.append(row)
+                    for neighbour in ((col + 1, row), (col - 1, row), (col, row + 1), (col, row - 1)):
+                        if neighbour in remaining:
+                            remaining.remove(neighbour)
+                            stack.append(neighbour)
+
+                x0, y0, _, _ = monitor.tile_box(min(cols), min(rows))
+                _, _, x1, y1 = monitor.tile_box(max(cols), max(rows))
+                regions.append((monitor, (x0, y0, x1, y1)))
+        return regions
+
+    def mosaic(self, max_size=MOSAIC_SIZE):
+        """Changed regions only, stacked top to bottom in one compact BGR array."""
+        crops = []
+        for monitor, (x0, y0, x1, y1) in self.dirty_regions():
+            # Slicing is a view; only the (smaller) resized crop is a new buffer
+            crops.append(fit(monitor.pixels[y0:y1, x0:x1], max_size))
+
+        if not crops:
+            return None
+
+        width = max(crop.shape[1] for crop in crops)
+        height = sum(crop.shape[0] for crop in crops) + MOSAIC_GAP * (len(crops) - 1)
+        canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        y = 0
+        for crop in crops:
+            h, w = crop.shape[:2]
+            canvas[y:y + h, :w] = crop[:, :, :3]
+            y += h + MOSAIC_GAP
+
+        return fit(canvas, max_size)
+
+
+class ScreenCapture:
+    """
+    Grabs every monitor and tracks a per-monitor tile grid so callers can tell
+    which parts of the desktop changed since the last frame they judged.
+    """
+    def __init__(self, tile_threshold=TILE_THRESHOLD):
+        self.tile_threshold = tile_threshold
+        self.reference = None  # monitor index -> tile signature of the last judged frame
+
+    def grab(self):
+        monitors = []
+        with mss.mss() as sct:
+            # monitors[0] is the union of all screens; the real ones start at 1
+            for index, monitor in enumerate(sct.monitors[1:], start=1):
+                sct_img = sct.grab(monitor)
+                # View the raw BGRA bytearray in place (sct_img.bgra would copy it)
+                pixels = np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(sct_img.height, sct_img.width, 4)
+                rect = (monitor["left"], monitor["top"], monitor["width"], monitor["height"])
+                monitors.append(MonitorFrame(index, rect, pixels))
+
+        return self._diff(monitors)
+
+    def _diff(self, monitors):
+        if self.reference is None:
+            return CaptureFrame(monitors)
+
+        dirty = {}
+        for monitor in monitors:
+            previous = self.reference.get(monitor.index)
+            if previous is None or previous.shape != monitor.signature.shape:
+                # New or resized monitor: everything on it is new
+                dirty[monitor.index] = {(c, r) for c in range(monitor.cols) for r in range(monitor.rows)}
+                continue
+
+            diff = cv2.absdiff(monitor.signature, previous)
+            # Max change per tile: fold each SAMPLES x SAMPLES block down to one value
+            per_tile = diff.reshape(monitor.rows, SAMPLES, monitor.cols, SAMPLES).max(axis=(1, 3))
+            rows, cols = np.nonzero(per_tile > self.tile_threshold)
+            if len(rows):
+                dirty[monitor.index] = set(zip(cols.tolist(), rows.tolist()))
+
+        return CaptureFrame(monitors, dirty, has_reference=True)
+
+    def commit(self, frame):
+        """Marks `frame` as judged; later grabs are diffed against it."""
+        self.reference = {monitor.index: monitor.signature for monitor in frame.monitors}
+
+    def reset(self):
+        self.reference = None
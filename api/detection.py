@@ -1,98 +1,681 @@
 import base64
-import io
-import mss
-from PIL import Image
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from collections import Counter
+
 from openai import OpenAI
 
+from api.policy import DistractionPolicy, PolicyStore
+from api.capture import ScreenCapture, FULL_FRAME_FRACTION
+from api.encoder import AdaptiveEncoder
+from api.fingerprint import hamming_distance
+from api.metrics import metrics
+from api.timeline import SHEET, SHEET_COLUMNS, contact_sheet
+from api.verdict_cache import VerdictCache, policy_key
+
+try:
+    import pytesseract  # Optional: OCR of the tab strip for tier 1
+except ImportError:
+    pytesseract = None
+
 # Configuration
 # MODEL_NAME = "google/gemini-2.0-flash-001"
 MODEL_NAME = "gemini-2.0-flash"
 
+# Max Hamming distance (out of 256 bits) for two grabs to count as "the same screen"
+CHANGE_THRESHOLD = 6
+
+BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+# BASE_URL = "https://openrouter.ai/api/v1"
+DEFAULT_HEADERS = {
+    "HTTP-Referer": "https://github.com/Random121/nwhacks-2026",
+    "X-Title": "FocusGuard Desktop App",
+}
+MAX_TOKENS = 100
+
+# Tells the model what part of the desktop the attached image covers
+SCOPE_NOTES = {
+    "full": "This image shows every monitor side by side. ",
+    "partial": (
+        "This image shows ONLY the screen regions that changed since the last check; "
+        "everything else was already judged fine. "
+    ),
+    "gaze": (
+        "The top of this image is a detailed crop of where the user is looking; "
+        "below it is a low-resolution overview of every monitor. "
+    ),
+}
+
+# Height (px) of the top strip holding the title bar and browser tabs, OCR'd by tier 1
+TAB_STRIP_HEIGHT = 110
+
+# Browsers can show anything, so their process name alone never decides a verdict
+BROWSER_PROCESSES = {"chrome", "chromium", "firefox", "msedge", "brave", "opera", "safari", "vivaldi"}
+
+
+# Shared by the single-screen and packed prompts
+JUDGING_RULES = (
+    "CRITICAL INSTRUCTION: Context matters. "
+    "- If the user is on a site like YouTube, Reddit, or Twitter, READ the specific content (video title, post text). "
+    "- If the content directly supports the goal (e.g. a tutorial video, a documentation thread), say 'NO'. "
+    "- If the content is unrelated entertainment (e.g. music, memes, gaming), say 'YES'. "
+    "- If the screen is blank or code editor, say 'NO'. "
+    "- If there is a window with a title saying 'Get back to work', that is your own message window, and should be ignored. Examine all other windows still."
+)
+
+
+def parse_batch_reply(text, count):
+    """Verdict list from a packed request's reply. Raises ValueError unless it has exactly `count` entries."""
+    text = text.strip()
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        raise ValueError("reply is not a JSON list")
+    verdicts = json.loads(text[start:end + 1])
+    if not isinstance(verdicts, list) or len(verdicts) != count:
+        raise ValueError(f"expected {count} verdicts, got {verdicts!r}")
+    return [str(verdict).strip() for verdict in verdicts]
+
+
+def _parse_json(text):
+    # Some models still wrap JSON replies in ```json fences
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("{"):]
+    return json.loads(text)
+
+
+class ScreenChangeGate:
+    """
+    Remembers the last screen fingerprint and its verdict so an unchanged
+    screen can reuse it instead of paying for another model call.
+    """
+    def __init__(self, threshold=CHANGE_THRESHOLD):
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.last_hash = None
+        self.last_context = None
+        self.last_verdict = None
+
+    def lookup(self, fingerprint, context):
+        if (
+            self.last_hash is not None
+            and self.last_context == context
+            and hamming_distance(fingerprint, self.last_hash) <= self.threshold
+        ):
+            self.hits += 1
+            return self.last_verdict
+
+        self.misses += 1
+        return None
+
+    def store(self, fingerprint, context, verdict):
+        self.last_hash = fingerprint
+        self.last_context = context
+        self.last_verdict = verdict
+
+    def reset(self):
+        self.last_hash = None
+        self.last_context = None
+        self.last_verdict = None
+
+
+# --- TIERED PRE-CLASSIFIER ---
+class ForegroundWindow:
+    def __init__(self, title="", process=""):
+        self.title = title or ""
+        self.process = process or ""
+
+
+class NullWindowProvider:
+    """Used when the platform gives us no way to read the foreground window."""
+    def get_foreground(self):
+        return None
+
+
+class StubWindowProvider:
+    """Returns whatever window it was last told about. Handy for tests and replays."""
+    def __init__(self, title="", process=""):
+        self.window = ForegroundWindow(title, process)
+
+    def set(self, title="", process=""):
+        self.window = ForegroundWindow(title, process)
+
+    def get_foreground(self):
+        return self.window
+
+
+class X11WindowProvider:
+    """Reads the active window title and owning process through `xprop`."""
+    def _xprop(self, *args):
+        result = subprocess.run(["xprop", *args], capture_output=True, text=True, timeout=1)
+        return result.stdout
+
+    def get_foreground(self):
+        try:
+            active = self._xprop("-root", "_NET_ACTIVE_WINDOW")
+            match = re.search(r"window id # (0x[0-9a-fA-F]+)", active)
+            if not match or int(match.group(1), 16) == 0:
+                return None
+
+            props = self._xprop("-id", match.group(1), "_NET_WM_NAME", "WM_NAME", "_NET_WM_PID")
+            title = re.search(r'_NET_WM_NAME\(\w+\) = "(.*)"', props) or re.search(r'WM_NAME\(\w+\) = "(.*)"', props)
+            pid = re.search(r"_NET_WM_PID\(CARDINAL\) = (\d+)", props)
+
+            process = ""
+            if pid:
+                with open(f"/proc/{pid.group(1)}/comm", "r") as f:
+                    process = f.read().strip()
+
+            return ForegroundWindow(title.group(1) if title else "", process)
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+
+def default_window_provider():
+    if sys.platform.startswith("linux") and os.environ.get("DISPLAY") and shutil.which("xprop"):
+        return X11WindowProvider()
+    return NullWindowProvider()
+
+
+def _term_variants(term):
+    # 'youtube.com' should also match a title that only says 'YouTube'
+    variants = {term}
+    if "." in term:
+        variants.add(term.rsplit(".", 1)[0].removeprefix("www."))
+    return variants
+
+
+def _find_terms(text, terms):
+    text = text.lower()
+    for term in terms:
+        for variant in _term_variants(term):
+            if re.search(rf"(?<!\w){re.escape(variant)}(?!\w)", text):
+                return term
+    return None
+
+
+class TieredClassifier:
+    """
+    Cheap local checks that run before the vision model.
+    Tier 0: foreground window process name / title vs. the policy's app lists.
+    Tier 1: title bar + OCR'd tab strip of each monitor vs. the policy's domain/keyword/category lists.
+    Each tier returns a verdict only when exactly one side (allowed or banned) matches;
+    anything ambiguous is left for the remote model.
+    """
+    def __init__(self, window_provider=None, use_ocr=True):
+        self.window_provider = window_provider or default_window_provider()
+        self.use_ocr = use_ocr and pytesseract is not None
+
+    def _decide(self, text, allowed, banned):
+        allowed_hit = _find_terms(text, allowed)
+        banned_hit = _find_terms(text, banned)
+        if banned_hit and not allowed_hit:
+            return f"YES: '{banned_hit}' is banned for this session"
+        if allowed_hit and not banned_hit:
+            return "NO"
+        return None
+
+    def foreground(self):
+        return self.window_provider.get_foreground()
+
+    def tier0(self, policy, window):
+        if window is None or window.process.lower() in BROWSER_PROCESSES:
+            return None
+        text = f"{window.process} {window.title}"
+        return self._decide(text, policy.allowed_apps, policy.banned_apps)
+
+    def tier1(self, policy, window, screens=()):
+        text = window.title if window else ""
+        if self.use_ocr:
+            for screen in screens:
+                strip = screen.crop((0, 0, screen.width, min(TAB_STRIP_HEIGHT, screen.height)))
+                text += " " + pytesseract.image_to_string(strip)
+
+        if not text.strip():
+            return None
+
+        allowed = policy.allowed_domains + policy.allowed_keywords + policy.allowed_categories
+        banned = policy.banned_domains + policy.banned_keywords + policy.banned_categories
+        return self._decide(text, allowed, banned)
+
+
+class ScreenRequest:
+    """One pass through the screen pipeline, either decided locally or waiting on the model."""
+    def __init__(self, fingerprint=None, context=None, messages=None, verdict=None, tier=None, window=None,
+                 frame=None, samples=None, max_tokens=MAX_TOKENS, size=0):
+        self.fingerprint = fingerprint
+        self.context = context
+        self.messages = messages
+        self.verdict = verdict
+        self.tier = tier
+        self.window = window
+        self.frame = frame
+        # Timeline requests: every TimelineSample in the window, each with its own verdict once judged
+        self.samples = samples
+        self.max_tokens = max_tokens
+        self.size = size  # base64 image bytes in `messages`; counted by record_upload() once actually sent
+
+
 class FocusDetector:
-    def __init__(self, api_key):
+    def __init__(self, api_key, change_threshold=CHANGE_THRESHOLD, verdict_cache=None, policy_store=None,
+                 classifier=None, base_url=BASE_URL, encoder=None, gaze_provider=None):
+        self.api_key = api_key
+        self.base_url = base_url
         self.client = OpenAI(
-            base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-            # base_url="https://openrouter.ai/api/v1",
+            base_url=base_url,
             api_key=api_key,
-            default_headers={
-                "HTTP-Referer": "https://github.com/Random121/nwhacks-2026",
-                "X-Title": "FocusGuard Desktop App",
-            }
+            default_headers=DEFAULT_HEADERS,
         )
+        self.change_gate = ScreenChangeGate(change_threshold)
+        self.verdict_cache = verdict_cache or VerdictCache(threshold=change_threshold)
+        self.policy_store = policy_store or PolicyStore(None)
+        self.classifier = classifier or TieredClassifier()
+        self.capture = ScreenCapture()
+        self.encoder = encoder or AdaptiveEncoder()
+        # Callable returning the gaze point on the primary monitor (0..1) or None
+        self.gaze_provider = gaze_provider
+
+        # Which stage produced each verdict: tier0, gate, cache, tier1 or model
+        self.tier_counts = Counter()
+        self.last_tier = None
+        self.tokens_used = 0
+        self.bytes_uploaded = 0
+
+    def reset(self):
+        """Forgets per-session state; the HTTP client, encoder and caches are kept for reuse."""
+        self.change_gate.reset()
+        self.capture.reset()
+        self.tier_counts = Counter()
+        self.last_tier = None
+        self.tokens_used = 0
+        self.bytes_uploaded = 0
+
+    def record_upload(self, size):
+        """Counts image bytes sent to the model; call it per request actually sent, hedges included."""
+        self.bytes_uploaded += size
+        metrics.count("screen.bytes_uploaded", size)
+
+    def _decided(self, tier, verdict):
+        self.tier_counts[tier] += 1
+        metrics.count(f"screen.decided.{tier}")
+        self.last_tier = tier
+        return verdict
 
     def analyze_goal_criteria(self, goal):
         """
         Phase 1: Ask AI to define the 'Rules of Engagement'.
-        We now ask it to distinguish between helper content vs. distractions.
+        The policy is compiled into structured allow/ban lists once per goal and
+        cached on disk, so repeated goals start without a network call.
         """
+        cached = self.policy_store.get(goal)
+        if cached is not None:
+            return cached
+
         try:
             prompt = (
                 f"The user wants to focus on this goal: '{goal}'. "
                 "Define a concise 'Distraction Policy' for this session. "
                 "IMPORTANT: Distinguish between productive usage vs. distraction on the same platform. "
-                "Example: If the goal is 'coding', specify that 'YouTube (Tutorials/Docs)' are ALLOWED, "
-                "but 'YouTube (Entertainment/Music)' are DISTRACTIONS. "
-                "Return a short paragraph listing what is allowed and what is banned."
+                "Example: If the goal is 'coding', 'YouTube tutorials' are ALLOWED "
+                "but 'YouTube music/entertainment' are BANNED. "
+                "Reply with JSON only, in this shape: "
+                '{"allowed": {"domains": [], "apps": [], "keywords": [], "categories": []}, '
+                '"banned": {"domains": [], "apps": [], "keywords": [], "categories": []}}. '
+                "Use bare domains (e.g. 'youtube.com'), short app names, and lowercase keywords. "
+                "Keep each list under 10 items."
             )
 
             response = self.client.chat.completions.create(
                 model=MODEL_NAME,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": prompt}],
+                response_format={"type": "json_object"},
             )
-            return response.choices[0].message.content
+            policy = DistractionPolicy.from_dict(goal, _parse_json(response.choices[0].message.content))
+            self.policy_store.put(goal, policy)
+            return policy
         except Exception as e:
             print(f"Error analyzing goal: {e}")
             return None
 
-    def _capture_screen_base64(self):
-        with mss.mss() as sct:
-            monitor = sct.monitors[1]
-            sct_img = sct.grab(monitor)
-            img = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
-            img.thumbnail((1024, 1024))
-            buffer = io.BytesIO()
-            img.save(buffer, format="JPEG", quality=80)
-            return base64.b64encode(buffer.getvalue()).decode('utf-8')
+    def _grab_screen(self):
+        return self.capture.grab()
 
-    def check_current_screen(self, goal, criteria):
+    def _capture_screen_base64(self, pixels=None):
+        if pixels is None:
+            pixels = self._grab_screen().composite()
+        encoded = self.encoder.encode(pixels)
+        return base64.b64encode(encoded.data).decode('utf-8')
+
+    def _build_payload(self, frame, context):
         """
-        Phase 2: Analyze screen with strict context awareness.
+        Picks what to upload: only the changed regions when the rest of the screen
+        was already judged fine under this policy; otherwise a detailed crop of
+        where the user is looking (when gaze is calibrated), else every monitor.
+        Returns (BGR pixels, scope) with scope one of "partial", "gaze", "full".
         """
-        try:
-            base64_image = self._capture_screen_base64()
+        previous_ok = (
+            frame.has_reference
+            and self.change_gate.last_context == context
+            and self.change_gate.last_verdict is not None
+            and not self.change_gate.last_verdict.upper().startswith("YES")
+        )
+        if previous_ok and 0 < frame.dirty_fraction() <= FULL_FRAME_FRACTION:
+            mosaic = frame.mosaic()
+            if mosaic is not None:
+                return mosaic, "partial"
 
-            prompt = (
-                f"You are a strict but fair productivity guard. "
-                f"User Goal: '{goal}'. "
-                f"Policy: {criteria}. "
-                "Analyze this screenshot. "
-                "CRITICAL INSTRUCTION: Context matters. "
-                "- If the user is on a site like YouTube, Reddit, or Twitter, READ the specific content (video title, post text). "
-                "- If the content directly supports the goal (e.g. a tutorial video, a documentation thread), say 'NO'. "
-                "- If the content is unrelated entertainment (e.g. music, memes, gaming), say 'YES'. "
-                "- If the screen is blank or code editor, say 'NO'. "
-                "- If there is a window with a title saying 'Get back to work', that is your own message window, and should be ignored. Examine all other windows still."
-                "Response format: 'YES: [Specific Reason]' or 'NO'."
-            )
+        point = self.gaze_provider() if self.gaze_provider else None
+        if point is not None:
+            return frame.focus(point), "gaze"
 
-            response = self.client.chat.completions.create(
-                model=MODEL_NAME,
-                messages=[
+        return frame.composite(), "full"
+
+    def build_messages(self, goal, digest, base64_image, mime="image/jpeg", scope="full"):
+        """Screen-check prompt plus one encoded screenshot, as chat messages."""
+        scope = SCOPE_NOTES[scope]
+        prompt = (
+            f"You are a strict but fair productivity guard. "
+            f"User Goal: '{goal}'. "
+            f"Policy: {digest}. "
+            "Analyze this screenshot. "
+            f"{scope}"
+            f"{JUDGING_RULES}"
+            "Response format: 'YES: [Specific Reason]' or 'NO'."
+        )
+
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
                     {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                },
-                            },
-                        ],
-                    }
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{mime};base64,{base64_image}"
+                        },
+                    },
                 ],
-                max_tokens=100
-            )
-            return response.choices[0].message.content
+            }
+        ]
+        return messages
+
+    def build_batch_messages(self, items):
+        """
+        Packs several screenshots, each with its own goal and policy, into one
+        request. `items` are (goal, digest, base64_image, mime) tuples; the reply
+        is a JSON list of verdicts in the same order (see parse_batch_reply).
+        """
+        prompt = (
+            f"You are a strict but fair productivity guard checking {len(items)} screenshots from "
+            "different users. Judge each one ONLY against its own goal and policy. "
+            f"{SCOPE_NOTES['full']}"
+            f"{JUDGING_RULES}"
+            f"Response format: a JSON list of exactly {len(items)} strings in screenshot order, "
+            "each 'YES: [Specific Reason]' or 'NO'."
+        )
+        content = [{"type": "text", "text": prompt}]
+        for index, (goal, digest, base64_image, mime) in enumerate(items, 1):
+            content.append({"type": "text", "text": f"Screenshot {index}. User Goal: '{goal}'. Policy: {digest}."})
+            content.append({"type": "image_url", "image_url": {"url": f"data:{mime};base64,{base64_image}"}})
+        return [{"role": "user", "content": content}]
+
+    def build_timeline_messages(self, goal, digest, samples, now=None, sheet=False):
+        """
+        Several screenshots of the same screen over time in one request, oldest
+        first, as separate images or (`sheet`) one numbered contact sheet. The
+        reply is a JSON list with a verdict per screenshot (see parse_batch_reply).
+        """
+        now = time.monotonic() if now is None else now
+        count = len(samples)
+        layout = (
+            f"They are tiled left to right, top to bottom in one image of {min(count, SHEET_COLUMNS)} columns, "
+            "each numbered in the strip above it. "
+            if sheet else ""
+        )
+        prompt = (
+            f"You are a strict but fair productivity guard. "
+            f"User Goal: '{goal}'. "
+            f"Policy: {digest}. "
+            f"These are {count} screenshots of the user's screen from the last {now - samples[0].at:.0f} seconds, "
+            "oldest first. "
+            f"{layout}"
+            f"{SCOPE_NOTES['full']}"
+            "Judge each screenshot on its own; a short detour still counts. "
+            f"{JUDGING_RULES}"
+            f"Response format: a JSON list of exactly {count} strings in screenshot order, "
+            "each 'YES: [Specific Reason]' or 'NO'."
+        )
+        content = [{"type": "text", "text": prompt}]
+        if sheet:
+            encoded = self.encoder.encode(contact_sheet(samples, now))
+            base64_image = base64.b64encode(encoded.data).decode('utf-8')
+            content.append({"type": "image_url", "image_url": {"url": f"data:{self.encoder.mime};base64,{base64_image}"}})
+        else:
+            for index, sample in enumerate(samples, 1):
+                base64_image = base64.b64encode(sample.data).decode('utf-8')
+                content.append({"type": "text", "text": (
+                    f"Screenshot {index}: {now - sample.at:.0f}s ago, on screen for {sample.duration:.0f}s.")})
+                content.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}})
+        return [{"role": "user", "content": content}]
+
+    def prepare_check(self, goal, criteria):
+        """
+        Runs every local stage (tiers, change gate, verdict cache) and returns a
+        ScreenRequest. If a local stage decided, `request.verdict` is already set;
+        otherwise `request.messages` is ready to send to the vision model.
+        """
+        policy = criteria if isinstance(criteria, DistractionPolicy) else None
+
+        # Tier 0: the foreground app alone may settle it, before we even grab the screen
+        window = None
+        if policy:
+            with metrics.span("screen.tier0"):
+                window = self.classifier.foreground()
+                verdict = self.classifier.tier0(policy, window)
+            if verdict:
+                return ScreenRequest(verdict=self._decided("tier0", verdict), tier="tier0", window=window.title)
+
+        title = window.title if window else None
+        with metrics.span("screen.grab"):
+            frame = self._grab_screen()
+
+        # Skip the model call entirely if nothing meaningful changed on screen
+        fingerprint = frame.fingerprint()
+        digest = policy.digest() if policy else criteria
+        context = policy_key(goal, digest)
+        cached = self.change_gate.lookup(fingerprint, context)
+        if cached is not None:
+            return ScreenRequest(fingerprint, context, verdict=self._decided("gate", cached), tier="gate",
+                                 window=title)
+
+        # Seen this screen before under the same policy (e.g. switched back to the IDE)
+        cached = self.verdict_cache.get(fingerprint, context)
+        if cached is not None:
+            self.change_gate.store(fingerprint, context, cached)
+            self.capture.commit(frame)
+            return ScreenRequest(fingerprint, context, verdict=self._decided("cache", cached), tier="cache",
+                                 window=title)
+
+        # Tier 1: title bar / tab strip text vs. the compiled allow and ban lists
+        if policy:
+            with metrics.span("screen.tier1"):
+                verdict = self.classifier.tier1(policy, window, frame.images())
+            if verdict:
+                self.change_gate.store(fingerprint, context, verdict)
+                self.capture.commit(frame)
+                return ScreenRequest(fingerprint, context, verdict=self._decided("tier1", verdict), tier="tier1",
+                                     window=title)
+
+        with metrics.span("screen.encode") as span:
+            pixels, scope = self._build_payload(frame, context)
+            base64_image = self._capture_screen_base64(pixels)
+            span.set(scope=scope, bytes=len(base64_image))
+
+        messages = self.build_messages(goal, digest, base64_image, self.encoder.mime, scope)
+        return ScreenRequest(fingerprint, context, messages=messages, window=title, frame=frame,
+                             size=len(base64_image))
+
+    def complete_check(self, request, verdict, tokens=0):
+        """Records a verdict the model returned for a prepared ScreenRequest."""
+        self.tokens_used += tokens
+        metrics.count("screen.tokens", tokens)
+        self.change_gate.store(request.fingerprint, request.context, verdict)
+        self.verdict_cache.put(request.fingerprint, request.context, verdict)
+        if request.frame is not None:
+            self.capture.commit(request.frame)
+        request.verdict = self._decided("model", verdict)
+        request.tier = "model"
+        return verdict
+
+    # --- TIMELINE MODE ---
+    def sample_screen(self, timeline, criteria=None, at=None):
+        """
+        Cheap sample between model requests: grab, fingerprint and (only if the
+        screen changed) keep a compressed thumbnail in `timeline`. Nothing is sent.
+        Returns True if a new frame was kept.
+        """
+        window = self.classifier.foreground() if isinstance(criteria, DistractionPolicy) else None
+        with metrics.span("screen.sample") as span:
+            frame = self._grab_screen()
+            kept = timeline.add(frame, frame.fingerprint(), window, at)
+            span.set(kept=kept)
+        metrics.count("screen.sampled")
+        return kept
+
+    @staticmethod
+    def _timeline_verdict(samples):
+        # The newest distraction in the window wins, so a detour that is already over still gets reported
+        for sample in reversed(samples):
+            if sample.verdict and sample.verdict.upper().startswith("YES"):
+                return sample
+        for sample in reversed(samples):
+            if sample.verdict:
+                return sample
+        return None
+
+    def prepare_timeline(self, goal, criteria, timeline, now=None):
+        """
+        Timeline counterpart of prepare_check(): samples the screen once more,
+        takes every frame buffered in `timeline` and settles what it can locally
+        (tier 0 on each frame's window, verdict cache). The rest go to the model
+        in one request; if nothing is left, `request.verdict` is already set.
+        If that request is never answered, hand `request.samples` back with
+        timeline.restore().
+        """
+        now = time.monotonic() if now is None else now
+        policy = criteria if isinstance(criteria, DistractionPolicy) else None
+        digest = policy.digest() if policy else criteria
+        context = policy_key(goal, digest)
+
+        self.sample_screen(timeline, criteria, now)
+        samples = timeline.drain()
+        newest = samples[-1]
+        pending = []
+        for sample in samples:
+            verdict = self.classifier.tier0(policy, sample.window) if policy and sample.window else None
+            if verdict:
+                sample.verdict, sample.tier = self._decided("tier0", verdict), "tier0"
+                continue
+            cached = self.verdict_cache.get(sample.fingerprint, context)
+            if cached is not None:
+                sample.verdict, sample.tier = self._decided("cache", cached), "cache"
+                continue
+            pending.append(sample)
+
+        request = ScreenRequest(newest.fingerprint, context, samples=samples,
+                                window=newest.window.title if newest.window else None)
+        if not pending:
+            decided = self._timeline_verdict(samples)
+            self.change_gate.store(newest.fingerprint, context, newest.verdict)
+            request.verdict, request.tier = decided.verdict, decided.tier
+            return request
+
+        with metrics.span("screen.encode") as span:
+            try:
+                request.messages = self.build_timeline_messages(goal, digest, pending, now, timeline.layout == SHEET)
+            except Exception:
+                # Keep the frames for the next attempt
+                timeline.restore(samples)
+                raise
+            size = sum(len(part["image_url"]["url"]) for part in request.messages[0]["content"]
+                       if part["type"] == "image_url")
+            span.set(scope=timeline.layout, frames=len(pending), bytes=size)
+        request.size = size
+        request.max_tokens = MAX_TOKENS * len(pending)
+        return request
+
+    def complete_timeline(self, request, reply, tokens=0):
+        """Spreads the model's per-frame verdicts over a prepared timeline request. Returns the overall verdict."""
+        self.tokens_used += tokens
+        metrics.count("screen.tokens", tokens)
+        pending = [sample for sample in request.samples if sample.verdict is None]
+        try:
+            verdicts = parse_batch_reply(reply, len(pending))
+        except ValueError:
+            # No usable list: a single verdict can only be trusted for the newest frame
+            verdicts = [None] * (len(pending) - 1) + [reply.strip()]
+
+        for sample, verdict in zip(pending, verdicts):
+            if not verdict:
+                continue
+            sample.verdict, sample.tier = self._decided("model", verdict), "model"
+            self.verdict_cache.put(sample.fingerprint, request.context, verdict)
+
+        newest = request.samples[-1]
+        if newest.verdict:
+            self.change_gate.store(newest.fingerprint, request.context, newest.verdict)
+        decided = self._timeline_verdict(request.samples)
+        request.verdict = decided.verdict if decided else reply.strip()
+        request.tier = "model"
+        return request.verdict
+
+    def check_timeline(self, goal, criteria, timeline):
+        """Synchronous timeline check, like check_current_screen()."""
+        try:
+            request = self.prepare_timeline(goal, criteria, timeline)
+            if request.verdict is not None:
+                return request.verdict
+
+            self.record_upload(request.size)
+            try:
+                with metrics.span("screen.model"):
+                    response = self.client.chat.completions.create(
+                        model=MODEL_NAME,
+                        messages=request.messages,
+                        max_tokens=request.max_tokens
+                    )
+            except Exception:
+                timeline.restore(request.samples)
+                raise
+            tokens = response.usage.total_tokens if response.usage else 0
+            return self.complete_timeline(request, response.choices[0].message.content, tokens)
+        except Exception as e:
+            return f"Error: {e}"
+
+    def check_current_screen(self, goal, criteria):
+        """
+        Phase 2: Analyze screen with strict context awareness.
+        """
+        try:
+            request = self.prepare_check(goal, criteria)
+            if request.verdict is not None:
+                return request.verdict
+
+            self.record_upload(request.size)
+            with metrics.span("screen.model"):
+                response = self.client.chat.completions.create(
+                    model=MODEL_NAME,
+                    messages=request.messages,
+                    max_tokens=MAX_TOKENS
+                )
+            tokens = response.usage.total_tokens if response.usage else 0
+            return self.complete_check(request, response.choices[0].message.content, tokens)
         except Exception as e:
-            return f"Error: {e}"
\ No newline at end of file
+            return f"Error: {e}"
@@ -0,0 +1,122 @@
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from api.capture import fit
+
+
+class EncodedImage:
+    def __init__(self, data, mime, size, quality):
+        self.data = data
+        self.mime = mime
+        self.size = size  # (width, height) actually encoded
+        self.quality = quality
+
+
+# --- BACKENDS ---
+# Every backend takes a BGR/BGRA uint8 array (what the capture layer produces)
+
+class OpenCVEncoder:
+    """cv2.imencode straight from the array. No PIL round trip, no BytesIO."""
+    def __init__(self, format="jpeg"):
+        self.format = format
+        self.mime = f"image/{format}"
+        self.ext = ".jpg" if format == "jpeg" else f".{format}"
+        self.flag = cv2.IMWRITE_WEBP_QUALITY if format == "webp" else cv2.IMWRITE_JPEG_QUALITY
+
+    @property
+    def name(self):
+        return f"cv2-{self.format}"
+
+    def encode(self, pixels, quality):
+        if pixels.ndim == 3 and pixels.shape[2] == 4:
+            pixels = cv2.cvtColor(pixels, cv2.COLOR_BGRA2BGR)
+        ok, buffer = cv2.imencode(self.ext, pixels, [self.flag, int(quality)])
+        if not ok:
+            raise ValueError(f"cv2 could not encode {self.format}")
+        return buffer.tobytes()
+
+
+class PillowEncoder:
+    """The original encode path (PIL + BytesIO), kept for comparison and as a fallback."""
+    def __init__(self, format="jpeg"):
+        self.format = format
+        self.mime = f"image/{format}"
+
+    @property
+    def name(self):
+        return f"pil-{self.format}"
+
+    def encode(self, pixels, quality):
+        code = cv2.COLOR_BGRA2RGB if pixels.shape[2] == 4 else cv2.COLOR_BGR2RGB
+        img = Image.fromarray(cv2.cvtColor(pixels, code))
+        buffer = io.BytesIO()
+        img.save(buffer, format=self.format.upper(), quality=int(quality))
+        return buffer.getvalue()
+
+
+ENCODERS = {
+    "cv2-jpeg": lambda: OpenCVEncoder("jpeg"),
+    "cv2-webp": lambda: OpenCVEncoder("webp"),
+    "pil-jpeg": lambda: PillowEncoder("jpeg"),
+    "pil-webp": lambda: PillowEncoder("webp"),
+}
+
+
+def make_encoder(name):
+    return ENCODERS[name]()
+
+
+# --- ADAPTIVE SIZING ---
+def text_density(pixels):
+    """
+    Rough share of the image covered by small high-contrast strokes (i.e. text).
+    Measured on a 512px-wide greyscale copy so it stays cheap.
+    """
+    small = fit(pixels, (512, 512))
+    code = cv2.COLOR_BGRA2GRAY if small.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+    grey = cv2.cvtColor(small, code)
+    edges = cv2.Canny(grey, 100, 200)
+    return float(np.count_nonzero(edges)) / edges.size
+
+
+# (min text density, max side in px, quality): first match wins
+QUALITY_LADDER = (
+    (0.12, 1280, 70),  # dense text (docs, code, chat) needs pixels to stay legible
+    (0.05, 1024, 65),
+    (0.0, 768, 55),    # video / images / mostly blank: meaning survives heavy compression
+)
+
+
+class AdaptiveEncoder:
+    """
+    Picks resolution and quality from how text-heavy the image is, then hands
+    off to a backend. A fixed `max_side` / `quality` disables the adaptation.
+    """
+    def __init__(self, backend=None, ladder=QUALITY_LADDER, max_side=None, quality=None):
+        self.backend = backend or OpenCVEncoder("jpeg")
+        self.ladder = ladder
+        self.max_side = max_side
+        self.quality = quality
+
+    @property
+    def mime(self):
+        return self.backend.mime
+
+    def settings(self, pixels):
+        if self.max_side and self.quality:
+            return self.max_side, self.quality
+
+        density = text_density(pixels)
+        for min_density, max_side, quality in self.ladder:
+            if density >= min_density:
+                return self.max_side or max_side, self.quality or quality
+        return self.ladder[-1][1], self.ladder[-1][2]
+
+    def encode(self, pixels):
+        max_side, quality = self.settings(pixels)
+        pixels = fit(pixels, (max_side, max_side))
+        data = self.backend.encode(pixels, quality)
+        return EncodedImage(data, self.backend.mime, (pixels.shape[1], pixels.shape[0]), quality)
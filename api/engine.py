@@ -0,0 +1,349 @@
+import asyncio
+import queue
+import threading
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from api.detection import MODEL_NAME, MAX_TOKENS, DEFAULT_HEADERS
+from api.metrics import metrics
+from api.fusion import SKIP, DEFER, NOW
+from api.scheduler import ScanScheduler
+from api.timeline import SAMPLE_INTERVAL
+
+
+class ScreenVerdict:
+    def __init__(self, seq, verdict, tier, latency):
+        self.seq = seq
+        self.verdict = verdict
+        self.tier = tier
+        self.latency = latency
+
+
+class AsyncScreenEngine:
+    """
+    Pipelined screen checker running on its own asyncio loop/thread.
+
+    - Capture + encode of the next frame runs (in a worker thread) while the
+      request for the previous frame is still in flight.
+    - Requests share one keep-alive connection pool.
+    - Every request has a hard deadline; optionally a duplicate "hedge" request
+      is fired if the first one is slow, and whichever answers first wins.
+    - Results for frames older than the newest judged frame are dropped.
+
+    - Scan cadence and the request/token budget come from a ScanScheduler;
+      without one the engine scans at a fixed `interval`.
+    - An optional ScanGate can skip, defer or pull forward a due scan based on
+      the eye tracker's state (fed through on_attention()).
+    - With a FrameTimeline the screen is also sampled every `sample_interval`
+      between scans, and each scan judges every distinct frame since the last
+      one in a single request.
+
+    Verdicts are handed to the caller through `poll()` / `wait()`.
+    """
+    def __init__(self, detector, interval=5.0, deadline=10.0, hedge_after=None, max_connections=4,
+                 scheduler=None, results=None, gate=None, timeline=None, sample_interval=SAMPLE_INTERVAL):
+        self.detector = detector
+        self.scheduler = scheduler or ScanScheduler(min_interval=interval, max_interval=interval)
+        self.gate = gate
+        self.timeline = timeline
+        self.sample_interval = sample_interval
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.max_connections = max_connections
+
+        # Callers may pass a shared queue to wait on verdicts and other signals together
+        self.results = results if results is not None else queue.Queue()
+        self.is_running = False
+        self.paused = False
+        self.thread = None
+        self.loop = None
+
+        self.sent = 0
+        self.hedges = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.stale_dropped = 0
+        self.gated = 0  # due scans the gate skipped or held back
+
+        self._goal = None
+        self._criteria = None
+        self._seq = 0
+        self._last_published = 0
+        self._pending = None
+        self._frame_ready = None
+        self._wake = None
+
+    # --- PUBLIC (called from other threads) ---
+    def start(self, goal, criteria):
+        self._goal = goal
+        self._criteria = criteria
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+        if self.loop and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self._cancel_all)
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+
+    def set_paused(self, state):
+        """Stops taking new screenshots (e.g. while an alert is on screen)"""
+        self.paused = state
+
+    def on_attention(self, event):
+        """Feed the tracker's AttentionEvents; wakes the capture loop if the gate may now scan."""
+        if self.gate is not None and self.gate.observe_attention(event):
+            self.wake()
+
+    def wake(self):
+        """Makes the capture loop re-check its schedule now instead of sleeping it out."""
+        if self.loop and self.loop.is_running() and self._wake is not None:
+            self.loop.call_soon_threadsafe(self._wake.set)
+
+    def poll(self):
+        """Newest verdict produced since the last call, or None."""
+        latest = None
+        while True:
+            try:
+                latest = self.results.get_nowait()
+            except queue.Empty:
+                return latest
+
+    def wait(self, timeout):
+        try:
+            return self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    # --- EVENT LOOP ---
+    def _run(self):
+        try:
+            asyncio.run(self._main())
+        except asyncio.CancelledError:
+            pass
+
+    def _cancel_all(self):
+        for task in asyncio.all_tasks(self.loop):
+            task.cancel()
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self._frame_ready = asyncio.Event()
+        self._wake = asyncio.Event()
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+            timeout=self.deadline,
+        )
+        self.client = AsyncOpenAI(
+            base_url=self.detector.base_url,
+            api_key=self.detector.api_key,
+            default_headers=DEFAULT_HEADERS,
+            http_client=http_client,
+            max_retries=0,
+        )
+
+        try:
+            await asyncio.gather(self._capture_loop(), self._request_loop())
+        finally:
+            await self.client.close()
+
+    async def _sleep(self, seconds):
+        # Like asyncio.sleep, but wake() cuts it short
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, seconds))
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _capture_loop(self):
+        next_scan = 0.0
+        next_sample = 0.0
+        held = False  # the current due scan was already counted as gated
+        while self.is_running:
+            if self.paused:
+                if self.timeline is not None:
+                    # Frames from before the pause were already acted on (or are moot now)
+                    self.timeline.reset()
+                await asyncio.sleep(self.scheduler.min_interval)
+                continue
+
+            now = self.loop.time()
+            action, rule = (None, None) if self.gate is None else self.gate.decide()
+            if action in (SKIP, DEFER):
+                if now >= next_scan and not held:
+                    held = True
+                    self.gated += 1
+                    self.gate.record(rule)
+                    metrics.count(f"screen.gated.{rule}")
+                if action == SKIP and now >= next_scan:
+                    # Dropped: when the rule stops blocking, the schedule carries on from here
+                    next_scan = now + self.scheduler.next_interval()
+                    held = False
+                await self._sleep(self.gate.poll_interval)
+                continue
+            if action != NOW and now < next_scan:
+                if self.timeline is not None:
+                    if now >= next_sample:
+                        await self._sample()
+                        next_sample = now + self.sample_interval
+                    await self._sleep(min(next_scan, next_sample) - self.loop.time())
+                else:
+                    await self._sleep(next_scan - now)
+                continue
+            if action == NOW:
+                self.gate.record(rule)
+                metrics.count(f"screen.triggered.{rule}")
+            held = False
+            if self.gate is not None:
+                self.gate.note_scan()
+
+            self._seq += 1
+            seq = self._seq
+            started = time.perf_counter()
+            if self.timeline is not None and self._pending is not None:
+                # Never sent: fold its frames into this scan's request rather than superseding them
+                self._unsent(self._pending[1])
+                self._pending = None
+                self._frame_ready.clear()
+            try:
+                if self.timeline is not None:
+                    request = await asyncio.to_thread(
+                        self.detector.prepare_timeline, self._goal, self._criteria, self.timeline)
+                else:
+                    request = await asyncio.to_thread(self.detector.prepare_check, self._goal, self._criteria)
+            except Exception as e:
+                self.errors += 1
+                self._publish(seq, f"Error: {e}", "capture", started)
+            else:
+                if request.verdict is not None:
+                    self._observe(request.verdict, request)
+                    self._publish(seq, request.verdict, request.tier, started)
+                else:
+                    # Only the newest undecided frame is worth sending
+                    if self._pending is not None:
+                        self.stale_dropped += 1
+                    self._pending = (seq, request, started)
+                    self._frame_ready.set()
+
+            next_scan = self.loop.time() + self.scheduler.next_interval()
+            next_sample = self.loop.time() + self.sample_interval
+
+    async def _sample(self):
+        try:
+            await asyncio.to_thread(self.detector.sample_screen, self.timeline, self._criteria)
+        except Exception:
+            # A failed sample only thins the timeline; the next scan grabs the screen again
+            self.errors += 1
+
+    def _unsent(self, request):
+        # A timeline request that got no verdict hands its frames back for the next one
+        if request.samples is not None and self.timeline is not None:
+            self.timeline.restore(request.samples)
+
+    def _observe(self, verdict, request):
+        changed = self.scheduler.observe(verdict, request.fingerprint, request.window)
+        if self.gate is not None:
+            self.gate.observe_verdict(verdict, changed)
+
+    async def _request_loop(self):
+        while self.is_running:
+            await self._frame_ready.wait()
+            self._frame_ready.clear()
+            seq, request, started = self._pending
+            self._pending = None
+
+            if seq <= self._last_published:
+                self.stale_dropped += 1
+                self._unsent(request)
+                continue
+
+            # Out of hourly budget: only the local tiers judge until it frees up
+            if not self.scheduler.allow_request():
+                self._unsent(request)
+                continue
+
+            try:
+                with metrics.span("screen.model"):
+                    reply, tokens = await self._hedged_request(request.messages, request.max_tokens, request.size)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self._unsent(request)
+                self._publish(seq, "Error: screen check timed out", "model", started)
+                continue
+            except Exception as e:
+                self.errors += 1
+                self._unsent(request)
+                self._publish(seq, f"Error: {e}", "model", started)
+                continue
+
+            if request.samples is not None:
+                verdict = self.detector.complete_timeline(request, reply, tokens)
+            else:
+                verdict = self.detector.complete_check(request, reply, tokens)
+            self._observe(verdict, request)
+            self._publish(seq, verdict, "model", started)
+
+    async def _request(self, messages, max_tokens=MAX_TOKENS, size=0):
+        self.sent += 1
+        self.detector.record_upload(size)
+        sent_at = time.perf_counter()
+        tokens = latency = None
+        try:
+            response = await self.client.chat.completions.create(
+                model=MODEL_NAME,
+                messages=messages,
+                max_tokens=max_tokens,
+            )
+            tokens = response.usage.total_tokens if response.usage else 0
+            latency = time.perf_counter() - sent_at
+            return response.choices[0].message.content, tokens
+        finally:
+            # Every request sent is billed, hedges and failures included
+            self.scheduler.record_request(tokens, latency)
+
+    async def _hedged_request(self, messages, max_tokens=MAX_TOKENS, size=0):
+        end = time.monotonic() + self.deadline
+        tasks = {asyncio.create_task(self._request(messages, max_tokens, size))}
+
+        try:
+            if self.hedge_after is not None and self.hedge_after < self.deadline:
+                done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+                if not done:
+                    self.hedges += 1
+                    metrics.count("screen.hedges")
+                    tasks.add(asyncio.create_task(self._request(messages, max_tokens, size)))
+
+            error = None
+            while tasks:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                done, tasks = await asyncio.wait(tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _publish(self, seq, verdict, tier, started):
+        if seq <= self._last_published:
+            # A newer frame was already judged (e.g. by a local tier) while this one was in flight
+            self.stale_dropped += 1
+            return
+        self._last_published = seq
+        latency = time.perf_counter() - started
+        metrics.observe(f"screen.verdict.{tier}", latency)
+        self.results.put(ScreenVerdict(seq, verdict, tier, latency))
@@ -0,0 +1,71 @@
+import threading
+import time
+
+
+class _Slot:
+    def __init__(self):
+        self.ready = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class EngineRegistry:
+    """
+    Builds the heavy backends (FaceMesh tracker, screen detector with its HTTP
+    client, ElevenLabs voice + microphone) once, on a background thread, and
+    hands the same instances to every session.
+
+    Nothing heavy is imported until warm() runs, so the window can appear
+    first. get() waits for a backend that is still warming and re-raises the
+    error if building it failed. `timings` records how long each build took.
+    """
+    def __init__(self, builders):
+        # name -> zero-argument callable building that backend (imports included)
+        self.builders = builders
+        self.slots = {name: _Slot() for name in builders}
+        self.timings = {}
+        self._thread = None
+
+    def warm(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._build_all, daemon=True)
+            self._thread.start()
+
+    def _build_all(self):
+        for name in self.builders:
+            self._build(name)
+
+    def _build(self, name):
+        slot = self.slots[name]
+        started = time.perf_counter()
+        try:
+            slot.value = self.builders[name]()
+        except Exception as e:
+            slot.error = e
+        self.timings[name] = time.perf_counter() - started
+        slot.ready.set()
+
+    def get(self, name, timeout=None):
+        self.warm()
+        slot = self.slots[name]
+        if not slot.ready.wait(timeout):
+            raise TimeoutError(f"{name} is still starting")
+        if slot.error is not None:
+            raise slot.error
+        return slot.value
+
+    def is_ready(self, name):
+        return self.slots[name].ready.is_set()
+
+    def close(self):
+        """Stops whatever was built and has a stop()/close()."""
+        for slot in self.slots.values():
+            if not slot.ready.is_set() or slot.value is None:
+                continue
+            for method in ("stop", "close"):
+                if hasattr(slot.value, method):
+                    try:
+                        getattr(slot.value, method)()
+                    except Exception:
+                        pass
+                    break
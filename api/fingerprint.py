@@ -0,0 +1,26 @@
+from PIL import Image
+
+
+def perceptual_hash(img, hash_size=16):
+    """
+    Difference hash (dHash) of a screenshot.
+    The image is shrunk to (hash_size + 1) x hash_size greyscale pixels and each
+    bit records whether a pixel is brighter than its right neighbour, so small
+    changes (cursor blink, clock tick) barely move the hash.
+    """
+    # Shrink first so the greyscale conversion only touches a handful of pixels
+    small = img.resize((hash_size + 1, hash_size), Image.BILINEAR, reducing_gap=2.0)
+    small = small.convert("L")
+    pixels = small.tobytes()
+
+    value = 0
+    row_len = hash_size + 1
+    for row in range(hash_size):
+        offset = row * row_len
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a, b):
+    return (a ^ b).bit_count()
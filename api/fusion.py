@@ -0,0 +1,164 @@
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+
+from api.attention import AWAY_FROM_DESK
+
+# What the screen engine does with a scan that is (or becomes) due
+SKIP = "skip"    # Drop it; the next one waits a full interval
+DEFER = "defer"  # Hold it; it runs as soon as no rule blocks it any more
+SCAN = "scan"    # Normal cadence
+NOW = "now"      # Scan right away, ahead of the schedule
+ACTIONS = (SKIP, DEFER, SCAN, NOW)
+
+# attention: "focused", "looking_away" or "away" (no face)
+ATTENTION_STATES = ("focused", "looking_away", "away")
+# verdict: "distracted", "focused" or "none" (nothing judged yet / last one was an error)
+VERDICT_STATES = ("distracted", "focused", "none")
+CONDITIONS = ("attention", "for_at_least", "returned_within", "verdict", "screen_stable_for")
+
+# Evaluated top to bottom; the first rule whose conditions all hold decides
+DEFAULT_RULES = [
+    # Nobody at the desk: the eye check already covers it and the screen can't matter
+    {"name": "away", "when": {"attention": "away"}, "action": SKIP},
+    # Looking elsewhere: the verdict couldn't be acted on now, so judge the screen once they're back
+    {"name": "looking_away", "when": {"attention": "looking_away"}, "action": DEFER},
+    # Eyes just came back: a new window is likely, check it instead of waiting out the backoff
+    {"name": "returned", "when": {"returned_within": 3.0}, "action": NOW},
+]
+
+# How often a skipped or deferred scan re-checks the rules without a tracker event (seconds)
+POLL_INTERVAL = 1.0
+
+
+@dataclass
+class FusionRule:
+    """One line of the scan policy: if every condition in `when` holds, do `action`."""
+    name: str
+    action: str
+    when: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data):
+        rule = cls(name=str(data.get("name", "")), action=data.get("action", ""), when=dict(data.get("when", {})))
+        if rule.action not in ACTIONS:
+            raise ValueError(f"Rule '{rule.name}': action must be one of {ACTIONS}, not {rule.action!r}")
+        unknown = set(rule.when) - set(CONDITIONS)
+        if unknown:
+            raise ValueError(f"Rule '{rule.name}': unknown conditions {sorted(unknown)}")
+        if rule.when.get("attention", "focused") not in ATTENTION_STATES:
+            raise ValueError(f"Rule '{rule.name}': attention must be one of {ATTENTION_STATES}")
+        if rule.when.get("verdict", "none") not in VERDICT_STATES:
+            raise ValueError(f"Rule '{rule.name}': verdict must be one of {VERDICT_STATES}")
+        return rule
+
+    def matches(self, state):
+        when = self.when
+        if "attention" in when and state["attention"] != when["attention"]:
+            return False
+        if "for_at_least" in when and state["attention_for"] < when["for_at_least"]:
+            return False
+        if "returned_within" in when:
+            # Only until the first scan after the return; it shouldn't fire over and over
+            returned_for = state["returned_for"]
+            if returned_for is None or returned_for > when["returned_within"] or state["scanned_since_return"]:
+                return False
+        if "verdict" in when and state["verdict"] != when["verdict"]:
+            return False
+        if "screen_stable_for" in when and state["screen_stable_for"] < when["screen_stable_for"]:
+            return False
+        return True
+
+
+def load_rules(path=None):
+    """Rules from a JSON list (same shape as DEFAULT_RULES), or the defaults if `path` is unset."""
+    if not path:
+        data = DEFAULT_RULES
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    return [FusionRule.from_dict(item) for item in data]
+
+
+class ScanGate:
+    """
+    Fuses the eye tracker's attention state, screen changes and the latest
+    verdict into one decision per due scan (see ACTIONS), following `rules`.
+
+    Fed from two threads: observe_attention() with the tracker's AttentionEvents,
+    observe_verdict()/note_scan() from the screen engine. decide() is cheap and
+    only reads that state.
+    """
+    def __init__(self, rules=None, poll_interval=POLL_INTERVAL):
+        self.rules = rules if rules is not None else load_rules()
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.decisions = {}  # rule name (or "default") -> times it decided a due scan
+        self.reset()
+
+    def reset(self):
+        now = time.monotonic()
+        with self.lock:
+            self.attention = "focused"
+            self.attention_since = now
+            self.returned_at = None
+            self.last_scan = 0.0
+            self.verdict = "none"
+            self.last_change = now
+
+    # --- FEEDBACK ---
+    def observe_attention(self, event):
+        """Feed every AttentionEvent. Returns True if it could make a waiting scan run now."""
+        if event.distracted:
+            state = "away" if event.reason == AWAY_FROM_DESK else "looking_away"
+        else:
+            state = "focused"
+        now = time.monotonic()
+        with self.lock:
+            if state == self.attention:
+                return False
+            if state == "focused":
+                self.returned_at = now
+            self.attention = state
+            self.attention_since = now
+            return state == "focused"
+
+    def observe_verdict(self, verdict, changed=False):
+        """Feed every screen verdict; `changed` when the screen differed from the previous scan."""
+        now = time.monotonic()
+        with self.lock:
+            if not verdict or verdict.startswith("Error"):
+                self.verdict = "none"
+            else:
+                self.verdict = "distracted" if verdict.upper().startswith("YES") else "focused"
+            if changed:
+                self.last_change = now
+
+    def note_scan(self):
+        with self.lock:
+            self.last_scan = time.monotonic()
+
+    # --- DECISION ---
+    def state(self):
+        now = time.monotonic()
+        with self.lock:
+            return {
+                "attention": self.attention,
+                "attention_for": now - self.attention_since,
+                "returned_for": None if self.returned_at is None else now - self.returned_at,
+                "scanned_since_return": self.returned_at is not None and self.last_scan >= self.returned_at,
+                "verdict": self.verdict,
+                "screen_stable_for": now - self.last_change,
+            }
+
+    def decide(self):
+        """(action, rule name) for a scan that is due now."""
+        state = self.state()
+        for rule in self.rules:
+            if rule.matches(state):
+                return rule.action, rule.name
+        return SCAN, "default"
+
+    def record(self, name):
+        self.decisions[name] = self.decisions.get(name, 0) + 1
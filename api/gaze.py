@@ -0,0 +1,104 @@
+import threading
+
+import numpy as np
+
+# FaceMesh (refine_landmarks=True) indices, listed left-to-right in the mirrored image
+EYE_A = {"corner_a": 33, "corner_b": 133, "top": 159, "bottom": 145, "iris": 468}
+EYE_B = {"corner_a": 362, "corner_b": 263, "top": 386, "bottom": 374, "iris": 473}
+
+# Where the calibration dot is shown, as fractions of the primary monitor
+CALIBRATION_TARGETS = [(0.5, 0.5), (0.1, 0.1), (0.9, 0.1), (0.1, 0.9), (0.9, 0.9)]
+
+
+def _eye_ratios(landmarks, eye):
+    a, b = landmarks[eye["corner_a"]], landmarks[eye["corner_b"]]
+    top, bottom = landmarks[eye["top"]], landmarks[eye["bottom"]]
+    iris = landmarks[eye["iris"]]
+
+    width = (b.x - a.x) or 1e-6
+    height = (bottom.y - top.y) or 1e-6
+    return (iris.x - a.x) / width, (iris.y - top.y) / height
+
+
+def gaze_features(landmarks, yaw, pitch):
+    """
+    [horizontal iris ratio, vertical iris ratio, yaw, pitch] for one face.
+    Iris ratios are 0..1 across each eye opening, averaged over both eyes.
+    """
+    ha, va = _eye_ratios(landmarks, EYE_A)
+    hb, vb = _eye_ratios(landmarks, EYE_B)
+    return np.array([(ha + hb) / 2, (va + vb) / 2, yaw, pitch], dtype=np.float64)
+
+
+class GazeEstimator:
+    """
+    Maps iris position + head pose to a point on screen.
+
+    The point is normalised to the primary monitor (0..1 on each axis; values
+    outside that range mean the user is looking past its edges, e.g. at a second
+    monitor). Needs a short calibration: the user looks at each of
+    CALIBRATION_TARGETS while samples are collected, then a small least-squares
+    fit is solved per axis (x from horizontal iris ratio + yaw, y from vertical
+    iris ratio + pitch).
+    """
+    def __init__(self, smoothing=0.3):
+        self.smoothing = smoothing
+        # (x weights, y weights), replaced as one tuple so update() never sees half a fit
+        self.weights = None
+        self.point = None
+        self.samples = []
+        self.lock = threading.Lock()
+
+    @property
+    def is_calibrated(self):
+        return self.weights is not None
+
+    # --- CALIBRATION ---
+    def start_calibration(self):
+        with self.lock:
+            self.samples = []
+
+    def add_sample(self, target, features):
+        if features is None:
+            return
+        with self.lock:
+            self.samples.append((target, np.asarray(features, dtype=np.float64)))
+
+    def finish_calibration(self):
+        """Fits the mapping from the collected samples. Returns False if there weren't enough."""
+        with self.lock:
+            targets = {target for target, _ in self.samples}
+            if len(targets) < 3:
+                return False
+
+            features = np.array([f for _, f in self.samples])
+            goals = np.array([t for t, _ in self.samples])
+            ones = np.ones(len(features))
+
+            design_x = np.column_stack([features[:, 0], features[:, 2], ones])
+            design_y = np.column_stack([features[:, 1], features[:, 3], ones])
+            weights_x = np.linalg.lstsq(design_x, goals[:, 0], rcond=None)[0]
+            weights_y = np.linalg.lstsq(design_y, goals[:, 1], rcond=None)[0]
+            self.weights = (weights_x, weights_y)
+            self.point = None
+            return True
+
+    # --- ESTIMATION ---
+    def update(self, features):
+        """Feeds one frame's features; returns the smoothed point or None."""
+        # Read once: calibration may swap in a new fit from the UI thread at any time
+        weights = self.weights
+        if features is None or weights is None:
+            self.point = None
+            return None
+
+        weights_x, weights_y = weights
+        x = features[0] * weights_x[0] + features[2] * weights_x[1] + weights_x[2]
+        y = features[1] * weights_y[0] + features[3] * weights_y[1] + weights_y[2]
+
+        if self.point is None:
+            self.point = (x, y)
+        else:
+            a = self.smoothing
+            self.point = (a * x + (1 - a) * self.point[0], a * y + (1 - a) * self.point[1])
+        return self.point
@@ -0,0 +1,220 @@
+"""
+Offline apology detection: MFCC features + subsequence DTW against a few
+recorded templates of the user saying each keyword.
+
+Templates are WAV files named `<keyword>[-anything].wav` in one directory.
+Record them with:
+
+    python -m api.keyword_spotter .cache/apology_templates sorry
+    python -m api.keyword_spotter .cache/apology_templates my_bad
+"""
+import glob
+import os
+import time
+import wave
+
+import numpy as np
+from scipy.fft import dct
+
+from api.audio import Recognition
+
+N_MFCC = 13
+N_MELS = 26
+FRAME = 0.025
+STEP = 0.01
+
+# Used until there are two templates of one keyword to measure their spread
+DEFAULT_MATCH_DISTANCE = 9.0
+# A distance this many times the match distance scores zero confidence
+REJECT_RATIO = 1.8
+
+# Quieter 10 ms blocks at either end of a recording are cut before matching
+TRIM_RMS = 300
+
+
+def _mel_filterbank(rate, n_fft, n_mels=N_MELS):
+    def to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def to_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    points = to_hz(np.linspace(to_mel(0), to_mel(rate / 2), n_mels + 2))
+    bins = np.floor((n_fft + 1) * points / rate).astype(int)
+
+    bank = np.zeros((n_mels, n_fft // 2 + 1))
+    for i in range(n_mels):
+        left, centre, right = bins[i], bins[i + 1], bins[i + 2]
+        if centre > left:
+            bank[i, left:centre] = (np.arange(left, centre) - left) / (centre - left)
+        if right > centre:
+            bank[i, centre:right] = (right - np.arange(centre, right)) / (right - centre)
+    return bank
+
+
+_BANKS = {}
+
+
+def mfcc(samples, rate):
+    """(frames, N_MFCC) cepstra with per-utterance mean removed; empty if shorter than one frame."""
+    signal = samples.astype(np.float32) / 32768.0
+    signal = np.append(signal[:1], signal[1:] - 0.97 * signal[:-1])
+
+    frame_len, step = int(FRAME * rate), int(STEP * rate)
+    if len(signal) < frame_len:
+        return np.zeros((0, N_MFCC))
+
+    count = 1 + (len(signal) - frame_len) // step
+    index = np.arange(frame_len)[None, :] + step * np.arange(count)[:, None]
+    frames = signal[index] * np.hamming(frame_len)
+
+    n_fft = 1 << (frame_len - 1).bit_length()
+    power = np.abs(np.fft.rfft(frames, n_fft)) ** 2 / n_fft
+
+    key = (rate, n_fft)
+    if key not in _BANKS:
+        _BANKS[key] = _mel_filterbank(rate, n_fft)
+    energies = np.log(power @ _BANKS[key].T + 1e-10)
+
+    cepstra = dct(energies, type=2, axis=1, norm="ortho")[:, :N_MFCC]
+    return cepstra - cepstra.mean(axis=0)
+
+
+def subsequence_dtw(template, utterance):
+    """Best DTW alignment of all of `template` against any stretch of `utterance`, per template frame."""
+    cost = np.linalg.norm(template[:, None, :] - utterance[None, :, :], axis=2)
+    acc = np.empty_like(cost)
+    acc[0] = cost[0]  # The match may start anywhere in the utterance
+    # Steps (1,0), (1,1), (1,2): the spoken keyword may run up to twice as fast or
+    # arbitrarily slower than the template, and each row is one vectorised minimum
+    for i in range(1, len(template)):
+        prev = acc[i - 1]
+        best = prev.copy()
+        best[1:] = np.minimum(best[1:], prev[:-1])
+        best[2:] = np.minimum(best[2:], prev[:-2])
+        acc[i] = cost[i] + best
+    return float(acc[-1].min()) / len(template)
+
+
+def trim_silence(samples, rate, threshold=TRIM_RMS):
+    """Cuts leading/trailing quiet (10 ms resolution) off a recording."""
+    step = max(1, int(0.01 * rate))
+    count = len(samples) // step
+    if not count:
+        return samples
+    blocks = samples[:count * step].astype(np.float32).reshape(count, step)
+    loud = np.nonzero(np.sqrt((blocks * blocks).mean(axis=1)) >= threshold)[0]
+    if not len(loud):
+        return samples[:0]
+    return samples[loud[0] * step:(loud[-1] + 1) * step]
+
+
+def _read_wav(path):
+    with wave.open(path, "rb") as wf:
+        rate = wf.getframerate()
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        if wf.getnchannels() > 1:
+            samples = samples.reshape(-1, wf.getnchannels()).mean(axis=1).astype(np.int16)
+    return samples, rate
+
+
+class KeywordSpotter:
+    """
+    Recognizer that matches an utterance against per-keyword templates.
+    Confidence is 1.0 at the templates' own spread and falls to 0.0 at
+    REJECT_RATIO times that distance. With no templates it answers with zero
+    confidence, so a FallbackRecognizer always defers to its fallback.
+    """
+    name = "keywords"
+
+    def __init__(self, template_dir=None):
+        self.template_dir = template_dir
+        self.templates = {}  # keyword -> [mfcc, ...]
+        self.match_distance = {}  # keyword -> typical template-to-template distance
+        if template_dir:
+            self.load()
+
+    def load(self):
+        self.templates = {}
+        for path in sorted(glob.glob(os.path.join(self.template_dir, "*.wav"))):
+            keyword = os.path.basename(path)[:-4].split("-", 1)[0]
+            samples, rate = _read_wav(path)
+            features = mfcc(trim_silence(samples, rate), rate)
+            if len(features):
+                self.templates.setdefault(keyword, []).append(features)
+
+        self.match_distance = {}
+        for keyword, features in self.templates.items():
+            pairs = [subsequence_dtw(a, b) for i, a in enumerate(features) for b in features[i + 1:]]
+            self.match_distance[keyword] = float(np.mean(pairs)) if pairs else DEFAULT_MATCH_DISTANCE
+
+    def add_template(self, keyword, samples, rate):
+        """Saves a new recording of `keyword` and reloads. Returns the file path."""
+        os.makedirs(self.template_dir, exist_ok=True)
+        path = os.path.join(self.template_dir, f"{keyword}-{int(time.time() * 1000)}.wav")
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes(samples.astype(np.int16).tobytes())
+        self.load()
+        return path
+
+    def recognize(self, pcm, rate):
+        started = time.perf_counter()
+        if not self.templates:
+            return Recognition(False, 0.0, self.name, error="no keyword templates recorded")
+
+        # Leading/trailing room noise would skew the per-utterance mean removal
+        utterance = mfcc(trim_silence(np.frombuffer(pcm, dtype=np.int16), rate), rate)
+        if not len(utterance):
+            return Recognition(False, 0.0, self.name, latency=time.perf_counter() - started)
+
+        best_keyword, best_confidence = None, 0.0
+        for keyword, templates in self.templates.items():
+            distance = min(subsequence_dtw(template, utterance) for template in templates)
+            match = self.match_distance[keyword]
+            confidence = float(np.clip(1 - (distance - match) / (match * (REJECT_RATIO - 1)), 0, 1))
+            if confidence > best_confidence:
+                best_keyword, best_confidence = keyword, confidence
+
+        return Recognition(
+            best_confidence >= 0.5,
+            best_confidence,
+            self.name,
+            text=best_keyword or "",
+            latency=time.perf_counter() - started,
+        )
+
+
+def main():
+    import argparse
+
+    from api.listener import MicrophoneSource
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("template_dir")
+    parser.add_argument("keyword")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    source = MicrophoneSource()
+    print(f"Say '{args.keyword.replace('_', ' ')}' after the beep...")
+    time.sleep(0.5)
+    print("\a🎤 Recording")
+    source.start()
+    chunks = [source.read() for _ in range(int(args.seconds * source.rate / source.chunk))]
+    source.pause()
+    source.close()
+
+    samples = trim_silence(np.concatenate(chunks), source.rate)
+    if len(samples) < 0.2 * source.rate:
+        print("Didn't catch that (too quiet or too short); try again.")
+        return
+
+    spotter = KeywordSpotter(args.template_dir)
+    print(f"Saved {spotter.add_template(args.keyword, samples, source.rate)}")
+
+
+if __name__ == "__main__":
+    main()
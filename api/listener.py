@@ -0,0 +1,237 @@
+import time
+import wave
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+
+RATE = 16000
+CHUNK = 512  # 32 ms at 16 kHz
+
+# VAD tuning
+SPEECH_RMS = 300         # Minimum RMS (0-32768) that counts as speech
+NOISE_RATIO = 3.0        # ...and it must also be this many times the running noise floor
+TRAILING_SILENCE = 0.5   # Seconds of quiet that end an utterance
+PRE_ROLL = 0.25          # Seconds kept from before speech started
+MAX_SEGMENT = 2.5        # Long speech is sent off in pieces this long
+NO_SPEECH_TIMEOUT = 4.0  # Give up if nobody starts talking within this
+
+
+class MicrophoneSource:
+    """
+    Default input device opened once and kept open. Between listens the stream
+    is only stopped (not closed), so starting the next attempt costs
+    microseconds instead of a PortAudio init.
+    """
+    def __init__(self, rate=RATE, chunk=CHUNK):
+        import pyaudio
+
+        self.rate = rate
+        self.chunk = chunk
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=pyaudio.paInt16,
+                                        channels=1,
+                                        rate=rate,
+                                        input=True,
+                                        frames_per_buffer=chunk,
+                                        start=False)
+
+    def start(self):
+        if self._stream.is_stopped():
+            self._stream.start_stream()
+
+    def pause(self):
+        if not self._stream.is_stopped():
+            self._stream.stop_stream()
+
+    def read(self):
+        data = self._stream.read(self.chunk, exception_on_overflow=False)
+        return np.frombuffer(data, dtype=np.int16)
+
+    def close(self):
+        self._stream.close()
+        self._audio.terminate()
+
+
+class WavFileSource:
+    """
+    Plays a 16-bit mono WAV file through the listener instead of the microphone
+    (tests, benchmarks). With `realtime` it is paced like a live device.
+    Returns None once the file runs out.
+    """
+    def __init__(self, path, chunk=CHUNK, realtime=True):
+        with wave.open(path, "rb") as wf:
+            if wf.getsampwidth() != 2:
+                raise ValueError(f"{path}: expected 16-bit samples")
+            self.rate = wf.getframerate()
+            samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            if wf.getnchannels() > 1:
+                samples = samples.reshape(-1, wf.getnchannels()).mean(axis=1).astype(np.int16)
+
+        self.samples = samples
+        self.chunk = chunk
+        self.realtime = realtime
+        self.position = 0
+        self._next_at = None
+
+    def start(self):
+        self._next_at = time.perf_counter()
+
+    def pause(self):
+        pass
+
+    def read(self):
+        if self.position >= len(self.samples):
+            return None
+        chunk = self.samples[self.position:self.position + self.chunk]
+        self.position += self.chunk
+
+        if self.realtime:
+            self._next_at += len(chunk) / self.rate
+            delay = self._next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return chunk
+
+    def close(self):
+        pass
+
+
+def rms(chunk):
+    samples = chunk.astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+
+
+class ApologyListener:
+    """
+    Listens for one apology on a persistent audio source.
+
+    Each chunk's RMS is compared against max(SPEECH_RMS, NOISE_RATIO x noise
+    floor). An utterance ends after TRAILING_SILENCE of quiet (or MAX_SEGMENT
+    of continuous speech) and is handed to `transcribe` on a worker thread
+    while listening carries on, so the first segment that contains an apology
+    returns immediately. `transcribe(pcm_bytes, rate)` returns a Recognition.
+    """
+    def __init__(self, source, transcribe, speech_rms=SPEECH_RMS, trailing_silence=TRAILING_SILENCE,
+                 max_segment=MAX_SEGMENT, no_speech_timeout=NO_SPEECH_TIMEOUT):
+        self.source = source
+        self.transcribe = transcribe
+        self.speech_rms = speech_rms
+        self.trailing_silence = trailing_silence
+        self.max_segment = max_segment
+        self.no_speech_timeout = no_speech_timeout
+
+        self.noise_floor = None
+        self.timings = {}  # event -> seconds since listen() started
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="transcribe")
+
+    def _is_speech(self, level):
+        floor = self.noise_floor if self.noise_floor is not None else 0.0
+        return level >= max(self.speech_rms, floor * NOISE_RATIO)
+
+    def _track_noise(self, level):
+        if self.noise_floor is None:
+            self.noise_floor = level
+        else:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * level
+
+    def listen(self, max_duration=8.0, cancel=None):
+        """
+        Returns the first Recognition that is an apology, else the most confident
+        one heard; None if nobody spoke or `cancel` was set.
+        """
+        started = time.perf_counter()
+        self.timings = {}
+        rate = self.source.rate
+
+        def mark(event):
+            self.timings.setdefault(event, time.perf_counter() - started)
+
+        pre_roll = []
+        pre_roll_chunks = max(1, int(PRE_ROLL * rate / self.source.chunk))
+        segment = []
+        segment_samples = 0
+        silent_samples = 0
+        pending = set()
+        best = None
+
+        def submit():
+            nonlocal segment, segment_samples, silent_samples
+            pcm = np.concatenate(segment).tobytes()
+            pending.add(self._pool.submit(self.transcribe, pcm, rate))
+            mark("first_segment")
+            segment, segment_samples, silent_samples = [], 0, 0
+
+        def settle(timeout=0):
+            nonlocal best
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                result = future.result()
+                if result.apology:
+                    best = result
+                    return True
+                # Prefer a clean answer over an error, then the more confident one
+                if best is None or (best.error and not result.error) or \
+                        (bool(best.error) == bool(result.error) and result.confidence > best.confidence):
+                    best = result
+            return False
+
+        self.source.start()
+        try:
+            while time.perf_counter() - started < max_duration:
+                if cancel is not None and cancel.is_set():
+                    return None
+                if pending and settle():
+                    mark("apology")
+                    return best
+
+                chunk = self.source.read()
+                if chunk is None:
+                    break
+
+                level = rms(chunk)
+                if self._is_speech(level):
+                    if not segment:
+                        mark("speech")
+                        segment.extend(pre_roll)
+                        segment_samples = sum(len(c) for c in pre_roll)
+                        pre_roll = []
+                    segment.append(chunk)
+                    segment_samples += len(chunk)
+                    silent_samples = 0
+                    if segment_samples >= self.max_segment * rate:
+                        submit()
+                elif segment:
+                    segment.append(chunk)
+                    segment_samples += len(chunk)
+                    silent_samples += len(chunk)
+                    if silent_samples >= self.trailing_silence * rate:
+                        # Utterance over: stop recording and wait on what's in flight
+                        submit()
+                        mark("speech_end")
+                        break
+                else:
+                    self._track_noise(level)
+                    pre_roll.append(chunk)
+                    if len(pre_roll) > pre_roll_chunks:
+                        pre_roll.pop(0)
+                    if not pending and "speech" not in self.timings and \
+                            time.perf_counter() - started >= self.no_speech_timeout:
+                        break
+        finally:
+            self.source.pause()
+
+        if segment:
+            submit()
+        while pending:
+            if cancel is not None and cancel.is_set():
+                return None
+            if settle(timeout=0.05):
+                mark("apology")
+                return best
+        mark("decided")
+        return best
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self.source.close()
@@ -0,0 +1,201 @@
+"""
+Process-wide timers, counters and histograms, plus an optional per-session
+trace in Chrome trace format (open in chrome://tracing or ui.perfetto.dev).
+
+    from api.metrics import metrics
+
+    with metrics.span("screen.encode", scope="full"):
+        ...
+    metrics.count("screen.bytes_uploaded", len(payload))
+    metrics.observe("tracker.inference", seconds)
+
+While disabled every call returns after one attribute check, and span()
+hands back a shared no-op context manager.
+"""
+import json
+import os
+import random
+import threading
+import time
+
+# Samples kept per histogram for percentiles (reservoir sampled beyond this)
+MAX_SAMPLES = 2048
+# Trace events kept per session; later ones are counted but dropped
+MAX_EVENTS = 200_000
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "args", "started")
+
+    def __init__(self, metrics, name, args):
+        self.metrics = metrics
+        self.name = name
+        self.args = args
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.started
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.metrics._finish_span(self.name, self.started, duration, self.args)
+        return False
+
+    def set(self, **args):
+        """Attaches extra fields (e.g. the tier that decided) before the span closes."""
+        self.args.update(args)
+
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = []
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = value
+
+    def summary(self):
+        ordered = sorted(self.samples)
+
+        def pick(fraction):
+            return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": pick(0.5),
+            "p95": pick(0.95),
+            "p99": pick(0.99),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.events = []
+        self.dropped_events = 0
+        self.session_started = time.perf_counter()
+
+    def enable(self, state=True):
+        self.enabled = state
+
+    def reset(self):
+        """Starts a new session: clears everything and restarts the trace clock."""
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+            self.events = []
+            self.dropped_events = 0
+            self.session_started = time.perf_counter()
+
+    # --- RECORDING ---
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def observe(self, name, value):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(value)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            total = self.counters[name]
+            self._append({"name": name, "ph": "C", "ts": self._ts(time.perf_counter()),
+                          "pid": os.getpid(), "args": {"value": total}})
+
+    def event(self, name, **args):
+        """Instant event in the trace (state transitions, alerts)."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self._append({"name": name, "ph": "i", "s": "p", "ts": self._ts(time.perf_counter()),
+                          "pid": os.getpid(), "tid": threading.get_ident(), "args": args})
+
+    def _finish_span(self, name, started, duration, args):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(duration)
+            self._append({"name": name, "ph": "X", "ts": self._ts(started), "dur": duration * 1e6,
+                          "pid": os.getpid(), "tid": threading.get_ident(), "args": args})
+
+    def _ts(self, at):
+        return (at - self.session_started) * 1e6
+
+    def _append(self, event):
+        if len(self.events) < MAX_EVENTS:
+            self.events.append(event)
+        else:
+            self.dropped_events += 1
+
+    # --- EXPORT ---
+    def summary(self):
+        with self.lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {name: h.summary() for name, h in sorted(self.histograms.items())},
+                "dropped_events": self.dropped_events,
+            }
+
+    def export(self, path):
+        """Writes the session as a Chrome trace; the summary rides along under "metadata"."""
+        summary = self.summary()
+        with self.lock:
+            events = list(self.events)
+        thread_names = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread.ident,
+             "args": {"name": thread.name}}
+            for thread in threading.enumerate()
+        ]
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": thread_names + events, "metadata": summary}, f)
+        os.replace(tmp_path, path)
+        return path
+
+
+metrics = Metrics()
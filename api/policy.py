@@ -0,0 +1,108 @@
+import json
+import os
+import re
+from dataclasses import dataclass, field, asdict
+
+POLICY_FIELDS = ("domains", "apps", "keywords", "categories")
+
+
+def normalize_goal(goal):
+    """'  Studying   Algorithms!' -> 'studying algorithms'"""
+    goal = re.sub(r"[^\w\s]", " ", goal.lower())
+    return " ".join(goal.split())
+
+
+def _clean_list(values):
+    if isinstance(values, str):
+        values = values.split(",")
+    cleaned = []
+    for value in values or []:
+        value = str(value).strip().lower()
+        if value and value not in cleaned:
+            cleaned.append(value)
+    return cleaned
+
+
+@dataclass
+class DistractionPolicy:
+    """Structured 'Rules of Engagement' for one goal."""
+    goal: str
+    allowed_domains: list = field(default_factory=list)
+    banned_domains: list = field(default_factory=list)
+    allowed_apps: list = field(default_factory=list)
+    banned_apps: list = field(default_factory=list)
+    allowed_keywords: list = field(default_factory=list)
+    banned_keywords: list = field(default_factory=list)
+    allowed_categories: list = field(default_factory=list)
+    banned_categories: list = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, goal, data):
+        policy = cls(goal=goal)
+        for prefix in ("allowed", "banned"):
+            section = data.get(prefix, {})
+            for name in POLICY_FIELDS:
+                # Accept both {"allowed": {"domains": [...]}} and {"allowed_domains": [...]}
+                values = section.get(name) if isinstance(section, dict) else None
+                if values is None:
+                    values = data.get(f"{prefix}_{name}")
+                setattr(policy, f"{prefix}_{name}", _clean_list(values))
+        return policy
+
+    def to_dict(self):
+        return asdict(self)
+
+    def digest(self):
+        """Compact one-line form that gets pasted into every screen prompt."""
+        parts = []
+        for prefix, label in (("allowed", "ALLOW"), ("banned", "BAN")):
+            items = []
+            for name in POLICY_FIELDS:
+                values = getattr(self, f"{prefix}_{name}")
+                if values:
+                    items.append(f"{name}={','.join(values)}")
+            if items:
+                parts.append(f"{label} " + "; ".join(items))
+        return " | ".join(parts)
+
+    def __str__(self):
+        return self.digest()
+
+
+class PolicyStore:
+    """On-disk JSON map of normalized goal -> compiled DistractionPolicy."""
+    def __init__(self, path):
+        self.path = path
+        self.policies = {}
+        self.load()
+
+    def get(self, goal):
+        data = self.policies.get(normalize_goal(goal))
+        if data is None:
+            return None
+        return DistractionPolicy(**data)
+
+    def put(self, goal, policy):
+        self.policies[normalize_goal(goal)] = policy.to_dict()
+        self.save()
+
+    def load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.policies = json.load(f)
+        except (OSError, ValueError):
+            self.policies = {}
+
+    def save(self):
+        if not self.path:
+            return
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.policies, f, indent=2)
+        os.replace(tmp_path, self.path)
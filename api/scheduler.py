@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import deque
+
+from api.fingerprint import hamming_distance
+
+
+class ScanScheduler:
+    """
+    Decides how long to wait before the next screen scan.
+
+    - Backs off exponentially while the screen and verdicts stay the same.
+    - Snaps back to `min_interval` after a window switch, a screen change or a distraction.
+    - Never waits less than a couple of model round trips (measured latency).
+    - Enforces an hourly budget of model requests and tokens; when spending runs
+      past half the budget the interval is stretched, and once it is used up
+      `allow_request()` returns False until older requests age out of the window.
+    """
+    def __init__(self, min_interval=2.0, max_interval=60.0, backoff=1.5,
+                 max_requests_per_hour=300, max_tokens_per_hour=500_000,
+                 change_threshold=6, distraction_hold=60.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_requests_per_hour = max_requests_per_hour
+        self.max_tokens_per_hour = max_tokens_per_hour
+        self.change_threshold = change_threshold
+        self.distraction_hold = distraction_hold
+
+        self.interval = min_interval
+        self.avg_latency = 0.0
+        self.avg_tokens = 0.0
+        self.budget_skipped = 0
+
+        self.last_fingerprint = None
+        self.last_window = None
+        self.last_verdict = None
+        self.last_distraction = 0.0
+
+        # (timestamp, tokens) of model requests in the last hour
+        self.requests = deque()
+        self.lock = threading.Lock()
+
+    # --- FEEDBACK ---
+    def observe(self, verdict, fingerprint=None, window=None):
+        """Feed every verdict, whichever tier produced it. Returns True if the screen or verdict changed."""
+        with self.lock:
+            changed = False
+
+            if window is not None and self.last_window is not None and window != self.last_window:
+                changed = True
+            if fingerprint is not None and self.last_fingerprint is not None:
+                if hamming_distance(fingerprint, self.last_fingerprint) > self.change_threshold:
+                    changed = True
+            if self.last_verdict is not None and _is_distracted(verdict) != _is_distracted(self.last_verdict):
+                changed = True
+
+            if _is_distracted(verdict):
+                self.last_distraction = time.time()
+
+            if changed or self._recently_distracted():
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * self.backoff, self.max_interval)
+
+            if window is not None:
+                self.last_window = window
+            if fingerprint is not None:
+                self.last_fingerprint = fingerprint
+            self.last_verdict = verdict
+            return changed
+
+    def record_request(self, tokens, latency=None):
+        """
+        Feed every model call actually sent, hedged duplicates and failures
+        included. A call that never reported usage (failed, timed out, lost the
+        hedge race) passes tokens=None and latency=None: it still counts against
+        the budget, at the average token cost, but leaves the averages alone.
+        """
+        with self.lock:
+            if latency is None:
+                self.requests.append((time.time(), tokens if tokens is not None else self.avg_tokens))
+                return
+            self.requests.append((time.time(), tokens or 0))
+            # Exponential moving averages, seeded by the first sample
+            if self.avg_latency == 0.0:
+                self.avg_latency = latency
+                self.avg_tokens = tokens or 0
+            else:
+                self.avg_latency = 0.8 * self.avg_latency + 0.2 * latency
+                self.avg_tokens = 0.8 * self.avg_tokens + 0.2 * (tokens or 0)
+
+    # --- DECISIONS ---
+    def allow_request(self):
+        with self.lock:
+            self._expire()
+            used_requests, used_tokens = self._usage()
+            if used_requests >= self.max_requests_per_hour or used_tokens >= self.max_tokens_per_hour:
+                self.budget_skipped += 1
+                return False
+            return True
+
+    def next_interval(self):
+        with self.lock:
+            self._expire()
+            interval = max(self.interval, 2 * self.avg_latency)
+
+            # Once over half the hourly budget is spent, spread the rest over the window
+            used_requests, used_tokens = self._usage()
+            spent = used_requests / self.max_requests_per_hour
+            remaining = self.max_requests_per_hour - used_requests
+            if self.avg_tokens > 0:
+                spent = max(spent, used_tokens / self.max_tokens_per_hour)
+                remaining = min(remaining, (self.max_tokens_per_hour - used_tokens) / self.avg_tokens)
+            if remaining < 1:
+                interval = self.max_interval
+            elif spent > 0.5:
+                window_left = 3600 - (time.time() - self.requests[0][0])
+                interval = max(interval, window_left / remaining)
+
+            return min(interval, self.max_interval)
+
+    def usage(self):
+        with self.lock:
+            self._expire()
+            return self._usage()
+
+    def _usage(self):
+        return len(self.requests), sum(tokens for _, tokens in self.requests)
+
+    def _expire(self):
+        cutoff = time.time() - 3600
+        while self.requests and self.requests[0][0] < cutoff:
+            self.requests.popleft()
+
+    def _recently_distracted(self):
+        return time.time() - self.last_distraction < self.distraction_hold
+
+
+def _is_distracted(verdict):
+    return bool(verdict) and verdict.upper().startswith("YES")
@@ -0,0 +1,650 @@
+"""
+Headless focus-check service: thin clients capture and upload, one server
+judges screens for many sessions at once.
+
+    python -m api.server --port 8780 --rate 4 --pack 4
+    python -m api.server --base-url http://127.0.0.1:8765/v1/   # against bench.stub_model
+
+HTTP API (JSON unless noted):
+
+    POST   /sessions                      {"goal": ..., "policy": {...}?} -> {"session": id, "policy": digest}
+    DELETE /sessions/<id>
+    POST   /sessions/<id>/frames?title=&process=&wait=1
+           body: JPEG/PNG bytes            -> {"seq", "verdict", "tier", "latency"} (202 {"seq"} without wait)
+    POST   /sessions/<id>/attention       {"distracted": bool, "reason": ""}
+    GET    /sessions/<id>/events          text/event-stream of verdicts as they are decided
+    GET    /stats
+
+Every frame goes through the same local stages as the desktop app (tracker
+gate, tier 0/1, per-session change gate, shared verdict cache). What is left
+is deduplicated across sessions by content, queued per session (newest frame
+wins), taken round-robin across sessions under a global request rate and
+packed several screenshots per model request.
+"""
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+from api.attention import AttentionEvent
+from api.detection import (FocusDetector, ForegroundWindow, NullWindowProvider, ScreenChangeGate,
+                           TieredClassifier, MODEL_NAME, MAX_TOKENS, parse_batch_reply)
+from api.fingerprint import perceptual_hash
+from api.fusion import ScanGate, SKIP, DEFER, load_rules
+from api.metrics import Histogram, metrics
+from api.policy import DistractionPolicy
+from api.verdict_cache import policy_key
+
+# Model requests per second across all sessions, and how many may be outstanding
+DEFAULT_RATE = 4.0
+MAX_IN_FLIGHT = 8
+# Screenshots per model request, and how long the dispatcher waits for a pack to fill (seconds)
+PACK_SIZE = 4
+BATCH_WAIT = 0.05
+MODEL_DEADLINE = 20.0
+# Sessions with no traffic for this long are dropped (seconds)
+SESSION_IDLE_TIMEOUT = 600
+# How long ?wait=1 blocks for a verdict, and the event stream's keep-alive period (seconds)
+WAIT_TIMEOUT = 60.0
+HEARTBEAT = 15.0
+# Verdict events kept per session for the event stream
+MAX_EVENTS = 256
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    # The stdlib default backlog (5) resets connections when a lab's clients connect at once
+    request_queue_size = 256
+    daemon_threads = True
+
+
+class RateLimiter:
+    """Token bucket shared by all sessions; acquire() blocks until a request may go out."""
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, stop=None):
+        while stop is None or not stop.is_set():
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(min(wait, 0.1))
+        return False
+
+
+class Ticket:
+    """One submitted frame, as seen by the client that sent it."""
+    def __init__(self, session, seq):
+        self.session = session
+        self.seq = seq
+        self.submitted_at = time.perf_counter()
+        self.done = threading.Event()
+        self.verdict = None
+        self.tier = None
+        self.latency = 0.0
+
+    def to_dict(self):
+        return {"seq": self.seq, "verdict": self.verdict, "tier": self.tier, "latency": self.latency}
+
+
+class FrameJob:
+    """One distinct screenshot waiting for the model, plus every ticket (any session) waiting on it."""
+    def __init__(self, key, session, image, mime, fingerprint):
+        self.key = key
+        self.session = session  # whose queue it sits in
+        self.image = image
+        self.mime = mime
+        self.fingerprint = fingerprint
+        self.goal = session.goal
+        self.digest = session.digest
+        self.context = session.context
+        self.tickets = []
+        self.solo = False  # a packed reply for it could not be parsed; send it on its own
+
+
+class ServerSession:
+    def __init__(self, session_id, goal, criteria, rules):
+        self.id = session_id
+        self.goal = goal
+        self.policy = criteria if isinstance(criteria, DistractionPolicy) else None
+        self.digest = self.policy.digest() if self.policy else (criteria or "")
+        self.context = policy_key(goal, self.digest)
+
+        self.gate = ScanGate(rules)
+        self.change_gate = ScreenChangeGate()
+        self.queue = deque()  # FrameJobs this session is waiting on, oldest first
+        self.deferred = None  # (ticket, submission) held while the user looks away
+        self.seq = 0
+        self.last_seen = time.monotonic()
+
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.events_sent = 0
+        self.condition = threading.Condition()
+        self.closed = False
+
+    def publish(self, ticket):
+        with self.condition:
+            self.events_sent += 1
+            self.events.append((self.events_sent, ticket.to_dict()))
+            self.condition.notify_all()
+
+    def events_after(self, index, timeout):
+        """Events newer than `index`, waiting up to `timeout` for one. Returns (events, last index)."""
+        with self.condition:
+            if self.events_sent <= index and not self.closed:
+                self.condition.wait(timeout)
+            newer = [(n, event) for n, event in self.events if n > index]
+            return newer, self.events_sent
+
+
+class FocusServer:
+    """
+    Multi-session screen judge built around one shared FocusDetector (HTTP
+    client, verdict cache, policy store, classifier). See the module docstring
+    for the HTTP API; the same operations are available as methods.
+    """
+    def __init__(self, detector, rate=DEFAULT_RATE, max_in_flight=MAX_IN_FLIGHT, pack_size=PACK_SIZE,
+                 batch_wait=BATCH_WAIT, deadline=MODEL_DEADLINE, rules=None, host="127.0.0.1", port=0):
+        self.detector = detector
+        self.client = detector.client.with_options(timeout=deadline, max_retries=0)
+        self.limiter = RateLimiter(rate)
+        self.max_in_flight = max_in_flight
+        self.pack_size = max(1, pack_size)
+        self.batch_wait = batch_wait
+        self.rules = rules if rules is not None else load_rules()
+
+        self.sessions = {}
+        self.inflight = {}  # job key -> FrameJob not yet resolved
+        self.ready = deque()  # sessions with queued jobs, in round-robin order
+        self.condition = threading.Condition()
+        self.slots = threading.Semaphore(max_in_flight)
+        self.executor = ThreadPoolExecutor(max_in_flight, thread_name_prefix="model")
+        self.stopping = threading.Event()
+
+        self.counts = Counter()  # tier / outcome -> frames
+        self.model_requests = 0
+        self.model_errors = 0
+        self.packed_frames = 0
+        self.latency = Histogram()
+        self.stats_lock = threading.Lock()
+
+        self.http = _HTTPServer((host, port), self._handler_class())
+        self._threads = []
+
+    @property
+    def url(self):
+        host, port = self.http.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        for target in (self.http.serve_forever, self._dispatch_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        with self.condition:
+            self.condition.notify_all()
+        for session in list(self.sessions.values()):
+            self.close_session(session.id)
+        self.http.shutdown()
+        self.http.server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- SESSIONS ---
+    def create_session(self, goal, policy=None):
+        self._expire_sessions()
+        if policy is not None:
+            criteria = DistractionPolicy.from_dict(goal, policy)
+        else:
+            criteria = self.detector.analyze_goal_criteria(goal)
+        session = ServerSession(os.urandom(8).hex(), goal, criteria, self.rules)
+        with self.condition:
+            self.sessions[session.id] = session
+        return session
+
+    def close_session(self, session_id):
+        with self.condition:
+            session = self.sessions.pop(session_id, None)
+            if session is None:
+                return False
+            # Jobs other sessions are also waiting on stay queued for them
+            for job in list(session.queue):
+                self._drop_ticket(session, job, "closed")
+            if session.deferred:
+                self._resolve(session.deferred[0], None, "closed")
+                session.deferred = None
+        with session.condition:
+            session.closed = True
+            session.condition.notify_all()
+        return True
+
+    def _expire_sessions(self):
+        cutoff = time.monotonic() - SESSION_IDLE_TIMEOUT
+        for session in list(self.sessions.values()):
+            if session.last_seen < cutoff:
+                self.close_session(session.id)
+
+    def session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        session.last_seen = time.monotonic()
+        return session
+
+    # --- SUBMISSIONS ---
+    def update_attention(self, session_id, distracted, reason=""):
+        session = self.session(session_id)
+        returned = session.gate.observe_attention(AttentionEvent(distracted, reason, time.monotonic()))
+        if returned:
+            with self.condition:
+                deferred, session.deferred = session.deferred, None
+            if deferred is not None:
+                ticket, submission = deferred
+                try:
+                    self._judge(session, ticket, submission)
+                except Exception as e:
+                    # A bad held frame is that ticket's problem, not this attention update's
+                    self._resolve(ticket, f"Error: {e}", "error")
+
+    def submit_frame(self, session_id, image, mime="image/jpeg", title="", process=""):
+        """Queues one screenshot (encoded bytes). Returns its Ticket; wait on `ticket.done`."""
+        session = self.session(session_id)
+        with session.condition:
+            session.seq += 1
+            ticket = Ticket(session, session.seq)
+        submission = (image, mime, ForegroundWindow(title, process))
+
+        action, rule = session.gate.decide()
+        if action == SKIP:
+            self._resolve(ticket, None, f"skip:{rule}")
+        elif action == DEFER:
+            # Only the newest frame matters once they look back
+            with self.condition:
+                previous, session.deferred = session.deferred, (ticket, submission)
+            if previous is not None:
+                self._resolve(previous[0], None, "superseded")
+        else:
+            try:
+                self._judge(session, ticket, submission)
+            except Exception as e:
+                # Resolve it so waiters and event streams hear about it; the caller still sees the error
+                self._resolve(ticket, f"Error: {e}", "error")
+                raise
+        return ticket
+
+    def _judge(self, session, ticket, submission):
+        image, mime, window = submission
+        policy = session.policy
+
+        if policy:
+            verdict = self.detector.classifier.tier0(policy, window)
+            if verdict:
+                return self._resolve(ticket, verdict, "tier0")
+
+        with metrics.span("server.decode"):
+            picture = Image.open(io.BytesIO(image))
+            fingerprint = perceptual_hash(picture)
+
+        cached = session.change_gate.lookup(fingerprint, session.context)
+        if cached is not None:
+            return self._resolve(ticket, cached, "gate")
+        # Shared by every session: someone else's identical (or near-identical) screen counts
+        cached = self.detector.verdict_cache.get(fingerprint, session.context)
+        if cached is not None:
+            session.change_gate.store(fingerprint, session.context, cached)
+            return self._resolve(ticket, cached, "cache")
+
+        if policy:
+            verdict = self.detector.classifier.tier1(policy, window, [picture])
+            if verdict:
+                session.change_gate.store(fingerprint, session.context, verdict)
+                return self._resolve(ticket, verdict, "tier1")
+
+        key = (hashlib.sha1(image).hexdigest(), session.context)
+        with self.condition:
+            job = self.inflight.get(key)
+            if job is not None:
+                # Same bytes under the same policy already on their way to the model
+                job.tickets.append(ticket)
+                self._count("dedupe")
+                return ticket
+
+            # Newest frame wins: older queued frames of this session nobody else needs are dropped
+            for old in list(session.queue):
+                self._drop_ticket(session, old, "superseded")
+
+            job = FrameJob(key, session, base64.b64encode(image).decode("ascii"), mime, fingerprint)
+            job.tickets.append(ticket)
+            self.inflight[key] = job
+            session.queue.append(job)
+            if session not in self.ready:
+                self.ready.append(session)
+            self.condition.notify_all()
+        return ticket
+
+    def _drop_ticket(self, session, job, tier):
+        # Caller holds self.condition
+        mine = [ticket for ticket in job.tickets if ticket.session is session]
+        job.tickets = [ticket for ticket in job.tickets if ticket.session is not session]
+        for ticket in mine:
+            self._resolve(ticket, None, tier)
+        if not job.tickets:
+            session.queue.remove(job)
+            self.inflight.pop(job.key, None)
+            if not session.queue and session in self.ready:
+                self.ready.remove(session)
+
+    # --- DISPATCH ---
+    def _queued(self):
+        return sum(len(session.queue) for session in self.ready)
+
+    def _dispatch_loop(self):
+        while not self.stopping.is_set():
+            with self.condition:
+                while not self._queued() and not self.stopping.is_set():
+                    self.condition.wait()
+                # Give a pack a moment to fill before paying for a request
+                deadline = time.monotonic() + self.batch_wait
+                while self._queued() < self.pack_size and not self.stopping.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+            if not self.slots.acquire(timeout=1.0):
+                continue
+            if not self.limiter.acquire(self.stopping):
+                self.slots.release()
+                break
+
+            with self.condition:
+                jobs = self._take_pack()
+            if not jobs:
+                self.slots.release()
+                continue
+            self.executor.submit(self._run_pack, jobs)
+
+    def _take_pack(self):
+        """Up to pack_size jobs, one per session per turn (caller holds self.condition)."""
+        jobs = []
+        while self.ready and len(jobs) < self.pack_size:
+            session = self.ready.popleft()
+            if not session.queue:
+                continue
+            job = session.queue[0]
+            if job.solo and jobs:
+                self.ready.appendleft(session)
+                break
+            session.queue.popleft()
+            jobs.append(job)
+            if session.queue:
+                self.ready.append(session)
+            if job.solo:
+                break
+        return jobs
+
+    def _run_pack(self, jobs):
+        try:
+            if len(jobs) == 1:
+                job = jobs[0]
+                messages = self.detector.build_messages(job.goal, job.digest, job.image, job.mime)
+            else:
+                messages = self.detector.build_batch_messages(
+                    [(job.goal, job.digest, job.image, job.mime) for job in jobs])
+
+            with self.stats_lock:
+                self.model_requests += 1
+                self.packed_frames += len(jobs)
+            try:
+                with metrics.span("server.model", frames=len(jobs)):
+                    response = self.client.chat.completions.create(
+                        model=MODEL_NAME,
+                        messages=messages,
+                        max_tokens=MAX_TOKENS * len(jobs),
+                    )
+                reply = response.choices[0].message.content or ""
+                tokens = response.usage.total_tokens if response.usage else 0
+                with self.stats_lock:
+                    self.detector.tokens_used += tokens
+                metrics.count("server.tokens", tokens)
+            except Exception as e:
+                with self.stats_lock:
+                    self.model_errors += 1
+                for job in jobs:
+                    self._finish(job, f"Error: {e}", "error")
+                return
+
+            if len(jobs) == 1:
+                self._finish(jobs[0], reply.strip(), "model")
+                return
+            try:
+                verdicts = parse_batch_reply(reply, len(jobs))
+            except ValueError:
+                # Couldn't tell which verdict is whose; ask again one screenshot per request
+                self._requeue_solo(jobs)
+                return
+            for job, verdict in zip(jobs, verdicts):
+                self._finish(job, verdict, "model")
+        finally:
+            self.slots.release()
+
+    def _requeue_solo(self, jobs):
+        """Queues jobs from an unreadable packed reply again, behind newer work, one per request."""
+        with self.condition:
+            for job in jobs:
+                session = job.session
+                closed = self.sessions.get(session.id) is not session
+                if closed or session.queue:
+                    # Gone, or a newer frame of theirs is already queued: only other sessions still need it
+                    mine = [ticket for ticket in job.tickets if ticket.session is session]
+                    job.tickets = [ticket for ticket in job.tickets if ticket.session is not session]
+                    for ticket in mine:
+                        self._resolve(ticket, None, "closed" if closed else "superseded")
+                    if not job.tickets:
+                        self.inflight.pop(job.key, None)
+                        continue
+                    if closed:
+                        session = job.session = job.tickets[0].session
+                job.solo = True
+                session.queue.append(job)
+                if session not in self.ready:
+                    self.ready.append(session)
+            self.condition.notify_all()
+
+    def _finish(self, job, verdict, tier):
+        with self.condition:
+            self.inflight.pop(job.key, None)
+            tickets, job.tickets = job.tickets, []
+        if tier == "model":
+            self.detector.verdict_cache.put(job.fingerprint, job.context, verdict)
+            for session in {ticket.session for ticket in tickets}:
+                session.change_gate.store(job.fingerprint, job.context, verdict)
+        for ticket in tickets:
+            self._resolve(ticket, verdict, tier)
+
+    def _resolve(self, ticket, verdict, tier):
+        ticket.verdict = verdict
+        ticket.tier = tier
+        ticket.latency = time.perf_counter() - ticket.submitted_at
+        self._count(tier.split(":", 1)[0])
+        if verdict is not None:
+            with self.stats_lock:
+                self.latency.add(ticket.latency)
+            metrics.observe("server.verdict", ticket.latency)
+            ticket.session.gate.observe_verdict(verdict)
+        ticket.session.publish(ticket)
+        ticket.done.set()
+        return ticket
+
+    def _count(self, name):
+        with self.stats_lock:
+            self.counts[name] += 1
+        metrics.count(f"server.{name}")
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "sessions": len(self.sessions),
+                "queued": sum(len(session.queue) for session in list(self.sessions.values())),
+                "frames": dict(self.counts),
+                "model_requests": self.model_requests,
+                "model_errors": self.model_errors,
+                "frames_per_request": self.packed_frames / self.model_requests if self.model_requests else 0.0,
+                "tokens": self.detector.tokens_used,
+                "latency": self.latency.summary(),
+            }
+
+    # --- HTTP ---
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                parts = url.path.strip("/").split("/")
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                try:
+                    if parts == ["sessions"]:
+                        data = json.loads(body or b"{}")
+                        if not data.get("goal"):
+                            return self._send(400, {"error": "goal is required"})
+                        session = server.create_session(data["goal"], data.get("policy"))
+                        return self._send(200, {"session": session.id, "policy": session.digest})
+
+                    if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "frames":
+                        if not body:
+                            return self._send(400, {"error": "empty frame"})
+                        query = parse_qs(url.query)
+                        ticket = server.submit_frame(
+                            parts[1], body,
+                            mime=self.headers.get("Content-Type", "image/jpeg"),
+                            title=query.get("title", [""])[0],
+                            process=query.get("process", [""])[0],
+                        )
+                        if query.get("wait", ["0"])[0] != "1":
+                            return self._send(202, {"seq": ticket.seq})
+                        ticket.done.wait(WAIT_TIMEOUT)
+                        return self._send(200, ticket.to_dict())
+
+                    if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "attention":
+                        data = json.loads(body or b"{}")
+                        server.update_attention(parts[1], bool(data.get("distracted")), data.get("reason", ""))
+                        return self._send(200, {"ok": True})
+                except KeyError:
+                    return self._send(404, {"error": "unknown session"})
+                except (ValueError, OSError) as e:
+                    # Bad JSON, or an upload PIL can't read
+                    return self._send(400, {"error": str(e)})
+                self._send(404, {"error": "not found"})
+
+            def do_DELETE(self):
+                parts = urlparse(self.path).path.strip("/").split("/")
+                if len(parts) == 2 and parts[0] == "sessions" and server.close_session(parts[1]):
+                    return self._send(200, {"ok": True})
+                self._send(404, {"error": "unknown session"})
+
+            def do_GET(self):
+                parts = urlparse(self.path).path.strip("/").split("/")
+                if parts == ["stats"]:
+                    return self._send(200, server.stats())
+                if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "events":
+                    session = server.sessions.get(parts[1])
+                    if session is None:
+                        return self._send(404, {"error": "unknown session"})
+                    return self._stream(session)
+                self._send(404, {"error": "not found"})
+
+            def _stream(self, session):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                index = session.events_sent
+                try:
+                    while not session.closed and not server.stopping.is_set():
+                        events, index = session.events_after(index, HEARTBEAT)
+                        if not events:
+                            self.wfile.write(b": keep-alive\n\n")
+                        for _, event in events:
+                            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint (default: the app's)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="model requests per second")
+    parser.add_argument("--in-flight", type=int, default=MAX_IN_FLIGHT)
+    parser.add_argument("--pack", type=int, default=PACK_SIZE, help="screenshots per model request")
+    parser.add_argument("--batch-wait", type=float, default=BATCH_WAIT)
+    parser.add_argument("--rules", help="JSON scan rules (see api/fusion.py)")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    api_key = os.getenv("AI_STUDIO_API_KEY") or os.getenv("OPENROUTER_API_KEY") or "unused"
+    options = {"base_url": args.base_url} if args.base_url else {}
+    detector = FocusDetector(api_key, classifier=TieredClassifier(NullWindowProvider()), **options)
+
+    server = FocusServer(detector, rate=args.rate, max_in_flight=args.in_flight, pack_size=args.pack,
+                         batch_wait=args.batch_wait, rules=load_rules(args.rules), host=args.host,
+                         port=args.port).start()
+    print(f"Focus server on {server.url}")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(server.stats()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
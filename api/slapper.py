@@ -1,11 +1,196 @@
-from serial import Serial
+import threading
+import time
+from collections import deque
+
+from serial import Serial, SerialException
+
+from api.metrics import metrics
+
+SLAP = "F"
+
+# How long the legacy firmware is busy with one slap (servo + 3 x 750 ms flashes)
+COMMAND_DURATION = 2.75
+# Opening the port resets the board; it prints READY once setup() is done
+BOOT_TIME = 2.5
+# With the ack protocol, give up waiting for READY after this long
+READY_TIMEOUT = 6.0
+WRITE_TIMEOUT = 1.0
+MAX_PENDING = 4
+RECONNECT_MIN = 0.5
+RECONNECT_MAX = 10.0
 
 
 class Slapper:
+    """
+    Sends commands to the desk device from a background thread, so callers
+    never block on serial I/O.
+
+    Commands wait in a small bounded queue; a command that is already waiting
+    is not queued twice (five quick slaps while the device is busy become one).
+    Newer firmware prints READY after boot and after finishing each command;
+    once that's seen the next command is held until READY arrives. Older
+    firmware is paced by COMMAND_DURATION instead. A vanished port is reopened
+    with backoff and pending commands survive the reconnect.
+    """
     serial: Serial
 
-    def __init__(self, port, baud):
-        self.serial = Serial(port=port, baudrate=baud)
+    def __init__(self, port, baud, ack="auto", max_pending=MAX_PENDING, boot_time=BOOT_TIME,
+                 command_duration=COMMAND_DURATION, ready_timeout=READY_TIMEOUT):
+        self.port = port
+        self.baud = int(baud) if baud else 9600
+        self.ack = ack  # True, False, or "auto" (switch on at the first READY)
+        self.max_pending = max_pending
+        self.boot_time = boot_time
+        self.command_duration = command_duration
+        self.ready_timeout = ready_timeout
+
+        self.serial = None
+        self.connected = False
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.is_running = True
+
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.last_error = None
+
+        self._awaiting_ready = False  # Device is busy (booting or running a command)
+        self._sent_at = 0.0
+        self._waiting_for = "boot"  # what the next READY ends, for metrics
+        self._ready_at = 0.0  # Without acks: assume it's free again at this time
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
 
     def slap_user(self):
-        self.serial.write(b"F")
+        return self.send(SLAP)
+
+    def send(self, command):
+        """Queues `command`. Returns False if it was coalesced or dropped."""
+        with self.condition:
+            if command in self.pending:
+                self.coalesced += 1
+                metrics.count("device.coalesced")
+                return False
+            if len(self.pending) >= self.max_pending:
+                self.dropped += 1
+                metrics.count("device.dropped")
+                return False
+            self.pending.append(command)
+            self.condition.notify()
+            return True
+
+    def close(self):
+        with self.condition:
+            self.is_running = False
+            self.condition.notify()
+        self._thread.join(timeout=2)
+        self._disconnect()
+
+    def get_stats(self):
+        return {
+            "connected": self.connected,
+            "pending": len(self.pending),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+            "ack": self.ack,
+        }
+
+    # --- WORKER ---
+    def _connect(self):
+        self.serial = Serial(port=self.port, baudrate=self.baud, timeout=0.1, write_timeout=WRITE_TIMEOUT)
+        self.connected = True
+        self.last_error = None
+        # The board resets on open; nothing it receives before setup() finishes is read
+        self._awaiting_ready = True
+        self._waiting_for = "boot"
+        self._sent_at = time.monotonic()
+        self._ready_at = self._sent_at + self.boot_time
+
+    def _disconnect(self):
+        self.connected = False
+        if self.serial is not None:
+            try:
+                self.serial.close()
+            except (SerialException, OSError):
+                pass
+            self.serial = None
+
+    def _device_ready(self, now):
+        if not self._awaiting_ready:
+            return True
+        if self.ack is True:
+            # Explicit protocol: wait for READY, but don't hang forever on a lost line
+            return now - self._sent_at >= self.ready_timeout
+        if now >= self._ready_at:
+            self._awaiting_ready = False
+            return True
+        return False
+
+    def _read_lines(self):
+        # Blocks for at most the port timeout (0.1 s), which doubles as the worker's tick
+        if not (self.serial.in_waiting or self._awaiting_ready):
+            return
+        line = self.serial.readline()
+        while line:
+            if line.strip() == b"READY":
+                if self.ack == "auto":
+                    self.ack = True
+                if self._awaiting_ready:
+                    metrics.observe(f"device.{self._waiting_for}", time.monotonic() - self._sent_at)
+                self._awaiting_ready = False
+            line = self.serial.readline() if self.serial.in_waiting else b""
+
+    def _run(self):
+        backoff = RECONNECT_MIN
+        while True:
+            with self.condition:
+                if not self.is_running:
+                    return
+
+            if not self.connected:
+                try:
+                    self._connect()
+                    backoff = RECONNECT_MIN
+                except (SerialException, OSError, ValueError) as e:
+                    self.last_error = e
+                    with self.condition:
+                        self.condition.wait(backoff)
+                    backoff = min(backoff * 2, RECONNECT_MAX)
+                    continue
+
+            try:
+                self._read_lines()
+                now = time.monotonic()
+                command = None
+                with self.condition:
+                    if self.pending and self._device_ready(now):
+                        command = self.pending[0]
+                    elif not self.pending and not self._awaiting_ready:
+                        self.condition.wait(0.1)
+
+                if command is None:
+                    if self.pending:
+                        time.sleep(0.02)
+                    continue
+
+                with metrics.span("device.write", command=command):
+                    self.serial.write(command.encode("ascii") + b"\n")
+                with self.condition:
+                    self.pending.popleft()
+                self.sent += 1
+                metrics.count("device.sent")
+                self._sent_at = time.monotonic()
+                self._waiting_for = "command"
+                self._awaiting_ready = True
+                self._ready_at = self._sent_at + self.command_duration
+            except (SerialException, OSError) as e:
+                # Port vanished (unplugged, suspended); keep the queue and reopen
+                self.last_error = e
+                self._disconnect()
+                self.reconnects += 1
+                metrics.count("device.reconnects")
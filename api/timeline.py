@@ -0,0 +1,155 @@
+import time
+
+import cv2
+import numpy as np
+
+from api.capture import fit
+from api.fingerprint import hamming_distance
+
+# How often the engine samples the screen between model requests in timeline mode (seconds)
+SAMPLE_INTERVAL = 1.0
+# Most frames one request carries; beyond this the least novel frames are merged away
+MAX_FRAMES = 6
+# Each frame is stored (and sent) at most this big, as JPEG at this quality
+THUMB_SIZE = (1024, 512)
+THUMB_QUALITY = 60
+# Contact sheet layout: columns, per-cell size cap and the label strip above each cell
+SHEET_COLUMNS = 3
+SHEET_CELL = (640, 320)
+SHEET_LABEL = 28
+
+# How a timeline goes to the model: one image per frame, or all frames tiled into one contact sheet
+FRAMES = "frames"
+SHEET = "sheet"
+LAYOUTS = (FRAMES, SHEET)
+
+
+class TimelineSample:
+    """One distinct screen in the timeline, shown from `at` until `until` (monotonic seconds)."""
+    def __init__(self, at, fingerprint, data, window=None):
+        self.at = at
+        self.until = at
+        self.fingerprint = fingerprint
+        self.data = data  # JPEG bytes
+        self.window = window
+        self.verdict = None
+        self.tier = None
+
+    @property
+    def duration(self):
+        return self.until - self.at
+
+
+class FrameTimeline:
+    """
+    Bounded buffer of compressed screen samples taken between model requests.
+
+    A sample within `change_threshold` bits of the previous one only extends
+    how long that screen was up, so a static screen costs one frame however
+    often it is sampled. When the buffer is full, the frame least different
+    from the one before it is folded into its predecessor, which keeps short
+    but distinct visits (a 5 second detour to a video) in the next request.
+    """
+    def __init__(self, max_frames=MAX_FRAMES, change_threshold=6, thumb_size=THUMB_SIZE, quality=THUMB_QUALITY,
+                 layout=FRAMES):
+        if layout not in LAYOUTS:
+            raise ValueError(f"layout must be one of {LAYOUTS}, not {layout!r}")
+        if max_frames < 2:
+            # Merging keeps the newest frame and folds an older one into its predecessor
+            raise ValueError(f"max_frames must be at least 2, not {max_frames}")
+        self.layout = layout
+        self.max_frames = max_frames
+        self.change_threshold = change_threshold
+        self.thumb_size = thumb_size
+        self.quality = quality
+        self.samples = []
+        # Lifetime totals for stats; reset() and drain() leave them alone
+        self.sampled = 0
+        self.merged = 0
+
+    def __len__(self):
+        return len(self.samples)
+
+    @property
+    def bytes(self):
+        return sum(len(sample.data) for sample in self.samples)
+
+    def add(self, frame, fingerprint, window=None, at=None):
+        """Adds a CaptureFrame. Returns True if it was kept as a new frame."""
+        at = time.monotonic() if at is None else at
+        self.sampled += 1
+        if self.samples:
+            last = self.samples[-1]
+            if hamming_distance(fingerprint, last.fingerprint) <= self.change_threshold:
+                last.until = at
+                return False
+
+        pixels = frame.composite(self.thumb_size)
+        ok, data = cv2.imencode(".jpg", pixels, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return False
+        self.samples.append(TimelineSample(at, fingerprint, data.tobytes(), window))
+        if len(self.samples) > self.max_frames:
+            self._merge_one()
+        return True
+
+    def _merge_one(self):
+        # Fold the frame closest to its predecessor into it; the newest frame always survives
+        index = min(
+            range(1, len(self.samples) - 1),
+            key=lambda i: hamming_distance(self.samples[i].fingerprint, self.samples[i - 1].fingerprint),
+        )
+        self.samples[index - 1].until = self.samples[index].until
+        del self.samples[index]
+        self.merged += 1
+
+    def drain(self):
+        """Hands over everything buffered and starts a new window."""
+        samples, self.samples = self.samples, []
+        return samples
+
+    def restore(self, samples):
+        """
+        Puts drained samples that never got a model verdict (request dropped,
+        refused or failed) back in front of what was sampled since, so their
+        frames go out with the next request instead of being lost.
+        """
+        samples = list(samples)
+        for sample in samples:
+            sample.verdict = sample.tier = None
+        if samples and self.samples:
+            last, first = samples[-1], self.samples[0]
+            if hamming_distance(first.fingerprint, last.fingerprint) <= self.change_threshold:
+                # Same screen on both sides of the drain: one frame
+                last.until = first.until
+                self.samples = self.samples[1:]
+        self.samples = samples + self.samples
+        while len(self.samples) > self.max_frames:
+            self._merge_one()
+
+    def reset(self):
+        """Drops the buffered frames (the sampled/merged totals keep counting)."""
+        self.samples = []
+
+
+def contact_sheet(samples, now=None, columns=SHEET_COLUMNS, cell=SHEET_CELL):
+    """
+    Tiles the samples oldest first into one BGR image, each under a strip
+    reading "<n>  -<age>s" so the model can refer to frames by number.
+    """
+    now = time.monotonic() if now is None else now
+    columns = max(1, min(columns, len(samples)))
+    rows = -(-len(samples) // columns)
+    width, height = cell
+    sheet = np.full((rows * (height + SHEET_LABEL), columns * width, 3), 255, dtype=np.uint8)
+
+    for number, sample in enumerate(samples, 1):
+        pixels = cv2.imdecode(np.frombuffer(sample.data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        pixels = fit(pixels, cell)
+        row, col = divmod(number - 1, columns)
+        x = col * width
+        y = row * (height + SHEET_LABEL)
+        label = f"{number}  -{max(0, now - sample.at):.0f}s"
+        cv2.putText(sheet, label, (x + 6, y + SHEET_LABEL - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
+        sheet[y + SHEET_LABEL:y + SHEET_LABEL + pixels.shape[0], x:x + pixels.shape[1]] = pixels
+    return sheet
@@ -0,0 +1,226 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from api.attention import AttentionEvent
+from api.gaze import GazeEstimator
+
+# Preview sent back to the UI by default; set_preview_size() changes it for the next start()
+PREVIEW_SIZE = (320, 240)
+# How often the worker reports state back (seconds)
+REPORT_INTERVAL = 0.03
+
+
+def _tracker_worker(source, low_power, preview_size, shm_name, commands, results, stop_event):
+    """
+    Runs in the child process: owns the camera and the whole EyeTracker pipeline,
+    writes downscaled previews into shared memory (two alternating slots) and
+    sends back only small state tuples, carrying the AttentionEvents raised since
+    the last one.
+    """
+    # Imported here so the parent never loads mediapipe for this backend
+    from api.webcam import EyeTracker
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    width, height = preview_size
+    previews = np.ndarray((2, height, width, 3), dtype=np.uint8, buffer=shm.buf)
+
+    # The tracker's AttentionMonitor publishes here; every report drains it to the parent
+    events = queue.Queue()
+    tracker = EyeTracker(low_power=low_power, source=source, events=events)
+    # The tracker scales the preview itself; here it's only copied into shared memory
+    tracker.set_preview_size(preview_size)
+    tracker.start()
+
+    slot = 0
+    last_seq = 0
+    unsent = []  # (distracted, reason, at) not yet delivered to the parent
+    try:
+        while not stop_event.is_set() and tracker.is_running:
+            try:
+                while True:
+                    name, value = commands.get_nowait()
+                    if name == "paused":
+                        tracker.set_paused(value)
+                    elif name == "preview":
+                        tracker.set_preview_visible(value)
+            except queue.Empty:
+                pass
+
+            preview_slot = -1
+            seq, frame = tracker.get_preview()
+            if frame is not None and seq != last_seq:
+                last_seq = seq
+                slot ^= 1
+                if frame.shape == previews[slot].shape:
+                    np.copyto(previews[slot], frame)
+                else:
+                    cv2.resize(frame, preview_size, dst=previews[slot], interpolation=cv2.INTER_AREA)
+                preview_slot = slot
+
+            try:
+                while True:
+                    event = events.get_nowait()
+                    unsent.append((event.distracted, event.reason, event.at))
+            except queue.Empty:
+                pass
+
+            features = tracker.gaze_features
+            state = (
+                tracker.is_distracted,
+                tracker.distraction_reason,
+                None if features is None else features.tolist(),
+                preview_slot,
+                last_seq,
+                tracker.get_stats(),
+                tuple(unsent),
+            )
+            try:
+                results.put(state, timeout=REPORT_INTERVAL)
+                unsent = []
+            except queue.Full:
+                pass  # Parent is behind (or shutting down); newer state follows, events go with it
+            time.sleep(REPORT_INTERVAL)
+    finally:
+        tracker.stop()
+        del previews
+        shm.close()
+
+
+class ProcessEyeTracker:
+    """
+    Drop-in EyeTracker that runs capture + FaceMesh in a separate process, so
+    inference never competes with the Tk main loop for the GIL.
+    Exposes the same surface the app uses (is_distracted, distraction_reason,
+    paused, get_frame, set_paused, gaze, ...). Gaze calibration and smoothing
+    stay in this process; only raw gaze features come back from the worker.
+    """
+    def __init__(self, low_power=False, source=0, events=None):
+        self.low_power = low_power
+        self.source = source
+        # The worker's AttentionEvents are re-published here
+        self.events = events if events is not None else queue.Queue()
+
+        self.is_running = False
+        self.paused = False
+        self.preview_visible = True
+        self.is_distracted = False
+        self.distraction_reason = ""
+        self.current_frame = None
+        self.frame_seq = 0
+        self.preview = (0, None)
+        self.preview_size = PREVIEW_SIZE
+
+        self.gaze = GazeEstimator()
+        self.gaze_features = None
+        self.gaze_point = None
+        # Same keys as EyeTracker.stats, so callers can read them before the worker's first report
+        self.stats = {"fps": 0.0, "cpu": 0.0, "capture": 0.0, "inference": 0.0, "pose": 0.0, "draw": 0.0}
+
+        self._context = mp.get_context("spawn")
+        self._process = None
+        self._shm = None
+        self._previews = None
+        self._reader = None
+
+    def start(self):
+        # Restartable: each run gets a fresh worker, shared memory and state
+        self.is_distracted = False
+        self.distraction_reason = ""
+        self.current_frame = None
+        self.preview = (self.frame_seq, None)
+        width, height = self.preview_size
+        self._shm = shared_memory.SharedMemory(create=True, size=2 * height * width * 3)
+        self._previews = np.ndarray((2, height, width, 3), dtype=np.uint8, buffer=self._shm.buf)
+
+        self._commands = self._context.Queue()
+        self._results = self._context.Queue(maxsize=64)
+        self._stop_event = self._context.Event()
+        self._process = self._context.Process(
+            target=_tracker_worker,
+            args=(self.source, self.low_power, self.preview_size, self._shm.name, self._commands, self._results,
+                  self._stop_event),
+            daemon=True,
+        )
+        self._process.start()
+
+        self.is_running = True
+        self.paused = False
+        self._reader = threading.Thread(target=self._read_results, daemon=True)
+        self._reader.start()
+
+    def stop(self):
+        self.is_running = False
+        if self._process:
+            self._stop_event.set()
+            self._process.join(timeout=2)
+            if self._process.is_alive():
+                self._process.terminate()
+        if self._reader and self._reader is not threading.current_thread():
+            self._reader.join(timeout=1)
+        if self._shm:
+            self._previews = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def set_paused(self, state):
+        """Pauses camera access to free up resources for Audio"""
+        self.paused = state
+        if self.is_running:
+            self._commands.put(("paused", state))
+
+    def set_preview_visible(self, state):
+        # The UI calls this every refresh; only bother the worker when it changes
+        if self.is_running and state != self.preview_visible:
+            self.preview_visible = state
+            self._commands.put(("preview", state))
+
+    def set_preview_size(self, size):
+        # Shared memory is sized at start(), so a new size applies from the next session
+        self.preview_size = tuple(size)
+
+    def get_frame(self):
+        return self.current_frame
+
+    def get_preview(self):
+        return self.preview
+
+    def get_gaze(self):
+        if self.paused:
+            return None
+        return self.gaze_point
+
+    def get_stats(self):
+        return dict(self.stats)
+
+    def _read_results(self):
+        while self.is_running:
+            try:
+                distracted, reason, features, preview_slot, seq, stats, events = self._results.get(timeout=0.5)
+            except queue.Empty:
+                if self._process and not self._process.is_alive():
+                    break
+                continue
+
+            for event in events:
+                self.events.put(AttentionEvent(*event))
+            self.is_distracted = distracted
+            self.distraction_reason = reason
+            self.stats = stats
+            self.gaze_features = None if features is None else np.array(features)
+            self.gaze_point = self.gaze.update(self.gaze_features)
+
+            previews = self._previews
+            if preview_slot >= 0 and previews is not None:
+                # Copy out right away; the worker reuses this slot two previews from now
+                frame = previews[preview_slot].copy()
+                frame.flags.writeable = False
+                self.current_frame = frame
+                self.frame_seq = seq
+                self.preview = (seq, frame)
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from api.fingerprint import hamming_distance
+
+# Rough per-entry bookkeeping cost (key tuple, dict slot, floats) on top of the verdict text
+ENTRY_OVERHEAD = 200
+
+
+def policy_key(goal, criteria):
+    """Stable short hash of the goal + policy a verdict was produced under."""
+    raw = f"{goal}\0{criteria}".encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+class VerdictCache:
+    """
+    LRU + TTL cache of screen verdicts keyed by (policy, screen fingerprint).
+    Lookups also accept near-identical fingerprints so revisiting a window that
+    moved a few pixels still hits. Can optionally persist to a JSON file.
+    """
+    def __init__(self, max_entries=512, max_bytes=1_000_000, ttl=6 * 3600,
+                 threshold=6, path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.threshold = threshold
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+        # (policy_key, fingerprint) -> (verdict, stored_at)
+        self.entries = OrderedDict()
+        self.size_bytes = 0
+        # The async engine stores verdicts from its own thread
+        self.lock = threading.RLock()
+
+        if self.path:
+            self.load()
+
+    def _entry_size(self, verdict):
+        return len(verdict) + ENTRY_OVERHEAD
+
+    def get(self, fingerprint, policy):
+        with self.lock:
+            return self._get(fingerprint, policy)
+
+    def _get(self, fingerprint, policy):
+        now = time.time()
+
+        key = (policy, fingerprint)
+        if key not in self.entries:
+            key = self._find_near(fingerprint, policy, now)
+
+        if key is not None:
+            verdict, stored_at = self.entries[key]
+            if now - stored_at <= self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return verdict
+            self._remove(key)
+
+        self.misses += 1
+        return None
+
+    def _find_near(self, fingerprint, policy, now):
+        best_key = None
+        best_distance = self.threshold + 1
+        for key, (_, stored_at) in self.entries.items():
+            if key[0] != policy or now - stored_at > self.ttl:
+                continue
+            distance = hamming_distance(fingerprint, key[1])
+            if distance < best_distance:
+                best_key = key
+                best_distance = distance
+        return best_key
+
+    def put(self, fingerprint, policy, verdict, stored_at=None):
+        with self.lock:
+            self._put(fingerprint, policy, verdict, stored_at)
+
+    def _put(self, fingerprint, policy, verdict, stored_at=None):
+        key = (policy, fingerprint)
+        if key in self.entries:
+            self._remove(key)
+
+        self.entries[key] = (verdict, stored_at if stored_at is not None else time.time())
+        self.size_bytes += self._entry_size(verdict)
+
+        while self.entries and (len(self.entries) > self.max_entries or self.size_bytes > self.max_bytes):
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        verdict, _ = self.entries.pop(key)
+        self.size_bytes -= self._entry_size(verdict)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size_bytes = 0
+
+    # --- PERSISTENCE ---
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        now = time.time()
+        # Rows are saved oldest-first, so re-inserting keeps the LRU order
+        for policy, fingerprint, verdict, stored_at in rows:
+            if now - stored_at <= self.ttl:
+                self.put(int(fingerprint, 16), policy, verdict, stored_at)
+
+    def save(self):
+        if not self.path:
+            return
+
+        with self.lock:
+            rows = [
+                [policy, format(fingerprint, "x"), verdict, stored_at]
+                for (policy, fingerprint), (verdict, stored_at) in self.entries.items()
+            ]
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f)
+        os.replace(tmp_path, self.path)
@@ -7,14 +7,112 @@ import time
 import numpy as np
 from mediapipe import solutions
 
+from api.gaze import GazeEstimator, gaze_features
+from api.attention import AttentionMonitor
+from api.metrics import metrics
+
+# Landmarks used for head pose (nose tip, chin, eye corners, mouth corners)
+POSE_LANDMARKS = (1, 199, 33, 263, 61, 291)
+
+# Frame pacing: base delay between frames, and the most adaptive skipping may stretch it to
+FRAME_INTERVAL = 0.06
+MAX_FRAME_INTERVAL = 0.3
+# Pose counts as "stable" while both angles stay within this many degrees between frames
+STABLE_DEGREES = 2.0
+
+# Capture resolution per mode (the preview is only 320x240 anyway)
+CAPTURE_SIZE = (640, 480)
+LOW_POWER_CAPTURE_SIZE = (320, 240)
+# Default preview size handed to the UI; set_preview_size() overrides it (e.g. for HiDPI)
+PREVIEW_SIZE = (320, 240)
+
+
+class FrameRing:
+    """
+    Small preallocated ring of camera frames shared by one writer (capture thread)
+    and one reader (inference thread) without locks.
+
+    The writer fills the slot after the newest one and then publishes it by bumping
+    that slot's sequence number. The reader copies the newest slot out and re-checks
+    the sequence afterwards (seqlock style); if the writer lapped it mid-copy, it
+    simply retries. Older frames are overwritten, never queued.
+    """
+    def __init__(self, slots=3):
+        self.slots = slots
+        self.buffers = None
+        self.seqs = [0] * slots
+        self.latest = 0
+        self.seq = 0
+        self.dropped = 0
+        self.new_frame = threading.Event()
+
+    def next_buffer(self, shape):
+        """Buffer the writer should fill next (allocated once, on the first frame)."""
+        if self.buffers is None or self.buffers[0].shape != shape:
+            self.buffers = [np.empty(shape, dtype=np.uint8) for _ in range(self.slots)]
+            self.seqs = [0] * self.slots
+        slot = (self.latest + 1) % self.slots
+        self.seqs[slot] = -1  # being written
+        return slot, self.buffers[slot]
+
+    def publish(self, slot):
+        self.seq += 1
+        self.seqs[slot] = self.seq
+        self.latest = slot
+        self.new_frame.set()
+
+    def read_latest(self, out, last_seq):
+        """Copies the newest frame into `out` if it is newer than last_seq. Returns its seq or None."""
+        while True:
+            slot = self.latest
+            seq = self.seqs[slot]
+            if seq <= last_seq or self.buffers is None:
+                return None
+            if out.shape != self.buffers[slot].shape:
+                return None
+            np.copyto(out, self.buffers[slot])
+            if self.seqs[slot] == seq:
+                # Frames published between our previous read and this one were never looked at
+                self.dropped += max(0, seq - last_seq - 1) if last_seq else 0
+                return seq
+
+
 class EyeTracker:
-    def __init__(self):
+    def __init__(self, low_power=False, source=0, loop_video=False, events=None):
         self.cap = None
         self.is_running = False
         self.paused = False  # <--- NEW: Pause flag
         self.is_distracted = False
         self.distraction_reason = ""
         self.current_frame = None
+        self.frame_seq = 0
+        self.preview = (0, None)  # (seq, frame) published together so readers never mix them
+
+        # Debounced attention state; transitions are pushed onto `events`
+        self.attention = AttentionMonitor(events)
+        self.events = self.attention.events
+
+        # Camera index, or a path to a recorded video to replay in place of the webcam
+        self.source = source
+        self.is_file = isinstance(source, str)
+        self.loop_video = loop_video
+        self.ring = FrameRing()
+
+        # Low-power mode: smaller capture, no mesh drawing, adaptive frame skipping
+        self.low_power = low_power
+        self.capture_size = LOW_POWER_CAPTURE_SIZE if low_power else CAPTURE_SIZE
+        self.preview_visible = True
+        self.preview_size = PREVIEW_SIZE
+        self.frame_interval = FRAME_INTERVAL
+        self.last_angles = None
+
+        # Gaze: raw features of the latest frame + the calibrated screen point
+        self.gaze = GazeEstimator()
+        self.gaze_features = None
+        self.gaze_point = None
+
+        # Stats: EMA of per-stage timings (seconds), fps and CPU share of the tracker thread
+        self.stats = {"fps": 0.0, "cpu": 0.0, "capture": 0.0, "inference": 0.0, "pose": 0.0, "draw": 0.0}
 
         mp_face_mesh = solutions.face_mesh
         self.mp_drawing = solutions.drawing_utils
@@ -27,87 +125,228 @@ class EyeTracker:
         )
 
     def start(self):
+        """Starts (or restarts, after stop()) capture; the FaceMesh graph is kept between runs."""
         self.is_running = True
         self.paused = False
+        self.ring.new_frame.clear()
+        self.attention.reset()
+        self.is_distracted = False
+        self.distraction_reason = ""
+        self.current_frame = None
+        self.preview = (self.frame_seq, None)
+        self.last_angles = None
+        self.frame_interval = FRAME_INTERVAL
+        self._open_camera()
+
+        # Capture and inference run on separate threads joined by the frame ring
+        self.capture_thread = threading.Thread(target=self._capture_loop)
+        self.capture_thread.daemon = True
+        self.capture_thread.start()
+
         self.thread = threading.Thread(target=self._run_loop)
         self.thread.daemon = True
         self.thread.start()
 
     def stop(self):
         self.is_running = False
+        self.ring.new_frame.set()
+        for thread in (getattr(self, "capture_thread", None), getattr(self, "thread", None)):
+            if thread and thread is not threading.current_thread():
+                thread.join(timeout=1)
         if self.cap:
             self.cap.release()
 
     def set_paused(self, state):
         """Pauses camera access to free up resources for Audio"""
         self.paused = state
+        if not state:
+            # Start fresh after a pause instead of firing on stale pose history
+            self.attention.reset()
+            self.is_distracted = False
+            self.distraction_reason = ""
+
+    def set_preview_visible(self, state):
+        """Skip mesh drawing and the RGB preview copy while nobody can see them"""
+        self.preview_visible = state
+
+    def set_preview_size(self, size):
+        """(width, height) the preview is scaled to before publishing, so the UI never resizes."""
+        self.preview_size = tuple(size)
 
     def get_frame(self):
+        """Latest published preview frame (RGB, read-only). Never mutated after publishing."""
         return self.current_frame
 
-    def _run_loop(self):
-        self.cap = cv2.VideoCapture(0)
-        cam_matrix = None
-        dist_matrix = np.zeros((4, 1), dtype=np.float64)
+    def get_preview(self):
+        """(seq, frame) of the latest preview; the seq only changes when a new frame is published."""
+        return self.preview
+
+    def get_gaze(self):
+        """Estimated gaze point on the primary monitor (0..1 per axis), or None"""
+        if self.paused:
+            return None
+        return self.gaze_point
+
+    def get_stats(self):
+        return dict(self.stats)
+
+    def _record(self, stage, seconds):
+        self.stats[stage] = 0.9 * self.stats[stage] + 0.1 * seconds
+        metrics.observe(f"tracker.{stage}", seconds)
+
+    def _open_camera(self):
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.is_file:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.capture_size[0])
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.capture_size[1])
+            # Keep the driver from queueing stale frames where supported
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
 
+    def _capture_loop(self):
+        """Capture stage: reads as fast as the source delivers and keeps only the newest frame."""
+        frame_time = 0.0
+        if self.is_file:
+            fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+            frame_time = 1.0 / fps
+
+        shape = None
         while self.is_running:
             # --- PAUSE LOGIC ---
             if self.paused:
                 # Sleep to save CPU while microphone is using resources
-                time.sleep(0.5) 
+                time.sleep(0.5)
                 continue
             # -------------------
 
             if not self.cap.isOpened():
-                self.cap.open(0) # Re-open if it was lost
+                self.cap.open(self.source) # Re-open if it was lost
                 time.sleep(0.1)
                 continue
 
-            success, image = self.cap.read()
+            started = time.perf_counter()
+            if shape is None:
+                success, image = self.cap.read()
+                if success:
+                    shape = image.shape
+                    slot, buffer = self.ring.next_buffer(shape)
+                    np.copyto(buffer, image)
+                    self.ring.publish(slot)
+                    continue
+            else:
+                slot, buffer = self.ring.next_buffer(shape)
+                success, image = self.cap.read(buffer)
+                if success and image.shape == shape:
+                    if image is not buffer:
+                        np.copyto(buffer, image)
+                    self.ring.publish(slot)
+                    self._record("capture", time.perf_counter() - started)
+
             if not success:
+                if self.is_file:
+                    if not self.loop_video:
+                        self.is_running = False
+                        self.ring.new_frame.set()
+                        break
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
                 time.sleep(0.1)
                 continue
 
-            image = cv2.flip(image, 1)
+            if frame_time:
+                # Replay recorded video in real time
+                time.sleep(max(0.0, frame_time - (time.perf_counter() - started)))
+
+        self.cap.release()
+
+    def _draw_mesh(self, image, face_landmarks):
+        self.mp_drawing.draw_landmarks(
+            image=image,
+            landmark_list=face_landmarks,
+            connections=solutions.face_mesh.FACEMESH_TESSELATION,
+            landmark_drawing_spec=None,
+            connection_drawing_spec=self.mp_drawing_styles.get_default_face_mesh_tesselation_style()
+        )
+        self.mp_drawing.draw_landmarks(
+            image=image,
+            landmark_list=face_landmarks,
+            connections=solutions.face_mesh.FACEMESH_CONTOURS,
+            landmark_drawing_spec=None,
+            connection_drawing_spec=self.mp_drawing_styles.get_default_face_mesh_contours_style()
+        )
+
+    def _pace(self, x_angle, y_angle):
+        """Slows down while the head holds still and snaps back to full rate on movement."""
+        if not self.low_power:
+            return
+
+        if self.last_angles is not None and not self.is_distracted:
+            dx = abs(x_angle - self.last_angles[0])
+            dy = abs(y_angle - self.last_angles[1])
+            if dx < STABLE_DEGREES and dy < STABLE_DEGREES:
+                self.frame_interval = min(self.frame_interval * 1.25, MAX_FRAME_INTERVAL)
+            else:
+                self.frame_interval = FRAME_INTERVAL
+        else:
+            self.frame_interval = FRAME_INTERVAL
+        self.last_angles = (x_angle, y_angle)
+
+    def _run_loop(self):
+        cam_matrix = None
+        dist_matrix = np.zeros((4, 1), dtype=np.float64)
+        pose_index = list(POSE_LANDMARKS)
+
+        frame = None
+        image = None
+        last_seq = 0
+        last_frame_at = time.perf_counter()
+        last_cpu = time.thread_time()
+
+        while self.is_running:
+            if self.paused:
+                time.sleep(0.5)
+                continue
+
+            # Inference stage: block until the capture thread publishes something newer
+            if not self.ring.new_frame.wait(timeout=0.5):
+                continue
+            self.ring.new_frame.clear()
+
+            if self.ring.buffers is None:
+                continue
+            if frame is None or frame.shape != self.ring.buffers[0].shape:
+                frame = np.empty_like(self.ring.buffers[0])
+                image = np.empty_like(frame)
+
+            seq = self.ring.read_latest(frame, last_seq)
+            if seq is None:
+                continue
+            last_seq = seq
+
+            cv2.flip(frame, 1, dst=image)
             img_h, img_w, _ = image.shape
 
+            draw = self.preview_visible
+            face_landmarks = None
+
             if self.face_mesh:
+                stage = time.perf_counter()
                 image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
                 image_rgb.flags.writeable = False
                 results = self.face_mesh.process(image_rgb)
                 image_rgb.flags.writeable = True
+                self._record("inference", time.perf_counter() - stage)
 
                 if results.multi_face_landmarks:
                     for face_landmarks in results.multi_face_landmarks:
-                        
-                        # Draw Mesh
-                        self.mp_drawing.draw_landmarks(
-                            image=image,
-                            landmark_list=face_landmarks,
-                            connections=solutions.face_mesh.FACEMESH_TESSELATION,
-                            landmark_drawing_spec=None,
-                            connection_drawing_spec=self.mp_drawing_styles.get_default_face_mesh_tesselation_style()
-                        )
-                        self.mp_drawing.draw_landmarks(
-                            image=image,
-                            landmark_list=face_landmarks,
-                            connections=solutions.face_mesh.FACEMESH_CONTOURS,
-                            landmark_drawing_spec=None,
-                            connection_drawing_spec=self.mp_drawing_styles.get_default_face_mesh_contours_style()
-                        )
-
-                        # Math Logic
-                        face_3d = []
-                        face_2d = []
-
-                        for idx, lm in enumerate(face_landmarks.landmark):
-                            if idx in [1, 199, 33, 263, 61, 291]:
-                                x, y = int(lm.x * img_w), int(lm.y * img_h)
-                                face_2d.append([x, y])
-                                face_3d.append([x, y, lm.z])
-
-                        face_2d = np.array(face_2d, dtype=np.float64)
-                        face_3d = np.array(face_3d, dtype=np.float64)
+                        stage = time.perf_counter()
+
+                        # Math Logic: pull only the six pose landmarks, straight by index
+                        landmarks = face_landmarks.landmark
+                        points = np.array([(landmarks[i].x, landmarks[i].y, landmarks[i].z) for i in pose_index],
+                                          dtype=np.float64)
+                        face_3d = points * (img_w, img_h, 1.0)
+                        face_3d[:, :2] = face_3d[:, :2].astype(np.int64)
+                        face_2d = np.ascontiguousarray(face_3d[:, :2])
 
                         if cam_matrix is None:
                             focal_length = 1 * img_w
@@ -124,26 +363,48 @@ class EyeTracker:
                             x_angle = angles[0] * 360
                             y_angle = angles[1] * 360
 
-                            if y_angle < -20:
-                                self.is_distracted = True
-                                self.distraction_reason = "Stop looking to the left!"
-                            elif y_angle > 20:
-                                self.is_distracted = True
-                                self.distraction_reason = "Stop looking to the right!"
-                            elif x_angle < -25:
-                                self.is_distracted = True
-                                self.distraction_reason = "Stop looking down!"
-                            elif x_angle > 25:
-                                self.is_distracted = True
-                                self.distraction_reason = "Stop looking up!"
-                            else:
-                                self.is_distracted = False
-                                self.distraction_reason = ""
+                            self.gaze_features = gaze_features(landmarks, y_angle, x_angle)
+                            self.gaze_point = self.gaze.update(self.gaze_features)
+
+                            self.attention.update(x_angle, y_angle)
+                            self.is_distracted = self.attention.distracted
+                            self.distraction_reason = self.attention.reason
+
+                            self._pace(x_angle, y_angle)
+                        self._record("pose", time.perf_counter() - stage)
                 else:
-                    self.is_distracted = True
-                    self.distraction_reason = "Away from Desk"
+                    self.attention.face_lost()
+                    self.is_distracted = self.attention.distracted
+                    self.distraction_reason = self.attention.reason
+                    self.gaze_features = None
+                    self.gaze_point = self.gaze.update(None)
+                    self.last_angles = None
+                    self.frame_interval = FRAME_INTERVAL
+
+            # Only pay for the mesh drawing and preview copy when someone is watching
+            if draw:
+                stage = time.perf_counter()
+                if face_landmarks is not None and not self.low_power:
+                    self._draw_mesh(image, face_landmarks)
+                # Display stage: scale down first (so the colour conversion touches a quarter of
+                # the pixels), then publish a fresh read-only array so readers never see it change
+                small = cv2.resize(image, self.preview_size, interpolation=cv2.INTER_AREA)
+                preview = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+                preview.flags.writeable = False
+                self.current_frame = preview
+                self.frame_seq = seq
+                self.preview = (seq, preview)
+                self._record("draw", time.perf_counter() - stage)
+            else:
+                self.current_frame = None
+                self.preview = (self.frame_seq, None)
 
-            self.current_frame = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            time.sleep(0.06)
+            now = time.perf_counter()
+            cpu = time.thread_time()
+            elapsed = now - last_frame_at
+            if elapsed > 0:
+                self.stats["fps"] = 0.9 * self.stats["fps"] + 0.1 / elapsed
+                self.stats["cpu"] = 0.9 * self.stats["cpu"] + 0.1 * (cpu - last_cpu) / elapsed
+            last_frame_at, last_cpu = now, cpu
 
-        self.cap.release()
\ No newline at end of file
+            time.sleep(self.frame_interval)
@@ -1,6 +1,11 @@
-import threading
 import time
+# Measured from here so "window ready" includes every import below
+APP_STARTED = time.perf_counter()
+
+import threading
 import os
+import queue
+from collections import deque
 import tkinter.messagebox
 from datetime import datetime
 import customtkinter as ctk
@@ -8,10 +13,19 @@ from CTkMessagebox import CTkMessagebox
 from dotenv import load_dotenv
 from PIL import Image
 
-from api.detection import FocusDetector
-from api.webcam import EyeTracker
+# Only light modules here; mediapipe, OpenCV, the OpenAI/ElevenLabs SDKs, SciPy and
+# PortAudio are imported by the engine builders below, off the UI thread
+from api.scheduler import ScanScheduler
+from api.verdict_cache import VerdictCache
+from api.policy import PolicyStore
+from api.gaze import CALIBRATION_TARGETS
 from api.slapper import Slapper
-from api.audio import VoiceAudio
+from api.audio_cache import AudioCache
+from api.alert import AlertFlow, ALERT_SPEECH
+from api.engines import EngineRegistry
+from api.attention import AttentionEvent
+from api.fusion import ScanGate, load_rules
+from api.metrics import metrics
 
 load_dotenv()
 
@@ -19,13 +33,54 @@ OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 SERIAL_PORT = os.getenv("SERIAL_PORT")
 SERIAL_BAUD = os.getenv("SERIAL_BAUD")
+LOW_POWER_TRACKING = os.getenv("LOW_POWER_TRACKING", "0") == "1"
+# Run FaceMesh in a worker process so it never competes with the UI for the GIL
+TRACKER_PROCESS = os.getenv("TRACKER_PROCESS", "0") == "1"
 AI_STUDIO_API_KEY = os.getenv("AI_STUDIO_API_KEY")
+VERDICT_CACHE_PATH = os.getenv("VERDICT_CACHE_PATH")
+POLICY_STORE_PATH = os.getenv("POLICY_STORE_PATH", ".cache/policies.json")
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", ".cache/tts")
+# Recorded "sorry"/"my bad" templates for offline apology detection (python -m api.keyword_spotter)
+APOLOGY_TEMPLATE_DIR = os.getenv("APOLOGY_TEMPLATE_DIR", ".cache/apology_templates")
+# Ask the speech-to-text API when the local match is unsure (forced on while no templates are recorded)
+STT_FALLBACK = os.getenv("STT_FALLBACK", "1") == "1"
+# Write a Chrome trace of every session here (chrome://tracing, ui.perfetto.dev); unset = no instrumentation
+TRACE_DIR = os.getenv("TRACE_DIR")
+# JSON list of scan-gating rules (see api/fusion.py DEFAULT_RULES); unset = defaults
+FUSION_RULES_PATH = os.getenv("FUSION_RULES_PATH")
+# Full log history; the on-screen log only keeps the last LOG_MAX_LINES lines
+LOG_FILE = os.getenv("LOG_FILE", ".cache/focus.log")
+# Sample the screen every second and judge all distinct frames per request: "frames" or "sheet"; unset = off
+SCREEN_TIMELINE = os.getenv("SCREEN_TIMELINE")
 OPENROUTER_API_KEY = AI_STUDIO_API_KEY
 ELEVENLABS_VOICE_ID = "KLZOWyG48RjZkAAjuM89"
 
+# Screen engine tuning (seconds)
+SCAN_MIN_INTERVAL = 3
+SCAN_MAX_INTERVAL = 60
+SCREEN_DEADLINE = 15
+SCREEN_HEDGE_AFTER = 4
+
+# Hourly model budget
+MAX_REQUESTS_PER_HOUR = int(os.getenv("MAX_REQUESTS_PER_HOUR", "240"))
+MAX_TOKENS_PER_HOUR = int(os.getenv("MAX_TOKENS_PER_HOUR", "400000"))
+
+# Preview label size (logical pixels) and refresh period (ms)
+PREVIEW_SIZE = (320, 240)
+PREVIEW_REFRESH_MS = 30
+
+# Log widget: messages are queued and flushed together this often (ms), capped at this many lines
+LOG_FLUSH_MS = 200
+LOG_MAX_LINES = 500
+
+# Gaze calibration: per dot, wait for the eyes to settle, then sample (ms)
+CALIBRATION_SETTLE_MS = 700
+CALIBRATION_SAMPLES = 20
+CALIBRATION_SAMPLE_MS = 50
+
 class FocusApp(ctk.CTk):
     slapper: Slapper
-    voice: VoiceAudio
+    engines: EngineRegistry
 
     def __init__(self):
         super().__init__()
@@ -37,19 +92,141 @@ class FocusApp(ctk.CTk):
 
         self.detector = None
         self.eye_tracker = None
+        self.screen_engine = None
+        self.scan_gate = None
+        self.alert_flow = None
+        self.stop_thread = None
         self.is_running = False
         self.alert_showing = False
         self.last_alert_time = 0
         self.distraction_criteria = ""
         self.duration_minutes = 0
-
+        self.preview_size = PREVIEW_SIZE
+        metrics.enable(bool(TRACE_DIR))
+
+        # Camera preview: one PIL image + one CTkImage, refilled in place when the frame seq changes
+        self.preview_image = None
+        self.preview_ctk_image = None
+        self.preview_seq = None
+
+        # Log lines queued from any thread; the Tk thread drains them every LOG_FLUSH_MS
+        self.log_pending = deque()
+        self.log_lines = 0
+        self.log_file = self._open_log_file()
+
+        # Connects (and reconnects) in the background; slaps are queued, never blocking
+        self.slapper = Slapper(SERIAL_PORT, SERIAL_BAUD) if SERIAL_PORT else None
+
+        # Shared across sessions so revisited screens resolve without a model call
+        self.verdict_cache = VerdictCache(path=VERDICT_CACHE_PATH)
+        self.policy_store = PolicyStore(POLICY_STORE_PATH)
+        # Tracker transitions and screen verdicts both land here; the monitor thread blocks on it
+        self.signals = queue.Queue()
+        self.setup_ui()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Heavy backends are built once in the background and reused by every session
+        self.engines = EngineRegistry({
+            "tracker": self.build_tracker,
+            "detector": self.build_detector,
+            "voice": self.build_voice,
+        })
+        self.after_idle(self._window_ready)
+
+    def _window_ready(self):
+        self.log(f"Window ready in {(time.perf_counter() - APP_STARTED) * 1000:.0f} ms")
+        self.engines.warm()
+        threading.Thread(target=self.report_warmup, daemon=True).start()
+
+    # --- ENGINES (built on the registry's thread) ---
+    def build_tracker(self):
+        if TRACKER_PROCESS:
+            from api.tracker_process import ProcessEyeTracker
+            return ProcessEyeTracker(low_power=LOW_POWER_TRACKING, events=self.signals)
+        from api.webcam import EyeTracker
+        return EyeTracker(low_power=LOW_POWER_TRACKING, events=self.signals)
+
+    def build_detector(self):
+        from api.detection import FocusDetector
         try:
-            self.slapper = Slapper(SERIAL_PORT, SERIAL_BAUD)
+            gaze_provider = self.engines.get("tracker").get_gaze
         except Exception:
-            self.slapper = None
+            gaze_provider = None
+        detector = FocusDetector(
+            OPENROUTER_API_KEY,
+            verdict_cache=self.verdict_cache,
+            policy_store=self.policy_store,
+            gaze_provider=gaze_provider,
+        )
+        # Import the async engine too so the first session doesn't pay for it
+        import api.engine  # noqa: F401
+        return detector
+
+    def build_voice(self):
+        from api.audio import VoiceAudio
+        from api.keyword_spotter import KeywordSpotter
+        spotter = KeywordSpotter(APOLOGY_TEMPLATE_DIR)
+        remote_fallback = STT_FALLBACK
+        if not spotter.templates and not remote_fallback:
+            # Nothing could ever recognise the apology, so every alert would repeat forever
+            self.log("STT_FALLBACK=0 but no apology templates are recorded; using the speech-to-text API anyway.")
+            remote_fallback = True
+        voice = VoiceAudio(
+            key=ELEVENLABS_API_KEY,
+            audio_cache=AudioCache(AUDIO_CACHE_DIR),
+            local_recognizer=spotter,
+            remote_fallback=remote_fallback,
+        )
+        try:
+            voice.open_microphone()
+        except Exception as e:
+            self.log(f"Microphone not available yet: {e}")
+        return voice
+
+    def report_warmup(self):
+        for name in self.engines.builders:
+            try:
+                self.engines.get(name)
+            except Exception as e:
+                self.log(f"Could not start {name}: {e}")
+        timings = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.engines.timings.items())
+        self.log(f"Engines warm: {timings}")
+
+        if self.engines.is_ready("voice") and self.engines.slots["voice"].error is None:
+            voice = self.engines.get("voice")
+            if not voice.recognizer.primary.templates:
+                self.log("No apology templates recorded; apologies go to the speech-to-text API.")
+            self.prefetch_speech(voice)
+
+    def prefetch_speech(self, voice):
+        # Warm the TTS cache so the first alert speaks immediately
+        try:
+            fetched = voice.prefetch(ELEVENLABS_VOICE_ID, [ALERT_SPEECH])
+        except Exception as e:
+            self.log(f"Could not prefetch alert speech: {e}")
+            return
+        if fetched:
+            self.log(f"Cached {fetched} alert phrase(s) for offline playback.")
 
-        self.voice = VoiceAudio(key=ELEVENLABS_API_KEY)
-        self.setup_ui()
+    def on_close(self):
+        if self.is_running:
+            self.stop_session()
+        if self.stop_thread:
+            self.stop_thread.join()
+        self.engines.close()
+        if self.slapper:
+            self.slapper.close()
+        self._flush_log_file()
+        self.destroy()
+
+    def _flush_log_file(self):
+        if self.log_file:
+            try:
+                self.log_file.writelines(self.log_pending)
+                self.log_file.close()
+            except OSError:
+                pass
+            self.log_file = None
 
     def center_window(self):
         self.update_idletasks()
@@ -81,20 +258,53 @@ class FocusApp(ctk.CTk):
         self.btn_start = ctk.CTkButton(self, text="Start Session", command=self.toggle_session, fg_color="#1a73e8")
         self.btn_start.pack(pady=10)
 
+        self.btn_calibrate = ctk.CTkButton(self, text="Calibrate Gaze", command=self.calibrate_gaze,
+                                           fg_color="gray30", state="disabled")
+        self.btn_calibrate.pack(pady=(0, 10))
+
         self.textbox_log = ctk.CTkTextbox(self, height=150)
         self.textbox_log.pack(pady=10, padx=20, fill="both", expand=True)
         self.textbox_log.insert("0.0", "Ready.\n")
+        self.log_lines = 1
+        self.after(LOG_FLUSH_MS, self._flush_log)
 
-    def log(self, message):
-        self.after(0, lambda: self._update_log(message))
+    def _open_log_file(self):
+        if not LOG_FILE:
+            return None
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(LOG_FILE)), exist_ok=True)
+            return open(LOG_FILE, "a", encoding="utf-8")
+        except OSError as e:
+            print(f"Could not open log file: {e}")
+            return None
 
-    def _update_log(self, message):
+    def log(self, message):
+        # Safe from any thread; deque.append is atomic and nothing touches Tk here
         timestamp = datetime.now().strftime('%H:%M:%S')
-        self.textbox_log.insert("end", f"[{timestamp}] {message}\n")
-        self.textbox_log.see("end")
-
-    def play_sound(self, reason):
-        self.voice.play(ELEVENLABS_VOICE_ID, "Stop getting distracted! Apologize and get back to work!")
+        self.log_pending.append(f"[{timestamp}] {message}\n")
+
+    def _flush_log(self):
+        lines = []
+        while self.log_pending:
+            lines.append(self.log_pending.popleft())
+        if lines:
+            text = "".join(lines)
+            if self.log_file:
+                try:
+                    self.log_file.write(text)
+                    self.log_file.flush()
+                except OSError:
+                    pass
+            # Only the newest lines are worth inserting if a burst exceeds the cap
+            shown = lines[-LOG_MAX_LINES:]
+            self.textbox_log.insert("end", "".join(shown))
+            self.log_lines += len(shown)
+            excess = self.log_lines - LOG_MAX_LINES
+            if excess > 0:
+                self.textbox_log.delete("1.0", f"{excess + 1}.0")
+                self.log_lines -= excess
+            self.textbox_log.see("end")
+        self.after(LOG_FLUSH_MS, self._flush_log)
 
     def toggle_session(self):
         if self.is_running:
@@ -115,15 +325,14 @@ class FocusApp(ctk.CTk):
         except ValueError:
             return
 
-        self.detector = FocusDetector(OPENROUTER_API_KEY)
-        self.eye_tracker = EyeTracker()
-        self.eye_tracker.start()
-
         self.is_running = True
         self.alert_showing = False
         self.last_alert_time = 0
+        # Read here on the Tk thread; the tracker scales previews to it before publishing
+        self.preview_size = self.preview_pixel_size()
 
         self.btn_start.configure(text="Stop Session", fg_color="#d93025")
+        self.btn_calibrate.configure(state="normal")
         self.entry_goal.configure(state="disabled")
         self.entry_time.configure(state="disabled")
 
@@ -133,78 +342,206 @@ class FocusApp(ctk.CTk):
 
         self.update_camera_feed()
 
+    def preview_pixel_size(self):
+        """Size in physical pixels the camera label draws PREVIEW_SIZE at (differs on HiDPI)."""
+        scaling = ctk.ScalingTracker.get_widget_scaling(self.camera_label)
+        return round(PREVIEW_SIZE[0] * scaling), round(PREVIEW_SIZE[1] * scaling)
+
     def update_camera_feed(self):
         if not self.is_running:
             self.camera_label.configure(image=None, text="Camera Off")
+            self.preview_seq = None
             return
 
         if self.eye_tracker:
-            frame = self.eye_tracker.get_frame()
-            if frame is not None:
-                pil_img = Image.fromarray(frame)
-                pil_img = pil_img.resize((320, 240))
-                ctk_img = ctk.CTkImage(light_image=pil_img, dark_image=pil_img, size=(320, 240))
-                self.camera_label.configure(image=ctk_img, text="")
+            # No point drawing the preview while the window is minimised or hidden
+            visible = self.winfo_viewable() and self.state() != "iconic"
+            self.eye_tracker.set_preview_visible(visible)
+
+            seq, frame = self.eye_tracker.get_preview()
+            if frame is None:
+                if self.preview_seq != -1:
+                    self.camera_label.configure(image=None, text="Camera Paused/Loading...")
+                    self.preview_image = self.preview_ctk_image = None
+                    self.preview_seq = -1
+            elif seq != self.preview_seq:
+                self._show_preview(frame)
+                self.preview_seq = seq
+
+        self.after(PREVIEW_REFRESH_MS, self.update_camera_feed)
+
+    def _show_preview(self, frame):
+        height, width = frame.shape[:2]
+        if self.preview_image is not None and self.preview_image.size == (width, height):
+            # Same size as last time: refill the existing PIL image and Tk photo in place
+            self.preview_image.frombytes(frame)
+            photo = self.preview_ctk_image.create_scaled_photo_image(
+                ctk.ScalingTracker.get_widget_scaling(self.camera_label), "dark")
+            if (photo.width(), photo.height()) == (width, height):
+                photo.paste(self.preview_image)
+                return
+
+        # First frame, or the size changed (e.g. window moved to a HiDPI screen): build the images once
+        self.eye_tracker.set_preview_size(self.preview_pixel_size())
+        self.preview_image = Image.fromarray(frame)
+        self.preview_ctk_image = ctk.CTkImage(dark_image=self.preview_image, size=PREVIEW_SIZE)
+        self.camera_label.configure(image=self.preview_ctk_image, text="")
+
+    def calibrate_gaze(self):
+        """Shows a dot at each calibration target and feeds the tracker's gaze features to the estimator."""
+        if not self.eye_tracker:
+            return
+
+        self.log("Gaze calibration: follow the dot with your eyes.")
+        self.eye_tracker.gaze.start_calibration()
+
+        window = ctk.CTkToplevel(self)
+        window.attributes("-fullscreen", True)
+        window.attributes("-topmost", True)
+        canvas = tkinter.Canvas(window, bg="black", highlightthickness=0)
+        canvas.pack(fill="both", expand=True)
+
+        settle_ticks = CALIBRATION_SETTLE_MS // CALIBRATION_SAMPLE_MS
+        window.after(300, lambda: self._calibration_tick(window, canvas, 0, -settle_ticks))
+
+    def _calibration_tick(self, window, canvas, target_index, tick):
+        if not self.is_running or not self.eye_tracker:
+            window.destroy()
+            return
+
+        if target_index == len(CALIBRATION_TARGETS):
+            window.destroy()
+            if self.eye_tracker.gaze.finish_calibration():
+                self.log("Gaze calibrated. Screen checks will focus on where you look.")
             else:
-                self.camera_label.configure(text="Camera Paused/Loading...")
+                self.log("Gaze calibration failed (face not visible). Using full screenshots.")
+            return
 
-        self.after(30, self.update_camera_feed)
+        target = CALIBRATION_TARGETS[target_index]
+        if tick == -(CALIBRATION_SETTLE_MS // CALIBRATION_SAMPLE_MS):
+            x, y = target[0] * window.winfo_width(), target[1] * window.winfo_height()
+            canvas.delete("all")
+            canvas.create_oval(x - 12, y - 12, x + 12, y + 12, fill="#1a73e8", outline="white", width=2)
+        elif tick >= 0:
+            self.eye_tracker.gaze.add_sample(target, self.eye_tracker.gaze_features)
+
+        if tick + 1 >= CALIBRATION_SAMPLES:
+            target_index, tick = target_index + 1, -(CALIBRATION_SETTLE_MS // CALIBRATION_SAMPLE_MS)
+        else:
+            tick += 1
+        window.after(CALIBRATION_SAMPLE_MS, lambda: self._calibration_tick(window, canvas, target_index, tick))
 
     def stop_session(self):
         self.is_running = False
-        if self.eye_tracker:
-            self.eye_tracker.stop()
+        if self.alert_flow:
+            # Stops speech and recording right away; the popup closes on the next UI tick
+            self.alert_flow.cancel()
+            self.alert_flow = None
+            self.alert_showing = False
+        if self.screen_engine:
+            # No new scans from here on; the loop itself is joined in the background
+            self.screen_engine.is_running = False
+
+        # Stopping joins the tracker and engine threads (seconds for a worker process), so it runs
+        # off the Tk thread; the next session's monitor thread waits for it before starting them again
+        self.stop_thread = threading.Thread(
+            target=self._finish_session, args=(self.eye_tracker, self.screen_engine), daemon=True)
+        self.stop_thread.start()
 
         self.btn_start.configure(text="Start Session", fg_color="#1a73e8")
+        self.btn_calibrate.configure(state="disabled")
         self.entry_goal.configure(state="normal")
         self.entry_time.configure(state="normal")
+
+    def _finish_session(self, eye_tracker, screen_engine):
+        if eye_tracker:
+            eye_tracker.stop()
+            stats = eye_tracker.get_stats()
+            self.log(
+                f"Tracker: {stats['fps']:.1f} fps, {stats['cpu'] * 100:.0f}% CPU, "
+                f"inference {stats['inference'] * 1000:.0f} ms, draw {stats['draw'] * 1000:.0f} ms"
+            )
+        if screen_engine:
+            screen_engine.stop()
+            decisions = ", ".join(f"{rule}={n}" for rule, n in screen_engine.gate.decisions.items())
+            self.log(f"Scan gate: {screen_engine.gated} held back, {decisions or 'no decisions'}")
+        if self.slapper:
+            stats = self.slapper.get_stats()
+            self.log(
+                f"Device: {'connected' if stats['connected'] else 'offline'}, {stats['sent']} sent, "
+                f"{stats['coalesced']} coalesced, {stats['reconnects']} reconnects"
+            )
+        if self.detector:
+            counts = ", ".join(f"{tier}={n}" for tier, n in self.detector.tier_counts.items())
+            self.log(f"Screen verdicts by tier: {counts or 'none'}")
+            self.log(f"Model tokens used: {self.detector.tokens_used}")
+            try:
+                self.detector.verdict_cache.save()
+            except OSError as e:
+                self.log(f"Could not save verdict cache: {e}")
+        if metrics.enabled:
+            self.export_trace()
         self.log("Session stopped.")
 
+    def export_trace(self):
+        path = os.path.join(TRACE_DIR, f"session-{datetime.now():%Y%m%d-%H%M%S}.json")
+        try:
+            metrics.export(path)
+        except OSError as e:
+            self.log(f"Could not write trace: {e}")
+            return
+        summary = metrics.summary()
+        for name in ("screen.grab", "screen.encode", "screen.model", "tracker.inference", "voice.tts",
+                     "voice.recognize", "alert.acknowledge"):
+            stats = summary["histograms"].get(name)
+            if stats:
+                self.log(f"{name}: p50 {stats['p50'] * 1000:.0f} ms, p95 {stats['p95'] * 1000:.0f} ms "
+                         f"({stats['count']})")
+        counters = summary["counters"]
+        self.log(f"Uploaded {counters.get('screen.bytes_uploaded', 0) / 1024:.0f} KB, "
+                 f"{counters.get('screen.tokens', 0)} tokens. Trace: {path}")
+
     def show_alert(self, reason):
         # 1. PAUSE CAMERA (Fixes audio interference)
         self.log("Pausing Camera for Audio...")
         if self.eye_tracker:
             self.eye_tracker.set_paused(True)
-
-        # 2. SHOW ALERT VISUALLY
-        alert = CTkMessagebox(title="Stop getting distracted!",
-                            message=reason,
-                            option_1="I'll apologize and lock in",
+        if self.screen_engine:
+            self.screen_engine.set_paused(True)
+
+        # 2. POPUP, SPEECH AND APOLOGY LOOP (runs on worker threads; see AlertFlow)
+        # The worker resolves the voice engine, so a still-warming one never blocks the UI
+        self.alert_flow = AlertFlow(
+            lambda: self.engines.get("voice", timeout=5),
+            ELEVENLABS_VOICE_ID,
+            schedule=lambda fn: self.after(0, fn),
+            prompt=self._show_prompt,
+            log=self.log,
+            slapper=self.slapper,
+            on_done=self._alert_finished,
+        )
+        self.alert_flow.start(reason)
+
+    def _show_prompt(self, title, message, option, on_close):
+        prompt = CTkMessagebox(title=title,
+                            message=message,
+                            option_1=option,
                             icon="warning",
                             topmost=True)
+        # Fires however the popup goes away (button, close box, or cancel)
+        prompt.bind("<Destroy>", lambda event: on_close() if event.widget is prompt else None)
+        return prompt
 
-        # 3. PLAY SOUND (Delayed slightly so popup renders first)
-        alert.after(500, lambda: self.play_sound(reason))
-
-        if self.slapper: self.slapper.slap_user()
-
-        # 4. WAIT FOR USER ACKNOWLEDGE
-        alert.get()
-
-        # 5. APOLOGY LOOP
-        while True:
-            if not self.is_running: break
-
-            # This blocks for ~5 seconds
-            did_apologize = self.voice.listen_for_apology()
-            print("Apology result:", did_apologize)
-
-            if did_apologize:
-                break
+    def _alert_finished(self, apologized):
+        print("Apology result:", apologized)
+        self.alert_flow = None
 
-            if self.slapper: self.slapper.slap_user()
-
-            retry = CTkMessagebox(title="You must apologize!",
-                    message="I didn't hear an apology. Say 'Sorry' or 'My Bad'.",
-                    option_1="Try Again",
-                    icon="warning",
-                    topmost=True)
-            retry.get()
-
-        # 6. RESUME CAMERA
+        # 3. RESUME CAMERA
         self.log("Resuming Camera...")
         if self.eye_tracker:
             self.eye_tracker.set_paused(False)
+        if self.screen_engine:
+            self.screen_engine.set_paused(False)
 
         self.alert_showing = False
         self.last_alert_time = time.time()
@@ -213,45 +550,111 @@ class FocusApp(ctk.CTk):
         CTkMessagebox(title="Good job!", message="Great focus session!", topmost=True)
 
     def run_monitoring_loop(self, goal):
+        from api.engine import AsyncScreenEngine, ScreenVerdict
+
+        session_started = time.perf_counter()
         self.log(f"Setting up for: '{goal}'...")
+
+        # Reuse the warm tracker and detector; this only waits if they're still being built
+        try:
+            self.eye_tracker = self.engines.get("tracker")
+            self.detector = self.engines.get("detector")
+        except Exception as e:
+            self.log(f"Could not start session: {e}")
+            self.after(0, self.stop_session)
+            return
+        if self.stop_thread:
+            self.stop_thread.join()  # The previous session may still be shutting the same engines down
+        while not self.signals.empty():
+            self.signals.get_nowait()  # Leftovers from the previous session
+        if not self.is_running:
+            return  # Stopped while the engines were still warming
+        self.detector.reset()
+        self.eye_tracker.set_preview_size(self.preview_size)
+        metrics.reset()
+        metrics.event("session.start", goal=goal)
+        self.eye_tracker.start()
+
         self.distraction_criteria = self.detector.analyze_goal_criteria(goal)
         self.log(f"Policy: {self.distraction_criteria}")
 
+        # Screen checks run on their own pipelined engine so a slow API call never stalls the eye check
+        self.scheduler = ScanScheduler(
+            min_interval=SCAN_MIN_INTERVAL,
+            max_interval=SCAN_MAX_INTERVAL,
+            max_requests_per_hour=MAX_REQUESTS_PER_HOUR,
+            max_tokens_per_hour=MAX_TOKENS_PER_HOUR,
+        )
+        # Tracker state decides whether a due scan is worth paying for
+        try:
+            rules = load_rules(FUSION_RULES_PATH)
+        except (OSError, ValueError) as e:
+            self.log(f"Could not load scan rules, using defaults: {e}")
+            rules = load_rules()
+        self.scan_gate = ScanGate(rules)
+        timeline = None
+        if SCREEN_TIMELINE:
+            from api.timeline import FrameTimeline
+            try:
+                timeline = FrameTimeline(layout=SCREEN_TIMELINE)
+            except ValueError as e:
+                self.log(f"Screen timeline off: {e}")
+        self.screen_engine = AsyncScreenEngine(
+            self.detector,
+            deadline=SCREEN_DEADLINE,
+            hedge_after=SCREEN_HEDGE_AFTER,
+            scheduler=self.scheduler,
+            results=self.signals,
+            gate=self.scan_gate,
+            timeline=timeline,
+        )
+        self.screen_engine.start(goal, self.distraction_criteria)
+
         end_time = time.time() + (self.duration_minutes * 60)
+        first_verdict = True
 
         while self.is_running and time.time() < end_time:
-            if time.time() - self.last_alert_time < 5:
-                time.sleep(1)
+            # Wake up on the next tracker transition or screen verdict instead of polling
+            try:
+                signal = self.signals.get(timeout=1.0)
+            except queue.Empty:
+                signal = None
+
+            if isinstance(signal, AttentionEvent):
+                # Even mid-alert, so the gate knows where the user is looking when scans resume
+                self.screen_engine.on_attention(signal)
+
+            if self.alert_showing or time.time() - self.last_alert_time < 5:
                 continue
 
-            # 1. Screen Check
-            self.log("Scanning screen...")
-            screen_result = self.detector.check_current_screen(goal, self.distraction_criteria)
-
-            if screen_result and screen_result.upper().startswith("YES"):
-                 reason = screen_result.split(":", 1)[1].strip() if ":" in screen_result else "Screen Content"
-                 self.log(f"SCREEN: {reason}")
-                 if not self.alert_showing:
-                     self.alert_showing = True
-                     # Use 'after' to run show_alert on Main Thread to prevent crashes
-                     self.after(0, lambda r=reason: self.show_alert(r))
-                     time.sleep(5) # Wait for alert to resolve
-                     continue
-
-            # 2. Eye Check
-            for _ in range(50):
-                if not self.is_running: break
-                if time.time() - self.last_alert_time < 5: break
-
-                if self.eye_tracker.is_distracted and not self.eye_tracker.paused:
-                    reason = self.eye_tracker.distraction_reason
-                    self.log(f"EYES: {reason}")
-                    if not self.alert_showing:
-                        self.alert_showing = True
-                        self.after(0, lambda r=reason: self.show_alert(r))
-                        time.sleep(5)
-                        break
-                time.sleep(0.1)
+            # 1. Screen Check (verdicts arrive asynchronously from the engine)
+            if isinstance(signal, ScreenVerdict) and first_verdict:
+                first_verdict = False
+                metrics.observe("session.first_verdict", time.perf_counter() - session_started)
+                self.log(f"First screen verdict after {time.perf_counter() - session_started:.1f}s")
+
+            if isinstance(signal, ScreenVerdict):
+                screen_result = signal.verdict
+                if screen_result and screen_result.upper().startswith("YES"):
+                    reason = screen_result.split(":", 1)[1].strip() if ":" in screen_result else "Screen Content"
+                    self.log(f"SCREEN ({signal.tier}, {signal.latency:.1f}s): {reason}")
+                    metrics.event("alert.trigger", source="screen", tier=signal.tier, reason=reason)
+                    self.alert_showing = True
+                    # Use 'after' to run show_alert on Main Thread to prevent crashes
+                    self.after(0, lambda r=reason: self.show_alert(r))
+                    continue
+                elif screen_result and screen_result.startswith("Error"):
+                    self.log(f"SCREEN: {screen_result}")
+
+            # 2. Eye Check (debounced state; still distracted after a cooldown re-alerts)
+            if self.eye_tracker.is_distracted and not self.eye_tracker.paused:
+                reason = self.eye_tracker.distraction_reason
+                self.log(f"EYES: {reason}")
+                metrics.event("alert.trigger", source="eyes", reason=reason)
+                self.alert_showing = True
+                self.after(0, lambda r=reason: self.show_alert(r))
+
+        self.screen_engine.stop()
 
         if self.is_running:
             self.log("Session complete!")
@@ -0,0 +1,105 @@
+"""
+Encode-path benchmark over a folder of recorded screenshots.
+
+For every encoder backend and size/quality setting (plus the adaptive ladder) it
+reports median encode time, mean payload size and, unless --no-verdicts is
+given, how often the model's YES/NO matches the verdict on a near-lossless
+reference encode of the same screenshot.
+
+    python -m bench.encode_benchmark --corpus recordings/screens --goal "Studying Algorithms"
+    python -m bench.encode_benchmark --corpus recordings/screens --base-url http://127.0.0.1:8765/v1/
+"""
+import argparse
+import base64
+import glob
+import os
+import statistics
+import time
+
+import cv2
+from dotenv import load_dotenv
+
+from api.capture import FULL_SIZE, fit
+from api.detection import FocusDetector, MODEL_NAME, MAX_TOKENS, BASE_URL
+from api.encoder import ENCODERS, AdaptiveEncoder, make_encoder
+
+FIXED_SETTINGS = [(768, 60), (1024, 70), (1024, 80), (1600, 75)]
+REFERENCE = ("pil-jpeg", 2048, 95)
+
+
+def load_corpus(folder):
+    paths = sorted(
+        path for pattern in ("*.png", "*.jpg", "*.jpeg", "*.webp")
+        for path in glob.glob(os.path.join(folder, pattern))
+    )
+    screens = []
+    for path in paths:
+        pixels = cv2.imread(path, cv2.IMREAD_COLOR)
+        if pixels is not None:
+            screens.append((os.path.basename(path), fit(pixels, FULL_SIZE)))
+    return screens
+
+
+def ask(detector, goal, policy, encoded):
+    payload = base64.b64encode(encoded.data).decode("utf-8")
+    messages = detector.build_messages(goal, policy, payload, encoded.mime)
+    response = detector.client.chat.completions.create(model=MODEL_NAME, messages=messages, max_tokens=MAX_TOKENS)
+    return response.choices[0].message.content.strip().upper().startswith("YES")
+
+
+def run_config(name, encoder, screens, repeat, detector, goal, policy, reference):
+    times, sizes, agree = [], [], 0
+    for filename, pixels in screens:
+        encoded = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            encoded = encoder.encode(pixels)
+            times.append(time.perf_counter() - started)
+        sizes.append(len(base64.b64encode(encoded.data)))
+
+        if detector is not None:
+            agree += ask(detector, goal, policy, encoded) == reference[filename]
+
+    accuracy = f"{100 * agree / len(screens):5.1f}%" if detector is not None else "    -"
+    print(f"{name:<28} {1000 * statistics.median(times):8.2f} ms {statistics.mean(sizes) / 1024:9.1f} KiB  {accuracy}")
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", required=True, help="Folder of recorded screenshots")
+    parser.add_argument("--goal", default="Studying Algorithms")
+    parser.add_argument("--policy", default="", help="Policy digest to put in the prompt")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--api-key", default=os.getenv("AI_STUDIO_API_KEY", "stub"))
+    parser.add_argument("--repeat", type=int, default=5, help="Encodes per screenshot for timing")
+    parser.add_argument("--no-verdicts", action="store_true", help="Only measure time and size")
+    args = parser.parse_args()
+
+    screens = load_corpus(args.corpus)
+    if not screens:
+        raise SystemExit(f"No screenshots found in {args.corpus}")
+
+    detector = None
+    reference = {}
+    if not args.no_verdicts:
+        detector = FocusDetector(args.api_key, base_url=args.base_url)
+        backend, side, quality = REFERENCE
+        ref_encoder = AdaptiveEncoder(make_encoder(backend), max_side=side, quality=quality)
+        for filename, pixels in screens:
+            reference[filename] = ask(detector, args.goal, args.policy, ref_encoder.encode(pixels))
+
+    print(f"{len(screens)} screenshots, reference = {REFERENCE}")
+    print(f"{'config':<28} {'encode':>11} {'payload':>13}  agree")
+
+    for backend in ENCODERS:
+        for side, quality in FIXED_SETTINGS:
+            encoder = AdaptiveEncoder(make_encoder(backend), max_side=side, quality=quality)
+            run_config(f"{backend} {side}px q{quality}", encoder, screens, args.repeat,
+                       detector, args.goal, args.policy, reference)
+        run_config(f"{backend} adaptive", AdaptiveEncoder(make_encoder(backend)), screens, args.repeat,
+                   detector, args.goal, args.policy, reference)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Pseudo-terminal stand-in for the desk device running firmware.ino (POSIX only).
+
+    python -m bench.fake_slapper --slap-time 2.75
+    python -m bench.fake_slapper --legacy          # old firmware: no READY/ACK lines
+
+Prints the pty path; point SERIAL_PORT (or Slapper) at it.
+"""
+import argparse
+import os
+import pty
+import select
+import threading
+import time
+import tty
+
+
+class FakeSlapper:
+    """
+    Emulates the firmware on a pty: prints READY after `boot_time`, answers
+    F with ACK F, stays busy for `slap_time`, then prints READY again.
+    `legacy` mimics the original firmware (silent, ignores input while busy).
+    """
+    def __init__(self, slap_time=2.75, boot_time=0.2, legacy=False):
+        self.slap_time = slap_time
+        self.boot_time = boot_time
+        self.legacy = legacy
+
+        self.slaps = []  # monotonic time of each slap
+        self.received = []
+        self.lock = threading.Lock()
+
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.path = os.ttyname(self.slave)
+        self.is_running = False
+        self.thread = None
+
+    def start(self):
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.is_running = False
+        if self.thread:
+            self.thread.join(timeout=1)
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _write(self, line):
+        if not self.legacy:
+            os.write(self.master, line.encode("ascii") + b"\r\n")
+
+    def _run(self):
+        time.sleep(self.boot_time)
+        self._write("READY")
+
+        buffer = b""
+        while self.is_running:
+            readable, _, _ = select.select([self.master], [], [], 0.05)
+            if not readable:
+                continue
+            try:
+                buffer += os.read(self.master, 1024)
+            except OSError:
+                return
+
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                command = line.strip().decode("ascii", "replace")
+                with self.lock:
+                    self.received.append(command)
+                if command == "F":
+                    self._write("ACK F")
+                    with self.lock:
+                        self.slaps.append(time.monotonic())
+                    time.sleep(self.slap_time)
+                    # Whatever arrived while busy is discarded, like the firmware does
+                    while select.select([self.master], [], [], 0)[0]:
+                        os.read(self.master, 1024)
+                    buffer = b""
+                    self._write("READY")
+                elif command == "PING":
+                    self._write("READY")
+                elif command:
+                    self._write(f"ERR {command}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slap-time", type=float, default=2.75)
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+
+    device = FakeSlapper(slap_time=args.slap_time, legacy=args.legacy).start()
+    print(f"Fake device on {device.path} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+            with device.lock:
+                if device.received:
+                    print(f"received {device.received}, {len(device.slaps)} slaps")
+                    device.received.clear()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        device.stop()
+
+
+if __name__ == "__main__":
+    main()
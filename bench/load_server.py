@@ -0,0 +1,202 @@
+"""
+Load test for the headless focus server (api.server): many simulated thin
+clients upload screenshots and tracker state, and we measure verdict
+throughput, latency percentiles, model requests and per-session fairness.
+
+    python -m bench.load_server                                   # stub model + server in-process
+    python -m bench.load_server --sessions 200 --pack 8 --rate 6 --model-latency 1.5
+    python -m bench.load_server --url http://127.0.0.1:8780       # an already running server
+
+Each session sends a frame every `interval` seconds and waits for its verdict.
+A `shared` fraction of frames is one of a few common screens (same docs page,
+same video) so cross-session deduplication and the verdict cache get exercised;
+the rest are unique and always need the model.
+"""
+import argparse
+import io
+import json
+import random
+import statistics
+import threading
+import time
+
+import httpx
+import numpy as np
+from PIL import Image
+
+from api.detection import FocusDetector, NullWindowProvider, TieredClassifier
+from api.server import FocusServer
+from api.verdict_cache import VerdictCache
+from bench.stub_model import StubModelServer
+
+POLICY = {"banned": {"domains": ["youtube.com"]}, "allowed": {"apps": ["code"]}}
+SHARED_SCREENS = 6
+SCREEN_SIZE = (480, 300)
+
+
+def _screen(rng):
+    """Random blocky 'screenshot' as JPEG bytes; distinct seeds give distinct fingerprints."""
+    blocks = rng.integers(0, 255, (SCREEN_SIZE[1] // 20, SCREEN_SIZE[0] // 20, 3), dtype=np.uint8)
+    pixels = np.kron(blocks, np.ones((20, 20, 1), dtype=np.uint8))
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG", quality=70)
+    return buffer.getvalue()
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SimulatedClient(threading.Thread):
+    def __init__(self, url, index, args, shared, stop):
+        super().__init__(daemon=True)
+        self.url = url
+        self.args = args
+        self.shared = shared
+        self.stop_event = stop
+        self.rng = np.random.default_rng(1000 + index)
+        self.random = random.Random(index)
+        self.results = []  # (latency, tier)
+        self.failures = 0
+
+    def run(self):
+        with httpx.Client(base_url=self.url, timeout=120) as client:
+            try:
+                reply = client.post("/sessions", json={"goal": "Studying Algorithms", "policy": POLICY})
+                reply.raise_for_status()
+                session = reply.json()
+            except (httpx.HTTPError, ValueError):
+                self.failures += 1
+                return
+            path = f"/sessions/{session['session']}"
+            # Stagger the start so sessions don't all fire on the same tick
+            time.sleep(self.random.uniform(0, self.args.interval))
+            away = False
+
+            while not self.stop_event.is_set():
+                started = time.perf_counter()
+
+                if self.random.random() < self.args.away:
+                    away = not away
+                    client.post(f"{path}/attention", json={
+                        "distracted": away, "reason": "Away from Desk" if away else ""})
+
+                if self.random.random() < self.args.shared:
+                    image = self.shared[self.random.randrange(len(self.shared))]
+                else:
+                    image = _screen(self.rng)
+                try:
+                    reply = client.post(f"{path}/frames", params={"wait": "1"}, content=image,
+                                        headers={"Content-Type": "image/jpeg"})
+                    reply.raise_for_status()
+                    result = reply.json()
+                    self.results.append((time.perf_counter() - started, result["tier"]))
+                except (httpx.HTTPError, ValueError):
+                    self.failures += 1
+
+                self.stop_event.wait(max(0.0, self.args.interval - (time.perf_counter() - started)))
+
+            client.delete(path)
+
+
+def run(url, args):
+    shared = [_screen(np.random.default_rng(seed)) for seed in range(SHARED_SCREENS)]
+    stop = threading.Event()
+    clients = [SimulatedClient(url, index, args, shared, stop) for index in range(args.sessions)]
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    time.sleep(args.duration)
+    stop.set()
+    for client in clients:
+        client.join(timeout=args.interval + 30)
+    elapsed = time.perf_counter() - started
+
+    results = [result for client in clients for result in client.results]
+    judged = [latency for latency, tier in results if tier not in ("superseded", "closed")
+              and not tier.startswith("skip")]
+    model = [latency for latency, tier in results if tier == "model"]
+    tiers = {}
+    for _, tier in results:
+        tiers[tier] = tiers.get(tier, 0) + 1
+
+    # Jain's index over each session's mean model latency (1.0 = every session served alike)
+    means = [statistics.mean(lat for lat, tier in client.results if tier == "model")
+             for client in clients if any(tier == "model" for _, tier in client.results)]
+    fairness = sum(means) ** 2 / (len(means) * sum(m * m for m in means)) if means else 0.0
+
+    stats = httpx.get(f"{url}/stats", timeout=10).json()
+    return {
+        "sessions": args.sessions,
+        "frames": len(results),
+        "failures": sum(client.failures for client in clients),
+        "verdicts_per_s": len(judged) / elapsed,
+        "latency_p50": _percentile(judged, 0.5),
+        "latency_p95": _percentile(judged, 0.95),
+        "latency_p99": _percentile(judged, 0.99),
+        "model_p50": _percentile(model, 0.5),
+        "model_p99": _percentile(model, 0.99),
+        "model_requests": stats["model_requests"],
+        "frames_per_request": stats["frames_per_request"],
+        "dedupe": stats["frames"].get("dedupe", 0),
+        "fairness": fairness,
+        "tiers": tiers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="server to test; default starts a stub model and server in-process")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--interval", type=float, default=3.0, help="seconds between frames per session")
+    parser.add_argument("--shared", type=float, default=0.5, help="fraction of frames that are common screens")
+    parser.add_argument("--away", type=float, default=0.05, help="chance per frame of toggling 'away from desk'")
+    parser.add_argument("--model-latency", type=float, default=1.0)
+    parser.add_argument("--per-image", type=float, default=0.1)
+    parser.add_argument("--model-errors", type=float, default=0.0)
+    parser.add_argument("--rate", type=float, default=4.0)
+    parser.add_argument("--in-flight", type=int, default=8)
+    parser.add_argument("--pack", type=int, default=4)
+    parser.add_argument("--batch-wait", type=float, default=0.05)
+    parser.add_argument("--json", help="also write the results here")
+    args = parser.parse_args()
+
+    model = server = None
+    url = args.url
+    if url is None:
+        model = StubModelServer(latency=args.model_latency, per_image=args.per_image,
+                                error_rate=args.model_errors).start()
+        detector = FocusDetector(
+            "stub",
+            base_url=model.base_url,
+            verdict_cache=VerdictCache(max_entries=4096),
+            classifier=TieredClassifier(window_provider=NullWindowProvider(), use_ocr=False),
+        )
+        server = FocusServer(detector, rate=args.rate, max_in_flight=args.in_flight, pack_size=args.pack,
+                             batch_wait=args.batch_wait).start()
+        url = server.url
+
+    try:
+        results = run(url, args)
+    finally:
+        if server:
+            server.stop()
+        if model:
+            model.stop()
+
+    print()
+    for key, value in results.items():
+        if isinstance(value, float):
+            value = f"{value:.3f}"
+        print(f"  {key:<20} {value}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+End-to-end replay benchmark: drives FocusDetector, EyeTracker and VoiceAudio
+headlessly from recorded fixtures against local stub servers, so hot-path
+changes can be measured on a plain Linux box (no webcam, screen, microphone
+or API accounts).
+
+A fixture is a folder with a manifest.json:
+
+    {
+      "goal": "Studying Algorithms",
+      "policy": {"banned": {"domains": ["youtube.com"]}, "allowed": {...}},
+      "scan_interval": 3,
+      "screens": [
+        {"image": "editor.png", "title": "heap.py - VS Code", "process": "code",
+         "expected": "NO", "scans": 4},
+        {"image": "video.png", "title": "Lofi beats - YouTube", "process": "firefox",
+         "expected": "YES: Watching music videos", "scans": 2}
+      ],
+      "webcam": "webcam.mp4",
+      "apologies": [{"wav": "sorry.wav", "transcript": "sorry", "expected": true}],
+      "templates": "templates"
+    }
+
+Each screen is shown for `scans` consecutive checks; the stub model answers
+with that screen's `expected` verdict, so accuracy measures what the local
+stages (tiers, change gate, verdict cache) get wrong, not the model.
+
+    python -m bench.replay_session --synthetic
+    python -m bench.replay_session recordings/session1 --model-latency 1.2 --model-errors 0.05
+    python -m bench.replay_session --synthetic --trace replay.json   # per-stage Chrome trace
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import wave
+
+import cv2
+import numpy as np
+
+from api.audio import VoiceAudio
+from api.audio_cache import AudioCache
+from api.capture import MonitorFrame, ScreenCapture
+from api.detection import FocusDetector, StubWindowProvider, TieredClassifier
+from api.listener import WavFileSource
+from api.metrics import metrics
+from api.policy import DistractionPolicy
+from api.verdict_cache import VerdictCache
+from bench.replay_tracker import replay as replay_tracker
+from bench.stub_model import StubModelServer
+from bench.stub_voice import StubVoiceServer
+
+
+class ReplayCapture(ScreenCapture):
+    """ScreenCapture whose grab() returns a loaded screenshot instead of the desktop."""
+    def __init__(self):
+        super().__init__()
+        self.pixels = None
+
+    def show(self, path):
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"could not read {path}")
+        self.pixels = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+
+    def grab(self):
+        height, width = self.pixels.shape[:2]
+        return self._diff([MonitorFrame(1, (0, 0, width, height), self.pixels)])
+
+
+def _is_yes(verdict):
+    return bool(verdict) and verdict.strip().upper().startswith("YES")
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# --- SCREEN ---
+def bench_screens(fixture, manifest, model):
+    window = StubWindowProvider()
+    detector = FocusDetector(
+        "stub",
+        base_url=model.base_url,
+        verdict_cache=VerdictCache(),
+        classifier=TieredClassifier(window_provider=window, use_ocr=False),
+    )
+    detector.capture = ReplayCapture()
+
+    goal = manifest["goal"]
+    policy = DistractionPolicy.from_dict(goal, manifest.get("policy", {}))
+
+    latencies, cpu, correct, errors, total = [], [], 0, 0, 0
+    for screen in manifest["screens"]:
+        detector.capture.show(os.path.join(fixture, screen["image"]))
+        window.set(screen.get("title", ""), screen.get("process", ""))
+        model.verdict = screen["expected"]
+
+        for _ in range(screen.get("scans", 1)):
+            started, cpu_started = time.perf_counter(), time.thread_time()
+            verdict = detector.check_current_screen(goal, policy)
+            latencies.append(time.perf_counter() - started)
+            cpu.append(time.thread_time() - cpu_started)
+
+            total += 1
+            if verdict is None or verdict.startswith("Error"):
+                errors += 1  # Never counts as correct, whatever was expected
+            else:
+                correct += _is_yes(verdict) == _is_yes(screen["expected"])
+
+    scan_interval = manifest.get("scan_interval", 3)
+    hours = total * scan_interval / 3600
+    return {
+        "scans": total,
+        "accuracy": correct / total if total else 0.0,
+        "errors": errors,
+        "latency_p50": _percentile(latencies, 0.5),
+        "latency_p95": _percentile(latencies, 0.95),
+        "cpu_per_scan": statistics.mean(cpu) if cpu else 0.0,
+        "model_requests": model.requests,
+        "requests_per_hour": model.requests / hours if hours else 0.0,
+        "bytes_uploaded": detector.bytes_uploaded,
+        "tiers": dict(detector.tier_counts),
+    }
+
+
+# --- WEBCAM ---
+def bench_webcam(fixture, manifest, low_power):
+    transitions, stats, frames, dropped = replay_tracker(os.path.join(fixture, manifest["webcam"]), low_power)
+    return {
+        "frames": frames,
+        "skipped": dropped,
+        "transitions": len(transitions),
+        "fps": stats["fps"],
+        "cpu": stats["cpu"],
+        **{f"{stage}_ms": stats[stage] * 1000 for stage in ("capture", "inference", "pose", "draw")},
+    }
+
+
+# --- VOICE ---
+def bench_voice(fixture, manifest, voice_stub):
+    local = None
+    if manifest.get("templates"):
+        from api.keyword_spotter import KeywordSpotter
+        local = KeywordSpotter(os.path.join(fixture, manifest["templates"]))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        voice = VoiceAudio("stub", audio_cache=AudioCache(cache_dir), local_recognizer=local,
+                           base_url=voice_stub.base_url)
+
+        started = time.perf_counter()
+        voice.synthesize("bench", "Stop getting distracted! Apologize and get back to work!")
+        tts_cold = time.perf_counter() - started
+        started = time.perf_counter()
+        voice.synthesize("bench", "Stop getting distracted! Apologize and get back to work!")
+        tts_warm = time.perf_counter() - started
+
+        latencies, cpu, correct = [], [], 0
+        for clip in manifest.get("apologies", []):
+            voice_stub.transcript = clip.get("transcript", "sorry" if clip["expected"] else "")
+            voice.audio_source = WavFileSource(os.path.join(fixture, clip["wav"]))
+            voice.listener = None
+
+            started, cpu_started = time.perf_counter(), time.thread_time()
+            result = voice.listen_for_apology()
+            latencies.append(time.perf_counter() - started)
+            cpu.append(time.thread_time() - cpu_started)
+            correct += bool(result is not None and result.apology) == clip["expected"]
+
+    clips = len(manifest.get("apologies", []))
+    return {
+        "tts_cold_ms": tts_cold * 1000,
+        "tts_warm_ms": tts_warm * 1000,
+        "clips": clips,
+        "accuracy": correct / clips if clips else 0.0,
+        "apology_p50": _percentile(latencies, 0.5),
+        "apology_max": max(latencies, default=0.0),
+        "cpu_per_clip": statistics.mean(cpu) if cpu else 0.0,
+        "stt_requests": voice_stub.stt_requests,
+    }
+
+
+# --- SYNTHETIC FIXTURE ---
+def _screen(kind, seed):
+    rng = np.random.default_rng(seed)
+    image = np.full((900, 1600, 3), 30 if kind == "editor" else 245, dtype=np.uint8)
+    if kind == "editor":
+        for row in range(40, 880, 22):
+            width = int(rng.integers(200, 1200))
+            cv2.putText(image, "x" * (width // 12), (40 + int(rng.integers(0, 80)), row),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 220, 200), 1)
+    else:
+        cv2.rectangle(image, (200, 100), (1400, 760), (int(rng.integers(0, 255)), 40, 40), -1)
+        cv2.putText(image, "Lofi beats", (220, 820), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (20, 20, 20), 2)
+    return image
+
+
+def _wav(path, segments, rate=16000):
+    rng = np.random.default_rng(len(path))
+    samples = np.concatenate([rng.normal(0, amp, int(sec * rate)) for sec, amp in segments]).astype(np.int16)
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(samples.tobytes())
+
+
+def make_synthetic_fixture(folder):
+    """Writes a small generated fixture (no faces, so the tracker reports Away) into `folder`."""
+    cv2.imwrite(os.path.join(folder, "editor.png"), _screen("editor", 1))
+    cv2.imwrite(os.path.join(folder, "editor2.png"), _screen("editor", 2))
+    cv2.imwrite(os.path.join(folder, "video.png"), _screen("video", 3))
+
+    writer = cv2.VideoWriter(os.path.join(folder, "webcam.avi"), cv2.VideoWriter_fourcc(*"MJPG"), 30, (640, 480))
+    for i in range(90):
+        writer.write(np.full((480, 640, 3), 60 + i % 40, dtype=np.uint8))
+    writer.release()
+
+    _wav(os.path.join(folder, "sorry.wav"), [(0.4, 40), (0.6, 3000), (1.5, 40)])
+    _wav(os.path.join(folder, "silence.wav"), [(5.0, 40)])
+    _wav(os.path.join(folder, "mumble.wav"), [(0.3, 40), (0.8, 2500), (1.2, 40)])
+
+    manifest = {
+        "goal": "Studying Algorithms",
+        "policy": {"banned": {"domains": ["youtube.com"], "keywords": ["lofi"]},
+                   "allowed": {"apps": ["code"]}},
+        "scan_interval": 3,
+        "screens": [
+            {"image": "editor.png", "title": "heap.py - Visual Studio Code", "process": "code",
+             "expected": "NO", "scans": 4},
+            {"image": "editor2.png", "title": "Notes - Obsidian", "process": "obsidian",
+             "expected": "NO", "scans": 3},
+            {"image": "video.png", "title": "Lofi beats to study to", "process": "firefox",
+             "expected": "YES: Watching music videos", "scans": 3},
+            {"image": "editor.png", "title": "Untitled", "process": "gedit",
+             "expected": "NO", "scans": 2},
+        ],
+        "webcam": "webcam.avi",
+        "apologies": [
+            {"wav": "sorry.wav", "transcript": "sorry", "expected": True},
+            {"wav": "silence.wav", "expected": False},
+            {"wav": "mumble.wav", "transcript": "what was that", "expected": False},
+        ],
+    }
+    with open(os.path.join(folder, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _print_section(name, results):
+    print(f"\n[{name}]")
+    for key, value in results.items():
+        if isinstance(value, float):
+            value = f"{value:.3f}"
+        print(f"  {key:<18} {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixture", nargs="?")
+    parser.add_argument("--synthetic", action="store_true", help="generate a throwaway fixture and run on it")
+    parser.add_argument("--model-latency", type=float, default=0.8)
+    parser.add_argument("--model-errors", type=float, default=0.0)
+    parser.add_argument("--voice-latency", type=float, default=0.4)
+    parser.add_argument("--voice-errors", type=float, default=0.0)
+    parser.add_argument("--low-power", action="store_true")
+    parser.add_argument("--skip", action="append", default=[], choices=["screens", "webcam", "voice"])
+    parser.add_argument("--json", help="also write the results here")
+    parser.add_argument("--trace", help="write a Chrome trace of every instrumented stage here")
+    args = parser.parse_args()
+
+    if not args.fixture and not args.synthetic:
+        parser.error("give a fixture folder or --synthetic")
+
+    with tempfile.TemporaryDirectory() as scratch:
+        fixture = args.fixture or scratch
+        if args.synthetic:
+            make_synthetic_fixture(fixture)
+        with open(os.path.join(fixture, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        model = StubModelServer(latency=args.model_latency, error_rate=args.model_errors).start()
+        voice_stub = StubVoiceServer(latency=args.voice_latency, error_rate=args.voice_errors).start()
+        results = {}
+        metrics.enable(bool(args.trace))
+        try:
+            if "screens" not in args.skip and manifest.get("screens"):
+                results["screens"] = bench_screens(fixture, manifest, model)
+            if "webcam" not in args.skip and manifest.get("webcam"):
+                results["webcam"] = bench_webcam(fixture, manifest, args.low_power)
+            if "voice" not in args.skip and manifest.get("apologies"):
+                results["voice"] = bench_voice(fixture, manifest, voice_stub)
+        finally:
+            model.stop()
+            voice_stub.stop()
+
+    for name, section in results.items():
+        _print_section(name, section)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.trace:
+        print(f"Trace: {metrics.export(args.trace)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Runs EyeTracker on a recorded webcam video instead of the live camera and
+prints every distraction state change plus the tracker's stage timings.
+
+    python -m bench.replay_tracker recordings/webcam/glance_left.mp4
+    python -m bench.replay_tracker recordings/webcam/session.mp4 --low-power
+"""
+import argparse
+import time
+
+from api.webcam import EyeTracker
+
+
+def replay(path, low_power=False, poll=0.02):
+    """Plays `path` through a fresh tracker and returns (transitions, stats, frames, dropped)."""
+    tracker = EyeTracker(low_power=low_power, source=path)
+    tracker.set_preview_visible(False)
+    tracker.start()
+
+    transitions = []
+    state = None
+    started = time.perf_counter()
+    while tracker.is_running:
+        current = (tracker.is_distracted, tracker.distraction_reason)
+        if current != state:
+            transitions.append((time.perf_counter() - started, *current))
+            state = current
+        time.sleep(poll)
+
+    tracker.stop()
+    return transitions, tracker.get_stats(), tracker.ring.seq, tracker.ring.dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video")
+    parser.add_argument("--low-power", action="store_true")
+    args = parser.parse_args()
+
+    transitions, stats, frames, dropped = replay(args.video, args.low_power)
+
+    for at, distracted, reason in transitions:
+        print(f"{at:7.2f}s  {'DISTRACTED' if distracted else 'focused':<10} {reason}")
+
+    print(f"\n{frames} frames captured, {dropped} skipped by inference")
+    print(f"fps {stats['fps']:.1f}  cpu {stats['cpu'] * 100:.0f}%  " + "  ".join(
+        f"{stage} {stats[stage] * 1000:.1f} ms" for stage in ("capture", "inference", "pose", "draw")
+    ))
+
+
+if __name__ == "__main__":
+    main()
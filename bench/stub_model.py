@@ -0,0 +1,143 @@
+"""
+Local stand-in for the OpenAI-compatible chat completions endpoint.
+
+    python -m bench.stub_model --port 8765 --latency 1.5 --verdict "YES: Watching music videos"
+
+Then point FocusDetector at it with base_url="http://127.0.0.1:8765/v1/".
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def count_images(body):
+    """Screenshots attached to a chat request (more than one means a packed request)."""
+    return sum(
+        1
+        for message in body.get("messages", [])
+        if isinstance(message.get("content"), list)
+        for part in message["content"]
+        if part.get("type") == "image_url"
+    )
+
+
+class StubModelServer:
+    """
+    Serves /v1/chat/completions with a configurable verdict, latency and error rate.
+    `verdict` can be a string or a callable taking the parsed request body; packed
+    requests (several screenshots) get a JSON list with the string verdict repeated,
+    or whatever list the callable returns. `per_image` adds latency per screenshot.
+    """
+    def __init__(self, port=0, latency=0.0, jitter=0.0, error_rate=0.0, verdict="NO", per_image=0.0):
+        self.latency = latency
+        self.per_image = per_image
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.verdict = verdict
+
+        self.requests = 0
+        self.images = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.lock = threading.Lock()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _reply(self, body):
+        verdict = self.verdict(body) if callable(self.verdict) else self.verdict
+        images = count_images(body)
+        if images > 1 and isinstance(verdict, str):
+            verdict = [verdict] * images
+        if isinstance(verdict, list):
+            verdict = json.dumps(verdict)
+        return {
+            "id": "stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": verdict},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length)
+                body = json.loads(raw or b"{}")
+                images = count_images(body)
+
+                with stub.lock:
+                    stub.requests += 1
+                    stub.images += images
+                    stub.bytes_received += length
+                    fail = random.random() < stub.error_rate
+                    if fail:
+                        stub.errors += 1
+
+                latency = stub.latency + stub.per_image * max(0, images - 1)
+                time.sleep(max(0.0, latency + random.uniform(-stub.jitter, stub.jitter)))
+
+                if not self.path.endswith("/chat/completions") or fail:
+                    self._send(500 if fail else 404, {"error": {"message": "stub error"}})
+                    return
+
+                self._send(200, stub._reply(body))
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client gave up (deadline or a hedged twin won the race)
+                    pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible chat endpoint")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--verdict", default="NO")
+    parser.add_argument("--per-image", type=float, default=0.0, help="extra latency per packed screenshot")
+    args = parser.parse_args()
+
+    stub = StubModelServer(args.port, args.latency, args.jitter, args.error_rate, args.verdict, args.per_image)
+    print(f"Stub model listening on {stub.base_url}")
+    stub.server.serve_forever()
@@ -0,0 +1,117 @@
+"""
+Local stand-in for the ElevenLabs text-to-speech and speech-to-text endpoints.
+
+    python -m bench.stub_voice --port 8766 --latency 0.4 --transcript "sorry about that"
+
+Then build VoiceAudio with base_url="http://127.0.0.1:8766".
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# MPEG-1 layer III frame header; enough for anything that only sniffs the format
+MP3_HEADER = b"\xff\xfb\x90\x64"
+
+
+class StubVoiceServer:
+    """
+    Serves POST /v1/text-to-speech/<voice> (a fake MP3 of `clip_bytes`) and
+    POST /v1/speech-to-text (returns `transcript`). `transcript` can be a
+    string or a callable taking the raw multipart body.
+    """
+    def __init__(self, port=0, latency=0.0, jitter=0.0, error_rate=0.0, transcript="sorry",
+                 clip_bytes=40_000):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.transcript = transcript
+        self.clip_bytes = clip_bytes
+
+        self.tts_requests = 0
+        self.stt_requests = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.lock = threading.Lock()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length)
+                path = self.path.split("?", 1)[0]
+                is_tts = path.startswith("/v1/text-to-speech/")
+                is_stt = path == "/v1/speech-to-text"
+
+                with stub.lock:
+                    stub.tts_requests += is_tts
+                    stub.stt_requests += is_stt
+                    stub.bytes_received += length
+                    fail = random.random() < stub.error_rate
+                    if fail:
+                        stub.errors += 1
+
+                time.sleep(max(0.0, stub.latency + random.uniform(-stub.jitter, stub.jitter)))
+
+                if fail or not (is_tts or is_stt):
+                    self._send(500 if fail else 404, "application/json",
+                               json.dumps({"detail": "stub error"}).encode("utf-8"))
+                elif is_tts:
+                    clip = MP3_HEADER + bytes(max(0, stub.clip_bytes - len(MP3_HEADER)))
+                    self._send(200, "audio/mpeg", clip)
+                else:
+                    text = stub.transcript(raw) if callable(stub.transcript) else stub.transcript
+                    body = {"language_code": "eng", "language_probability": 1.0, "text": text, "words": []}
+                    self._send(200, "application/json", json.dumps(body).encode("utf-8"))
+
+            def _send(self, status, content_type, data):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub ElevenLabs TTS/STT endpoints")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--transcript", default="sorry")
+    args = parser.parse_args()
+
+    stub = StubVoiceServer(args.port, args.latency, args.jitter, args.error_rate, args.transcript)
+    print(f"Stub voice listening on {stub.base_url}")
+    stub.server.serve_forever()
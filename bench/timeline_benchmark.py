@@ -0,0 +1,223 @@
+"""
+Single-frame scanning vs. timeline requests (api/timeline.py) on a simulated
+session: how many short distractions each catches, how late, and what it
+costs in model requests, uploaded bytes and image tokens.
+
+    python -m bench.timeline_benchmark
+    python -m bench.timeline_benchmark --duration 3600 --intervals 5 10 30 --seed 3
+
+The session is a virtual clock (no sleeping): work screens that change every
+15-45 s, with distractions of 3-15 s dropped in between. Every visit is a new
+screen, so the verdict cache only helps within a visit. The stub model answers
+each screenshot from its colour (red = distraction), so a miss is always the
+sampling's fault, never the model's. Image tokens are estimated with Gemini's
+billing (258 tokens per started 768 px tile); the stub itself reports none.
+"""
+import argparse
+import base64
+import json
+import math
+import re
+
+import cv2
+import numpy as np
+
+from api.capture import MonitorFrame, ScreenCapture
+from api.detection import MODEL_NAME, FocusDetector, NullWindowProvider, TieredClassifier
+from api.timeline import FRAMES, SAMPLE_INTERVAL, SHEET, FrameTimeline
+from api.verdict_cache import VerdictCache
+from bench.stub_model import StubModelServer
+
+GOAL = "Studying Algorithms"
+CRITERIA = "Entertainment (videos, games, social feeds) is a distraction; docs and code are not."
+SCREEN_SIZE = (1280, 640)
+TOKENS_PER_TILE = 258
+TILE = 768
+
+
+def _screen(rng, distraction):
+    """Random blocky screen, red-dominant for distractions and blue-dominant for work."""
+    blocks = rng.integers(0, 120, (SCREEN_SIZE[1] // 40, SCREEN_SIZE[0] // 40, 3), dtype=np.uint8)
+    blocks[..., 2 if distraction else 0] += 120  # BGR
+    pixels = np.kron(blocks, np.ones((40, 40, 1), dtype=np.uint8))
+    return cv2.cvtColor(pixels, cv2.COLOR_BGR2BGRA)
+
+
+def make_session(duration, seed):
+    """[(start, end, distraction)] covering `duration` seconds."""
+    rng = np.random.default_rng(seed)
+    segments = []
+    t = 0.0
+    while t < duration:
+        if segments and not segments[-1][2] and rng.random() < 0.35:
+            length, distraction = float(rng.integers(3, 16)), True
+        else:
+            length, distraction = float(rng.integers(15, 46)), False
+        segments.append((t, min(duration, t + length), distraction))
+        t += length
+    return segments
+
+
+class SessionCapture(ScreenCapture):
+    """ScreenCapture showing whatever the simulated session has on screen."""
+    def __init__(self):
+        super().__init__()
+        self.pixels = None
+
+    def grab(self):
+        height, width = self.pixels.shape[:2]
+        return self._diff([MonitorFrame(1, (0, 0, width, height), self.pixels)])
+
+
+class ColourOracle:
+    """Stub model verdicts: judges each screenshot (or contact sheet cell) by its colour."""
+    def __init__(self):
+        self.image_tokens = 0
+
+    def __call__(self, body):
+        content = body["messages"][0]["content"]
+        prompt = content[0]["text"]
+        images = [self._decode(part) for part in content if part["type"] == "image_url"]
+        for image in images:
+            height, width = image.shape[:2]
+            self.image_tokens += TOKENS_PER_TILE * math.ceil(width / TILE) * math.ceil(height / TILE)
+
+        sheet = re.search(r"These are (\d+) screenshots.*?one image of (\d+) columns", prompt)
+        if sheet:
+            return [self._judge(cell) for cell in self._cells(images[0], int(sheet[1]), int(sheet[2]))]
+        verdicts = [self._judge(image) for image in images]
+        return verdicts if len(verdicts) > 1 or "JSON list" in prompt else verdicts[0]
+
+    @staticmethod
+    def _decode(part):
+        data = base64.b64decode(part["image_url"]["url"].split(",", 1)[1])
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    @staticmethod
+    def _cells(sheet, count, columns):
+        rows = -(-count // columns)
+        cell_w = sheet.shape[1] / columns
+        cell_h = sheet.shape[0] / rows
+        for index in range(count):
+            row, col = divmod(index, columns)
+            x, y = int(col * cell_w), int(row * cell_h)
+            # Middle of the tile, clear of the label strip
+            yield sheet[y + int(cell_h * 0.3):y + int(cell_h * 0.7), x + int(cell_w * 0.3):x + int(cell_w * 0.7)]
+
+    @staticmethod
+    def _judge(pixels):
+        blue, _, red = pixels.reshape(-1, 3).mean(axis=0)
+        return "YES: Watching videos" if red > blue else "NO"
+
+
+def _detector(model):
+    detector = FocusDetector(
+        "stub",
+        base_url=model.base_url,
+        verdict_cache=VerdictCache(max_entries=4096),
+        classifier=TieredClassifier(window_provider=NullWindowProvider(), use_ocr=False),
+    )
+    detector.capture = SessionCapture()
+    return detector
+
+
+def _ask(detector, request):
+    detector.record_upload(request.size)
+    response = detector.client.chat.completions.create(
+        model=MODEL_NAME, messages=request.messages, max_tokens=request.max_tokens)
+    return response.choices[0].message.content
+
+
+def run(mode, interval, segments, args):
+    """Replays the session once with one scanning mode; returns misses, detection delay and cost."""
+    oracle = ColourOracle()
+    model = StubModelServer(verdict=oracle).start()
+    detector = _detector(model)
+    timeline = None if mode == "single" else FrameTimeline(layout=mode, max_frames=args.max_frames)
+    rng = np.random.default_rng(args.seed + 1)
+    screens = [_screen(rng, distraction) for _, _, distraction in segments]
+
+    detected = {}  # distraction segment index -> virtual time it was first reported
+
+    def segment_at(t):
+        return next(i for i, (start, end, _) in enumerate(segments) if start <= t < end)
+
+    def note(index, t):
+        if segments[index][2]:
+            detected.setdefault(index, t)
+
+    step = SAMPLE_INTERVAL if timeline is not None else interval
+    next_scan = 0.0
+    t = 0.0
+    try:
+        while t < segments[-1][1]:
+            current = segment_at(t)
+            detector.capture.pixels = screens[current]
+            if t >= next_scan:
+                if timeline is None:
+                    request = detector.prepare_check(GOAL, CRITERIA)
+                    if request.verdict is None:
+                        detector.complete_check(request, _ask(detector, request))
+                    if request.verdict.upper().startswith("YES"):
+                        note(current, t)
+                else:
+                    request = detector.prepare_timeline(GOAL, CRITERIA, timeline, now=t)
+                    if request.verdict is None:
+                        detector.complete_timeline(request, _ask(detector, request))
+                    for sample in request.samples:
+                        if sample.verdict and sample.verdict.upper().startswith("YES"):
+                            # A kept frame stands for the whole stretch it was on screen
+                            for index in {segment_at(sample.at), segment_at(min(sample.until, t))}:
+                                note(index, t)
+                next_scan = t + interval
+            elif timeline is not None:
+                detector.sample_screen(timeline, CRITERIA, at=t)
+            t += step
+    finally:
+        model.stop()
+
+    distractions = [i for i, segment in enumerate(segments) if segment[2]]
+    delays = [detected[i] - segments[i][0] for i in distractions if i in detected]
+    return {
+        "mode": mode,
+        "interval": interval,
+        "distractions": len(distractions),
+        "missed": len(distractions) - len(delays),
+        "miss_rate": 1 - len(delays) / len(distractions) if distractions else 0.0,
+        "mean_delay": float(np.mean(delays)) if delays else 0.0,
+        "requests": model.requests,
+        "images": model.images,
+        "mb_uploaded": detector.bytes_uploaded / 1e6,
+        "image_tokens": oracle.image_tokens,
+        "frames_merged": timeline.merged if timeline is not None else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=900.0, help="virtual session length (seconds)")
+    parser.add_argument("--intervals", type=float, nargs="+", default=[5.0, 10.0, 30.0],
+                        help="seconds between model requests")
+    parser.add_argument("--modes", nargs="+", default=["single", FRAMES, SHEET])
+    parser.add_argument("--max-frames", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the results here")
+    args = parser.parse_args()
+
+    segments = make_session(args.duration, args.seed)
+    results = [run(mode, interval, segments, args) for interval in args.intervals for mode in args.modes]
+
+    columns = ["mode", "interval", "missed", "miss_rate", "mean_delay", "requests", "images", "mb_uploaded",
+               "image_tokens", "frames_merged"]
+    print(f"\n{len(segments)} segments, {results[0]['distractions']} distractions over {args.duration:.0f}s\n")
+    print("  ".join(f"{column:>12}" for column in columns))
+    for result in results:
+        cells = [f"{result[c]:.3f}" if isinstance(result[c], float) else str(result[c]) for c in columns]
+        print("  ".join(f"{cell:>12}" for cell in cells))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
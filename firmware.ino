@@ -12,7 +12,6 @@ const int buzzer = 9;
 
 // ---------- Counter ----------
 int distracted_counter = 0;
-bool busy = false;
 
 // ---------- Display counter ----------
 void showCounter() {
@@ -40,6 +39,37 @@ void setup() {
   myServo.write(200);
 
   showCounter();             // show initial 0
+
+  Serial.println("READY");   // host may send the first command now
+}
+
+void slap() {
+  // ---- Servo ----
+  myServo.write(0);
+  delay(500);
+  myServo.write(180);
+
+
+  // ---- Increment counter ----
+  distracted_counter++;
+  showCounter();
+
+  // ---- Flash LCD 3 times ----
+  for (int i = 0; i < 3; i++) {
+    lcd.clear();
+    lcd.setCursor(0, 0);
+    lcd.print("GET BACK");
+    lcd.setCursor(0, 1);
+    lcd.print("TO WORK!");
+    tone(buzzer, 2000); // Send 1KHz sound signal...
+    delay(750);
+    noTone(buzzer);     // Stop sound...
+
+    showCounter();       // redraw after clear
+  }
+
+  lcd.clear();
+  showCounter();
 }
 
 void loop() {
@@ -50,36 +80,17 @@ void loop() {
     String cmd = Serial.readStringUntil('\n');
     cmd.trim();
 
-    if (cmd == "F" && !busy) {
-      busy = true;
-
-      // ---- Servo ----
-      myServo.write(0);
-      delay(500);
-      myServo.write(180);
-
-
-      // ---- Increment counter ----
-      distracted_counter++;
-      showCounter();
-
-      // ---- Flash LCD 3 times ----
-      for (int i = 0; i < 3; i++) {
-        lcd.clear();
-        lcd.setCursor(0, 0);
-        lcd.print("GET BACK");
-        lcd.setCursor(0, 1);
-        lcd.print("TO WORK!");
-        tone(buzzer, 2000); // Send 1KHz sound signal...
-        delay(750);
-        noTone(buzzer);     // Stop sound...
-
-        showCounter();       // redraw after clear
-      }
-
-      lcd.clear();
-      showCounter();
-      busy = false;
+    if (cmd == "F") {
+      Serial.println("ACK F");
+      slap();
+      // Anything the host sent meanwhile was coalesced on its side; start clean
+      while (Serial.available()) Serial.read();
+      Serial.println("READY");
+    } else if (cmd == "PING") {
+      Serial.println("READY");
+    } else if (cmd.length() > 0) {
+      Serial.print("ERR ");
+      Serial.println(cmd);
     }
   }
 }
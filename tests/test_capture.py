@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from api.capture import TILE_SIZE, MonitorFrame, ScreenCapture
+
+
+def _screen(width, height):
+    pixels = np.zeros((height, width, 4), dtype=np.uint8)
+    pixels[..., 3] = 255
+    return pixels
+
+
+def _changed(capture, pixels):
+    return capture._diff([MonitorFrame(1, (0, 0, pixels.shape[1], pixels.shape[0]), pixels)])
+
+
+@pytest.mark.parametrize("width, height", [(1920, 1080), (1366, 768), (1000, 700)])
+def test_signature_has_one_block_per_tile(width, height):
+    monitor = MonitorFrame(1, (0, 0, width, height), _screen(width, height))
+    assert monitor.cols == -(-width // TILE_SIZE)
+    assert monitor.rows == -(-height // TILE_SIZE)
+    assert monitor.signature.shape == (monitor.rows * 4, monitor.cols * 4)
+
+
+@pytest.mark.parametrize("width, height, box", [
+    (1920, 1080, (300, 965, 420, 1015)),    # in the short bottom row of tiles (1024-1080)
+    (1920, 1080, (1000, 500, 1100, 560)),   # inside whole tiles
+    (1366, 768, (1290, 100, 1360, 200)),    # in the narrow right column (1280-1366)
+    (1366, 768, (1300, 700, 1366, 768)),    # in the bottom right corner
+])
+def test_dirty_regions_cover_the_changed_pixels(width, height, box):
+    capture = ScreenCapture()
+    before = _screen(width, height)
+    capture.commit(_changed(capture, before))
+
+    after = before.copy()
+    x0, y0, x1, y1 = box
+    after[y0:y1, x0:x1, :3] = 255
+    frame = _changed(capture, after)
+
+    regions = frame.dirty_regions()
+    assert regions
+    for _, (rx0, ry0, rx1, ry1) in regions:
+        # Every reported region overlaps the change, and together they contain all of it
+        assert rx0 < x1 and x0 < rx1 and ry0 < y1 and y0 < ry1
+    assert min(r[1][0] for r in regions) <= x0 and max(r[1][2] for r in regions) >= x1
+    assert min(r[1][1] for r in regions) <= y0 and max(r[1][3] for r in regions) >= y1
+
+
+def test_unchanged_screen_has_no_dirty_tiles():
+    capture = ScreenCapture()
+    pixels = _screen(1920, 1080)
+    capture.commit(_changed(capture, pixels))
+    frame = _changed(capture, pixels.copy())
+    assert frame.dirty == {}
+    assert frame.mosaic() is None
@@ -0,0 +1,105 @@
+import pytest
+
+from api.detection import (
+    FocusDetector,
+    ForegroundWindow,
+    NullWindowProvider,
+    ScreenChangeGate,
+    StubWindowProvider,
+    TieredClassifier,
+)
+from api.policy import DistractionPolicy
+
+POLICY = DistractionPolicy.from_dict("Studying Algorithms", {
+    "allowed": {"apps": ["code"], "domains": ["leetcode.com"], "keywords": ["algorithms"]},
+    "banned": {"apps": ["steam", "spotify"], "domains": ["youtube.com"], "keywords": ["memes"]},
+})
+
+
+def _classifier(title="", process=""):
+    return TieredClassifier(window_provider=StubWindowProvider(title, process), use_ocr=False)
+
+
+@pytest.mark.parametrize("title, process, expected", [
+    ("heap.py - Visual Studio Code", "code", "NO"),
+    ("Store", "steam", "YES"),
+    ("Liked Songs", "spotify", "YES"),
+    ("Terminal", "bash", None),            # on neither list: left for the model
+    ("code - Spotify", "spotify", None),   # both sides match: ambiguous
+])
+def test_tier0_decides_on_the_foreground_app(title, process, expected):
+    classifier = _classifier(title, process)
+    verdict = classifier.tier0(POLICY, classifier.foreground())
+    if expected is None:
+        assert verdict is None
+    else:
+        assert verdict.startswith(expected)
+
+
+def test_tier0_never_decides_for_a_browser():
+    classifier = _classifier("Lofi beats - YouTube", "firefox")
+    assert classifier.tier0(POLICY, classifier.foreground()) is None
+
+
+def test_tier0_without_a_window():
+    classifier = TieredClassifier(window_provider=NullWindowProvider(), use_ocr=False)
+    assert classifier.foreground() is None
+    assert classifier.tier0(POLICY, classifier.foreground()) is None
+
+
+@pytest.mark.parametrize("title, expected", [
+    ("Lofi beats - YouTube - Mozilla Firefox", "YES"),   # 'youtube.com' matches the bare name
+    ("Two Sum - LeetCode - Mozilla Firefox", "NO"),
+    ("Algorithms memes - Reddit", None),                  # allowed and banned: ambiguous
+    ("New Tab - Mozilla Firefox", None),
+    ("", None),
+])
+def test_tier1_reads_the_title(title, expected):
+    classifier = _classifier(title, "firefox")
+    verdict = classifier.tier1(POLICY, classifier.foreground())
+    if expected is None:
+        assert verdict is None
+    else:
+        assert verdict.startswith(expected)
+
+
+def test_stub_provider_follows_set():
+    provider = StubWindowProvider("a", "code")
+    provider.set("b", "steam")
+    window = provider.get_foreground()
+    assert isinstance(window, ForegroundWindow)
+    assert (window.title, window.process) == ("b", "steam")
+
+
+def test_prepare_check_stops_at_tier0_without_grabbing_the_screen():
+    detector = FocusDetector("unused", classifier=_classifier("Store", "steam"))
+
+    def no_grab():
+        raise AssertionError("tier 0 should decide before the screen is grabbed")
+
+    detector._grab_screen = no_grab
+    request = detector.prepare_check(POLICY.goal, POLICY)
+    assert request.tier == "tier0"
+    assert request.verdict.startswith("YES")
+    assert request.messages is None
+    assert detector.tier_counts["tier0"] == 1
+
+
+def test_change_gate_reuses_the_verdict_for_a_near_identical_screen():
+    gate = ScreenChangeGate(threshold=2)
+    assert gate.lookup(0b1010, "ctx") is None  # nothing stored yet
+    gate.store(0b1010, "ctx", "NO")
+
+    assert gate.lookup(0b1010, "ctx") == "NO"
+    assert gate.lookup(0b1001, "ctx") == "NO"   # 2 bits off
+    assert gate.lookup(0b0101, "ctx") is None   # 4 bits off
+    assert gate.lookup(0b1010, "other") is None  # same screen, different policy
+    assert (gate.hits, gate.misses) == (2, 3)
+
+
+def test_change_gate_reset_forgets_the_last_screen():
+    gate = ScreenChangeGate()
+    gate.store(42, "ctx", "YES: Watching videos")
+    gate.reset()
+    assert gate.lookup(42, "ctx") is None
+    assert gate.misses == 1
@@ -0,0 +1,170 @@
+import time
+
+import pytest
+
+from api.detection import ScreenRequest
+from api.engine import AsyncScreenEngine
+from api.scheduler import ScanScheduler
+from bench.stub_model import StubModelServer
+
+
+class FakeDetector:
+    """What AsyncScreenEngine needs from FocusDetector: every scan is a new screen for the model."""
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.api_key = "stub"
+        self.prepared = 0
+        self.completed = []
+        self.bytes_uploaded = 0
+
+    def prepare_check(self, goal, criteria):
+        self.prepared += 1
+        messages = [{"role": "user", "content": [{"type": "text", "text": f"screen {self.prepared}"}]}]
+        return ScreenRequest(fingerprint=self.prepared, messages=messages, size=1000)
+
+    def record_upload(self, size):
+        self.bytes_uploaded += size
+
+    def complete_check(self, request, verdict, tokens=0):
+        self.completed.append(request.fingerprint)
+        request.verdict, request.tier = verdict, "model"
+        return verdict
+
+
+@pytest.fixture
+def model():
+    server = StubModelServer().start()
+    yield server
+    server.stop()
+
+
+def _engine(model, **kwargs):
+    kwargs.setdefault("scheduler", ScanScheduler(min_interval=60, max_interval=60))
+    return AsyncScreenEngine(FakeDetector(model.base_url), **kwargs)
+
+
+def _first_verdict(engine, timeout=5.0):
+    engine.start("goal", "criteria")
+    try:
+        return engine.wait(timeout)
+    finally:
+        engine.stop()
+
+
+def test_hedged_duplicates_count_against_the_budget(model):
+    model.latency = 0.4
+    engine = _engine(model, hedge_after=0.1, deadline=5.0)
+
+    verdict = _first_verdict(engine)
+
+    assert verdict.verdict == "NO"
+    assert engine.hedges == 1 and engine.sent == 2
+    # The losing twin was sent too, so both requests are on the books
+    assert engine.scheduler.usage()[0] == 2
+    assert engine.detector.bytes_uploaded == 2000
+
+
+def test_failed_and_timed_out_requests_count_against_the_budget(model):
+    model.error_rate = 1.0
+    engine = _engine(model)
+    verdict = _first_verdict(engine)
+    assert verdict.verdict.startswith("Error")
+    assert engine.scheduler.usage()[0] == 1
+
+    model.error_rate, model.latency = 0.0, 1.0
+    engine = _engine(model, deadline=0.2)
+    verdict = _first_verdict(engine)
+    assert verdict.verdict == "Error: screen check timed out"
+    assert engine.scheduler.usage()[0] == 1
+
+
+def test_unanswered_requests_leave_the_latency_average_alone():
+    scheduler = ScanScheduler()
+    scheduler.record_request(100, 0.5)
+    scheduler.record_request(None)
+
+    assert scheduler.usage() == (2, 200)  # charged at the average token cost
+    assert scheduler.avg_latency == 0.5
+    assert scheduler.avg_tokens == 100
+
+
+def test_requests_refused_by_the_budget_upload_nothing(model):
+    scheduler = ScanScheduler(min_interval=0.05, max_interval=0.05, max_requests_per_hour=1)
+    scheduler.record_request(0, 0.01)  # the hour's only request is already spent
+    engine = _engine(model, scheduler=scheduler)
+    engine.start("goal", "criteria")
+    time.sleep(0.3)
+    engine.stop()
+
+    assert engine.detector.prepared >= 2
+    assert engine.sent == 0 and model.requests == 0
+    assert engine.detector.bytes_uploaded == 0
+
+
+def test_no_hedge_when_the_first_request_is_fast(model):
+    engine = _engine(model, hedge_after=0.5, deadline=5.0)
+    assert _first_verdict(engine).verdict == "NO"
+    assert engine.hedges == 0 and engine.sent == 1
+
+
+def test_deadline_bounds_a_slow_request(model):
+    model.latency = 2.0
+    engine = _engine(model, deadline=0.3)
+    started = time.perf_counter()
+    verdict = _first_verdict(engine)
+    assert verdict.verdict == "Error: screen check timed out"
+    assert time.perf_counter() - started < 1.5
+    assert engine.timeouts == 1
+
+
+class LocalThenModel(FakeDetector):
+    """The first scan goes to the model; every later one is settled locally (e.g. by the change gate)."""
+    def prepare_check(self, goal, criteria):
+        request = super().prepare_check(goal, criteria)
+        if self.prepared > 1:
+            request.verdict, request.tier = "NO", "gate"
+        return request
+
+
+def test_a_model_reply_older_than_a_published_verdict_is_dropped(model):
+    model.latency, model.verdict = 0.5, "YES: Watching videos"
+    engine = AsyncScreenEngine(LocalThenModel(model.base_url),
+                               scheduler=ScanScheduler(min_interval=0.1, max_interval=0.1), deadline=5.0)
+    engine.start("goal", "criteria")
+    first = engine.wait(2.0)
+    time.sleep(0.8)  # the model answers scan 1 after scan 2 was already decided locally
+    engine.stop()
+
+    assert (first.seq, first.tier) == (2, "gate")
+    published = [first]
+    while (verdict := engine.poll()) is not None:
+        published.append(verdict)
+    assert all(v.tier == "gate" for v in published)
+    assert model.requests == 1
+    assert engine.stale_dropped >= 1
+
+
+def test_only_the_newest_waiting_frame_is_sent(model):
+    model.latency = 0.6
+    engine = _engine(model, scheduler=ScanScheduler(min_interval=0.1, max_interval=0.1), deadline=5.0)
+    engine.start("goal", "criteria")
+    time.sleep(0.5)  # several scans while the first request is in flight
+    engine.stop()
+
+    assert engine.detector.prepared >= 3
+    assert model.requests == 1
+    assert engine.stale_dropped >= 1
+
+
+def test_stop_is_prompt_with_a_request_in_flight(model):
+    model.latency = 5.0
+    engine = _engine(model, deadline=10.0)
+    engine.start("goal", "criteria")
+    time.sleep(0.3)
+
+    started = time.perf_counter()
+    engine.stop()
+    assert time.perf_counter() - started < 1.0
+    assert not engine.is_running
+    assert not engine.thread.is_alive()
+    assert engine.poll() is None
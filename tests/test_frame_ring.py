@@ -0,0 +1,89 @@
+import threading
+
+import numpy as np
+
+import api.webcam as webcam
+from api.webcam import FrameRing
+
+SHAPE = (480, 640, 3)
+
+
+def _write(ring, value):
+    slot, buffer = ring.next_buffer(SHAPE)
+    buffer.fill(value)
+    ring.publish(slot)
+    return ring.seq
+
+
+def test_reads_only_newer_frames():
+    ring = FrameRing()
+    out = np.empty(SHAPE, dtype=np.uint8)
+    assert ring.read_latest(out, 0) is None  # nothing written yet
+
+    seq = _write(ring, 7)
+    assert ring.read_latest(out, 0) == seq
+    assert (out == 7).all()
+    assert ring.read_latest(out, seq) is None
+
+
+def test_counts_frames_the_reader_never_saw():
+    ring = FrameRing()
+    out = np.empty(SHAPE, dtype=np.uint8)
+    first = _write(ring, 1)
+    assert ring.read_latest(out, 0) == first
+    for value in (2, 3, 4):
+        last = _write(ring, value)
+    assert ring.read_latest(out, first) == last
+    assert (out == 4).all()
+    assert ring.dropped == 2
+
+
+def test_retries_when_the_writer_laps_it_mid_copy(monkeypatch):
+    ring = FrameRing(slots=3)
+    out = np.empty(SHAPE, dtype=np.uint8)
+    _write(ring, 1)
+
+    real_copyto = np.copyto
+    calls = []
+
+    def lapping_copyto(dst, src):
+        calls.append(1)
+        if len(calls) == 1:
+            # Writer wraps all the way round and rewrites the slot being copied
+            for value in (2, 3, 4):
+                _write(ring, value)
+        real_copyto(dst, src)
+
+    monkeypatch.setattr(webcam.np, "copyto", lapping_copyto)
+    seq = ring.read_latest(out, 0)
+    assert len(calls) == 2
+    assert seq == ring.seq
+    assert (out == 4).all()
+
+
+def test_concurrent_reads_are_never_torn():
+    ring = FrameRing()
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            # Every pixel of frame n holds n % 251, so a torn copy mixes two values
+            _write(ring, (ring.seq + 1) % 251)
+
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    out = np.empty(SHAPE, dtype=np.uint8)
+    last = 0
+    reads = 0
+    try:
+        while reads < 300:
+            seq = ring.read_latest(out, last)
+            if seq is None:
+                continue
+            assert seq > last
+            assert out.min() == out.max() == seq % 251
+            last = seq
+            reads += 1
+    finally:
+        stop.set()
+        thread.join(timeout=2)
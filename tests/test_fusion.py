@@ -0,0 +1,146 @@
+import json
+
+import pytest
+
+import api.fusion as fusion
+from api.attention import AWAY_FROM_DESK, AttentionEvent, AttentionMonitor
+from api.fusion import DEFER, NOW, SCAN, SKIP, FusionRule, ScanGate, load_rules
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(fusion.time, "monotonic", clock)
+    return clock
+
+
+def _event(distracted, reason=""):
+    return AttentionEvent(distracted, reason, 0.0)
+
+
+def test_default_rules(clock):
+    gate = ScanGate()
+    assert gate.decide() == (SCAN, "default")
+
+    assert not gate.observe_attention(_event(True, "Stop looking left!"))
+    assert gate.decide() == (DEFER, "looking_away")
+
+    assert not gate.observe_attention(_event(True, AWAY_FROM_DESK))
+    assert gate.decide() == (SKIP, "away")
+
+    assert gate.observe_attention(_event(False))
+    assert gate.decide() == (NOW, "returned")
+    # Pulled forward once; after that scan the normal cadence applies again
+    gate.note_scan()
+    assert gate.decide() == (SCAN, "default")
+
+
+def test_returned_within_expires(clock):
+    gate = ScanGate()
+    gate.observe_attention(_event(True, AWAY_FROM_DESK))
+    gate.observe_attention(_event(False))
+    clock.now += 3.5
+    assert gate.decide() == (SCAN, "default")
+
+
+def test_repeated_state_is_not_a_return(clock):
+    gate = ScanGate()
+    assert not gate.observe_attention(_event(False))
+    gate.observe_attention(_event(True, "Stop looking up!"))
+    assert not gate.observe_attention(_event(True, "Stop looking down!"))
+
+
+def test_custom_rules_with_durations_and_verdicts(clock):
+    rules = [FusionRule.from_dict(rule) for rule in [
+        {"name": "long_away", "when": {"attention": "looking_away", "for_at_least": 10}, "action": SKIP},
+        {"name": "stable_ok", "when": {"verdict": "focused", "screen_stable_for": 30}, "action": DEFER},
+    ]]
+    gate = ScanGate(rules)
+
+    gate.observe_attention(_event(True, "Stop looking left!"))
+    assert gate.decide() == (SCAN, "default")
+    clock.now += 11
+    assert gate.decide() == (SKIP, "long_away")
+
+    gate.observe_attention(_event(False))
+    gate.observe_verdict("NO", changed=True)
+    clock.now += 20
+    assert gate.decide() == (SCAN, "default")
+    clock.now += 15
+    assert gate.decide() == (DEFER, "stable_ok")
+    gate.observe_verdict("YES: memes")
+    assert gate.decide() == (SCAN, "default")
+
+
+@pytest.mark.parametrize("rule", [
+    {"name": "bad", "action": "explode"},
+    {"name": "bad", "when": {"mood": "happy"}, "action": SKIP},
+    {"name": "bad", "when": {"attention": "asleep"}, "action": SKIP},
+    {"name": "bad", "when": {"verdict": "maybe"}, "action": SKIP},
+])
+def test_invalid_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        FusionRule.from_dict(rule)
+
+
+def test_load_rules_from_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([{"name": "never", "when": {}, "action": SKIP}]))
+    rules = load_rules(str(path))
+    assert [(rule.name, rule.action) for rule in rules] == [("never", SKIP)]
+    assert [rule.name for rule in load_rules()] == ["away", "looking_away", "returned"]
+
+
+def _feed(monitor, gate, frames, step=0.1, start=0.0):
+    t = start
+    for frame in frames:
+        event = monitor.face_lost(now=t) if frame is None else monitor.update(*frame, now=t)
+        if event is not None:
+            gate.observe_attention(event)
+        t += step
+    return t
+
+
+def test_gate_follows_monitor_from_looking_away_to_gone_and_back(clock):
+    monitor = AttentionMonitor()
+    gate = ScanGate()
+    t = _feed(monitor, gate, [(0, 60)] * 20)
+    assert gate.decide() == (DEFER, "looking_away")
+
+    # Face lost while still distracted: a reason change the gate must hear about
+    t = _feed(monitor, gate, [None] * 30, start=t)
+    assert monitor.reason == AWAY_FROM_DESK
+    assert gate.decide() == (SKIP, "away")
+
+    # Unpausing after an alert resets the monitor; the gate must learn they're focused
+    monitor.reset(now=t)
+    gate.observe_attention(monitor.events.queue[-1])
+    assert not monitor.events.queue[-1].distracted
+    assert gate.decide() == (NOW, "returned")
+
+
+def test_brief_face_loss_while_looking_away_does_not_flip_to_away():
+    monitor = AttentionMonitor()
+    t = 0.0
+    for _ in range(20):
+        monitor.update(0, 60, now=t)
+        t += 0.1
+    events = monitor.events.qsize()
+    monitor.face_lost(now=t)
+    monitor.update(0, 60, now=t + 0.1)
+    assert monitor.events.qsize() == events
+    assert monitor.reason != AWAY_FROM_DESK
+
+
+def test_reset_when_focused_publishes_nothing():
+    monitor = AttentionMonitor()
+    monitor.reset()
+    assert monitor.events.empty()
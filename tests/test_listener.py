@@ -0,0 +1,93 @@
+import threading
+import wave
+
+import numpy as np
+
+from api.audio import Recognition
+from api.listener import CHUNK, MAX_SEGMENT, PRE_ROLL, RATE, TRAILING_SILENCE, ApologyListener, WavFileSource
+
+
+def _tone(seconds, amplitude=8000, rate=RATE):
+    t = np.arange(int(seconds * rate)) / rate
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+
+def _silence(seconds, rate=RATE):
+    return np.zeros(int(seconds * rate), dtype=np.int16)
+
+
+def _source(tmp_path, *parts):
+    path = str(tmp_path / "clip.wav")
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes(np.concatenate(parts).tobytes())
+    return WavFileSource(path, realtime=False)
+
+
+class Transcriber:
+    """Records every segment it is handed; answers with `apology` for each."""
+    def __init__(self, apology=False):
+        self.apology = apology
+        self.segments = []
+        self.lock = threading.Lock()
+
+    def __call__(self, pcm, rate):
+        with self.lock:
+            self.segments.append(len(pcm) // 2)
+        return Recognition(self.apology, 0.9 if self.apology else 0.1, "test")
+
+
+def test_one_utterance_is_one_segment(tmp_path):
+    transcribe = Transcriber()
+    listener = ApologyListener(_source(tmp_path, _silence(1.0), _tone(0.6), _silence(1.5)), transcribe)
+    result = listener.listen(max_duration=10)
+    listener.close()
+
+    assert len(transcribe.segments) == 1
+    # Pre-roll + the speech + the trailing silence that ended it, to within a chunk or two
+    expected = (PRE_ROLL + 0.6 + TRAILING_SILENCE) * RATE
+    assert abs(transcribe.segments[0] - expected) <= 2 * CHUNK
+    assert result is not None and not result.apology
+    assert {"speech", "first_segment", "speech_end", "decided"} <= set(listener.timings)
+
+
+def test_long_speech_is_cut_into_pieces(tmp_path):
+    transcribe = Transcriber()
+    listener = ApologyListener(_source(tmp_path, _silence(0.5), _tone(6.0), _silence(1.0)), transcribe)
+    listener.listen(max_duration=10)
+    listener.close()
+
+    assert len(transcribe.segments) == 3
+    assert all(length <= MAX_SEGMENT * RATE + CHUNK for length in transcribe.segments)
+
+
+def test_returns_on_the_first_apology(tmp_path):
+    transcribe = Transcriber(apology=True)
+    listener = ApologyListener(_source(tmp_path, _silence(0.5), _tone(0.8), _silence(1.0)), transcribe)
+    result = listener.listen(max_duration=10)
+    listener.close()
+
+    assert result.apology
+    assert "apology" in listener.timings
+
+
+def test_silence_gives_nothing(tmp_path):
+    transcribe = Transcriber()
+    listener = ApologyListener(_source(tmp_path, _silence(2.0)), transcribe)
+    assert listener.listen(max_duration=10) is None
+    listener.close()
+    assert transcribe.segments == []
+    assert listener.noise_floor == 0.0
+
+
+def test_quiet_noise_is_not_speech(tmp_path):
+    rng = np.random.default_rng(0)
+    noise = rng.normal(0, 100, int(2.0 * RATE)).astype(np.int16)  # RMS ~100, under SPEECH_RMS
+    transcribe = Transcriber()
+    listener = ApologyListener(_source(tmp_path, noise), transcribe)
+    assert listener.listen(max_duration=10) is None
+    listener.close()
+    assert transcribe.segments == []
+    assert 50 < listener.noise_floor < 200
@@ -0,0 +1,118 @@
+import os
+import time
+
+import pytest
+
+from api.slapper import SLAP, Slapper
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def devices():
+    """Starts FakeSlapper devices on ptys; stops whatever is still running afterwards."""
+    fake_slapper = pytest.importorskip("bench.fake_slapper", reason="the fake device needs a POSIX pty")
+    started = []
+
+    def start(**kwargs):
+        device = fake_slapper.FakeSlapper(**kwargs).start()
+        started.append(device)
+        return device
+
+    yield start
+    for device in started:
+        if device.is_running:
+            device.stop()
+
+
+@pytest.fixture
+def slappers():
+    opened = []
+
+    def open_slapper(port, **kwargs):
+        slapper = Slapper(port, 9600, **kwargs)
+        opened.append(slapper)
+        return slapper
+
+    yield open_slapper
+    for slapper in opened:
+        slapper.close()
+
+
+def test_a_waiting_command_is_not_queued_twice(tmp_path, slappers):
+    # No device behind the port: everything stays queued
+    slapper = slappers(str(tmp_path / "missing"), max_pending=2)
+
+    assert slapper.slap_user() is True
+    assert [slapper.slap_user() for _ in range(4)] == [False] * 4
+    assert slapper.send("PING") is True
+    assert slapper.send("X") is False  # queue full
+
+    stats = slapper.get_stats()
+    assert (stats["pending"], stats["coalesced"], stats["dropped"], stats["sent"]) == (2, 4, 1, 0)
+    assert not stats["connected"]
+
+
+def test_ready_ack_paces_commands(devices, slappers):
+    device = devices(slap_time=0.4, boot_time=0.1)
+    # Boot and command timeouts far longer than the device needs: only READY can free it up
+    slapper = slappers(device.path, boot_time=10.0, command_duration=10.0)
+
+    slapper.slap_user()
+    assert _wait_for(lambda: len(device.slaps) == 1)
+    assert slapper.ack is True
+    # Quick repeats while the device is busy collapse into one more slap
+    for _ in range(5):
+        slapper.slap_user()
+    assert _wait_for(lambda: len(device.slaps) == 2)
+    time.sleep(0.6)
+
+    assert len(device.slaps) == 2
+    assert 0.4 <= device.slaps[1] - device.slaps[0] < 2.0
+    assert slapper.coalesced == 4
+    assert device.received == [SLAP, SLAP]  # nothing was lost to the busy device
+
+
+def test_legacy_firmware_is_paced_by_command_duration(devices, slappers):
+    device = devices(slap_time=0.2, boot_time=0.0, legacy=True)
+    slapper = slappers(device.path, boot_time=0.2, command_duration=0.8)
+
+    slapper.slap_user()
+    assert _wait_for(lambda: len(device.slaps) == 1)
+    slapper.slap_user()
+    assert _wait_for(lambda: len(device.slaps) == 2)
+
+    assert slapper.ack == "auto"  # never saw READY
+    assert device.slaps[1] - device.slaps[0] >= 0.8
+
+
+def test_pending_commands_survive_an_unplug(tmp_path, monkeypatch, devices, slappers):
+    monkeypatch.setattr("api.slapper.RECONNECT_MIN", 0.05)
+    monkeypatch.setattr("api.slapper.RECONNECT_MAX", 0.2)
+    # Slapper opens a stable path, like a /dev/serial/by-id link, that follows the device across replugs
+    link = tmp_path / "ttyDESK"
+    first = devices(slap_time=0.1, boot_time=0.05)
+    os.symlink(first.path, link)
+    slapper = slappers(str(link), boot_time=0.2, command_duration=0.2)
+
+    slapper.slap_user()
+    assert _wait_for(lambda: len(first.slaps) == 1)
+
+    first.stop()  # unplugged
+    os.remove(link)
+    slapper.slap_user()
+    assert _wait_for(lambda: slapper.reconnects >= 1)
+    assert slapper.get_stats()["pending"] == 1
+
+    second = devices(slap_time=0.1, boot_time=0.05)
+    os.symlink(second.path, link)
+    assert _wait_for(lambda: len(second.slaps) == 1)
+    assert slapper.connected
+    assert slapper.sent == 2
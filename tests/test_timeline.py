@@ -0,0 +1,159 @@
+import numpy as np
+import pytest
+
+from api.capture import CaptureFrame, MonitorFrame, ScreenCapture
+from api.detection import FocusDetector, NullWindowProvider, TieredClassifier
+from api.timeline import SHEET_CELL, SHEET_LABEL, FrameTimeline, contact_sheet
+
+SIZE = (640, 320)
+
+
+def _frame(seed):
+    """Blocky random screen; different seeds give far-apart fingerprints."""
+    blocks = np.random.default_rng(seed).integers(0, 255, (SIZE[1] // 20, SIZE[0] // 20, 4), dtype=np.uint8)
+    pixels = np.kron(blocks, np.ones((20, 20, 1), dtype=np.uint8))
+    return CaptureFrame([MonitorFrame(1, (0, 0, SIZE[0], SIZE[1]), pixels)])
+
+
+def _add(timeline, seed, at):
+    frame = _frame(seed)
+    return timeline.add(frame, frame.fingerprint(), at=at)
+
+
+def test_unchanged_screen_extends_the_last_frame():
+    timeline = FrameTimeline()
+    assert _add(timeline, 1, 0.0)
+    assert not _add(timeline, 1, 1.0)
+    assert not _add(timeline, 1, 2.0)
+    assert _add(timeline, 2, 3.0)
+
+    first, second = timeline.samples
+    assert (first.at, first.until, first.duration) == (0.0, 2.0, 2.0)
+    assert second.at == 3.0
+    assert timeline.sampled == 4
+    assert timeline.bytes == len(first.data) + len(second.data)
+
+
+def test_full_timeline_folds_the_least_novel_frame():
+    timeline = FrameTimeline(max_frames=3, change_threshold=0)
+    _add(timeline, 1, 0.0)
+    _add(timeline, 2, 1.0)
+    # A small change to screen 2: kept (threshold 0), but the closest pair in the buffer
+    near = _frame(2)
+    near.monitors[0].pixels[:20, :60] ^= 0xFF
+    assert timeline.add(near, near.fingerprint(), at=2.0)
+    _add(timeline, 3, 3.0)
+
+    assert len(timeline) == 3
+    assert timeline.merged == 1
+    assert [sample.at for sample in timeline.samples] == [0.0, 1.0, 3.0]
+    assert timeline.samples[1].until == 2.0  # screen 2 now covers the folded frame's time
+
+
+@pytest.mark.parametrize("max_frames", [2, 3, 6])
+def test_never_exceeds_max_frames(max_frames):
+    timeline = FrameTimeline(max_frames=max_frames)
+    for seed in range(10):
+        _add(timeline, seed, float(seed))
+    assert len(timeline) == max_frames
+    assert timeline.samples[-1].at == 9.0
+    assert [sample.at for sample in timeline.samples] == sorted(sample.at for sample in timeline.samples)
+
+
+def test_rejects_a_timeline_too_small_to_merge():
+    with pytest.raises(ValueError):
+        FrameTimeline(max_frames=1)
+    with pytest.raises(ValueError):
+        FrameTimeline(layout="gif")
+
+
+def test_restore_puts_unanswered_frames_back_in_order():
+    timeline = FrameTimeline(max_frames=4)
+    _add(timeline, 1, 0.0)
+    _add(timeline, 2, 1.0)
+    drained = timeline.drain()
+    drained[0].verdict = "NO"
+    # Same screen is still up after the drain, then a new one
+    _add(timeline, 2, 2.0)
+    _add(timeline, 3, 3.0)
+
+    timeline.restore(drained)
+    assert [sample.at for sample in timeline.samples] == [0.0, 1.0, 3.0]
+    assert timeline.samples[1].until == 2.0
+    assert all(sample.verdict is None for sample in timeline.samples)
+
+
+def test_reset_keeps_lifetime_totals():
+    timeline = FrameTimeline(max_frames=2)
+    for seed in range(4):
+        _add(timeline, seed, float(seed))
+    timeline.reset()
+    assert len(timeline) == 0
+    assert (timeline.sampled, timeline.merged) == (4, 2)
+
+
+def test_contact_sheet_layout():
+    timeline = FrameTimeline()
+    for seed in range(5):
+        _add(timeline, seed, float(seed))
+    sheet = contact_sheet(timeline.samples, now=5.0, columns=3)
+    width, height = SHEET_CELL
+    assert sheet.shape == (2 * (height + SHEET_LABEL), 3 * width, 3)
+
+
+class StillCapture(ScreenCapture):
+    def __init__(self, frame):
+        super().__init__()
+        self.frame = frame
+
+    def grab(self):
+        return self.frame
+
+
+def _detector(frame):
+    detector = FocusDetector("unused", classifier=TieredClassifier(window_provider=NullWindowProvider(), use_ocr=False))
+    detector.capture = StillCapture(frame)
+    return detector
+
+
+def test_timeline_request_spreads_verdicts_over_frames():
+    timeline = FrameTimeline()
+    detector = _detector(_frame(3))
+    _add(timeline, 1, 0.0)
+    _add(timeline, 2, 1.0)
+
+    request = detector.prepare_timeline("goal", "no games", timeline, now=2.0)
+    assert len(request.samples) == 3
+    content = request.messages[0]["content"]
+    assert sum(part["type"] == "image_url" for part in content) == 3
+
+    verdict = detector.complete_timeline(request, '["NO", "YES: game", "NO"]')
+    assert verdict == "YES: game"
+    assert [sample.verdict for sample in request.samples] == ["NO", "YES: game", "NO"]
+    assert len(timeline) == 0
+
+    # The same screens again are settled from the verdict cache
+    _add(timeline, 2, 3.0)
+    request = detector.prepare_timeline("goal", "no games", timeline, now=4.0)
+    assert request.verdict == "YES: game"
+    assert request.messages is None
+
+
+def test_unparseable_reply_only_judges_the_newest_frame():
+    timeline = FrameTimeline()
+    detector = _detector(_frame(3))
+    _add(timeline, 1, 0.0)
+    request = detector.prepare_timeline("goal", "no games", timeline, now=1.0)
+    assert detector.complete_timeline(request, "NO") == "NO"
+    assert [sample.verdict for sample in request.samples] == [None, "NO"]
+
+
+def test_sheet_layout_sends_one_image():
+    timeline = FrameTimeline(layout="sheet")
+    detector = _detector(_frame(3))
+    _add(timeline, 1, 0.0)
+    _add(timeline, 2, 1.0)
+    request = detector.prepare_timeline("goal", "no games", timeline, now=2.0)
+    content = request.messages[0]["content"]
+    assert sum(part["type"] == "image_url" for part in content) == 1
+    assert "3 screenshots" in content[0]["text"]
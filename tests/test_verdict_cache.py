@@ -0,0 +1,82 @@
+import json
+import time
+
+from api.verdict_cache import ENTRY_OVERHEAD, VerdictCache, policy_key
+
+POLICY = policy_key("Studying Algorithms", "videos are distractions")
+
+
+def test_near_duplicate_fingerprints_hit():
+    cache = VerdictCache(threshold=3)
+    cache.put(0b1111_0000, POLICY, "NO")
+
+    assert cache.get(0b1111_0000, POLICY) == "NO"
+    assert cache.get(0b1111_0111, POLICY) == "NO"    # 3 bits off
+    assert cache.get(0b1111_1111, POLICY) is None    # 4 bits off
+    assert cache.get(0b1111_0000, "other") is None   # same screen under another policy
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_nearest_fingerprint_wins():
+    cache = VerdictCache(threshold=4)
+    cache.put(0b0000, POLICY, "NO")
+    cache.put(0b1110, POLICY, "YES: Watching videos")
+    assert cache.get(0b1100, POLICY) == "YES: Watching videos"
+
+
+def test_entries_expire_after_the_ttl():
+    cache = VerdictCache(ttl=60)
+    cache.put(1, POLICY, "NO", stored_at=time.time() - 61)
+    cache.put(2, POLICY, "NO", stored_at=time.time() - 59)
+
+    assert cache.get(1, POLICY) is None
+    assert cache.get(2, POLICY) == "NO"
+    assert len(cache.entries) == 1  # the expired entry was dropped on lookup
+    assert cache.size_bytes == len("NO") + ENTRY_OVERHEAD
+
+
+def test_least_recently_used_is_evicted_first():
+    cache = VerdictCache(max_entries=2, threshold=0)
+    cache.put(1, POLICY, "NO")
+    cache.put(2, POLICY, "NO")
+    cache.get(1, POLICY)  # 1 is now the most recent
+    cache.put(3, POLICY, "NO")
+
+    assert cache.get(2, POLICY) is None
+    assert cache.get(1, POLICY) == "NO"
+    assert cache.get(3, POLICY) == "NO"
+
+
+def test_byte_budget_evicts_too():
+    cache = VerdictCache(max_bytes=2 * (ENTRY_OVERHEAD + 10), threshold=0)
+    for fingerprint in range(3):
+        cache.put(fingerprint, POLICY, "x" * 10)
+    assert list(key[1] for key in cache.entries) == [1, 2]
+    assert cache.size_bytes == 2 * (ENTRY_OVERHEAD + 10)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "cache" / "verdicts.json")
+    cache = VerdictCache(path=path)
+    cache.put(0xDEADBEEF_00FF00FF, POLICY, "YES: Watching videos")
+    cache.put(7, POLICY, "NO", stored_at=time.time() - 10)
+    cache.get(7, POLICY)  # most recently used is saved last
+    cache.save()
+
+    loaded = VerdictCache(path=path)
+    assert list(loaded.entries) == list(cache.entries)
+    assert loaded.get(0xDEADBEEF_00FF00FF, POLICY) == "YES: Watching videos"
+    assert loaded.entries[(POLICY, 7)] == cache.entries[(POLICY, 7)]
+
+
+def test_load_skips_expired_rows_and_survives_a_bad_file(tmp_path):
+    path = tmp_path / "verdicts.json"
+    path.write_text(json.dumps([
+        [POLICY, "1", "NO", time.time() - 7200],
+        [POLICY, "2", "NO", time.time()],
+    ]), encoding="utf-8")
+    cache = VerdictCache(path=str(path), ttl=3600)
+    assert [key[1] for key in cache.entries] == [2]
+
+    path.write_text("not json", encoding="utf-8")
+    assert len(VerdictCache(path=str(path)).entries) == 0